@@ -0,0 +1,257 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Benchmarks on synthetic graphs whose size is controlled by a scale factor.
+
+Every benchmark takes the scale, the number of timed iterations and the number of
+untimed warm-up iterations, and returns an OrderedDict mapping measurement names to
+summaries made by `stats.summarize`.
+"""
+from __future__ import division
+from collections import OrderedDict
+from contextlib import closing
+import time
+
+import numpy as np
+
+import ngraph as ng
+import ngraph.transformers as ngt
+from ngraph.op_graph.serde.serde import serialize_graph, deserialize_graph
+from ngraph.testing import ConvParams
+from examples.benchmarks.regression.stats import summarize
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    """
+    Registers a benchmark function under name.
+    """
+    def register(f):
+        BENCHMARKS[name] = f
+        return f
+    return register
+
+
+def repeat(f, n_iterations, n_skip):
+    """
+    Times f.
+
+    Returns:
+        The times of the n_iterations calls made after n_skip warm-up calls, in msec.
+    """
+    for _ in range(n_skip):
+        f()
+    times = []
+    for _ in range(n_iterations):
+        start = time.time()
+        f()
+        times.append((time.time() - start) * 1000.0)
+    return times
+
+
+def mlp_graph(scale):
+    """
+    Builds an MLP with 8 * scale layers and its gradient update.
+
+    Returns:
+        The placeholder and the updates and cost of the MLP.
+    """
+    F = ng.make_axis(length=64, name='F')
+    N = ng.make_axis(length=32, name='N')
+    x = ng.placeholder([F, N])
+    h = x
+    for layer in range(8 * scale):
+        H = ng.make_axis(length=64, name='H{}'.format(layer))
+        w = ng.variable([H, h.axes[0]], initial_value=np.random.rand(64, h.axes[0].length) * 0.1)
+        h = ng.tanh(ng.dot(w, h))
+    cost = ng.sum(h, out_axes=())
+    variables = cost.variables()
+    updates = [ng.assign(v, v - 0.01 * ng.deriv(cost, v)) for v in variables]
+    return x, ng.sequential(updates + [cost])
+
+
+def op_chain(n_ops):
+    """
+    Builds a chain of n_ops elementwise ops, like an unrolled recurrence.
+    """
+    H = ng.make_axis(length=16, name='H')
+    h = ng.placeholder([H])
+    for _ in range(n_ops // 2):
+        h = ng.tanh(h + h)
+    return h
+
+
+@benchmark('graph_build')
+def graph_build(scale, n_iterations, n_skip):
+    results = OrderedDict()
+    results['build_mlp'] = summarize(repeat(lambda: mlp_graph(scale), n_iterations, n_skip))
+
+    n_ops = 10000 * scale
+    times = repeat(lambda: op_chain(n_ops), n_iterations, n_skip)
+    summary = summarize([t * 1000.0 / n_ops for t in times], units='usec')
+    summary['ops_per_sec'] = n_ops / (np.median(times) * 1e-3)
+    results['construct_op'] = summary
+    return results
+
+
+@benchmark('compile')
+def compile_computation(scale, n_iterations, n_skip):
+    """
+    Times the pass pipeline and code generation from the compile report of the computation.
+    """
+    reports = []
+
+    def compile_once():
+        x, cost = mlp_graph(scale)
+        with closing(ngt.make_transformer_factory('cpu')()) as transformer:
+            reports.append(transformer.computation(cost, x).compile_report)
+
+    repeat(compile_once, n_iterations, n_skip)
+    reports = reports[n_skip:]
+
+    results = OrderedDict()
+    for key in ('compile_time', 'execution_graph_time', 'pass_time', 'load_time',
+                'module_compile_time'):
+        results[key] = summarize([report[key] * 1000.0 for report in reports])
+    for pass_index, pass_report in enumerate(reports[0]['passes']):
+        name = 'pass_{}_{}'.format(pass_index, pass_report['name'])
+        results[name] = summarize([report['passes'][pass_index]['duration'] * 1000.0
+                                   for report in reports])
+    results['codegen_lines'] = summarize([report['codegen_lines'] for report in reports],
+                                         units='lines')
+    return results
+
+
+def kernel_throughput(computation, args, n_iterations, n_skip, flops=None):
+    """
+    Times calls of a computation.
+
+    Arguments:
+        computation: The computation.
+        args: The arguments of each call.
+        flops: If given, the floating point operations of one call, used to add the
+            achieved GFLOP/s to the summary.
+    """
+    times = repeat(lambda: computation(*args), n_iterations, n_skip)
+    summary = summarize(times)
+    if flops is not None:
+        summary['gflops'] = flops / (summary['median'] * 1e-3) * 1e-9
+    return summary
+
+
+@benchmark('kernels')
+def kernels(scale, n_iterations, n_skip):
+    results = OrderedDict()
+    size = 64 * scale
+    M = ng.make_axis(length=size, name='M')
+    K = ng.make_axis(length=size, name='K')
+    N = ng.make_axis(length=size, name='N')
+
+    with closing(ngt.make_transformer_factory('cpu')()) as transformer:
+        a = ng.placeholder([M, K])
+        b = ng.placeholder([K, N])
+        a_value = np.random.rand(size, size).astype(np.float32)
+        b_value = np.random.rand(size, size).astype(np.float32)
+
+        results['dot'] = kernel_throughput(
+            transformer.computation(ng.dot(a, b), a, b), (a_value, b_value),
+            n_iterations, n_skip, flops=2 * size ** 3)
+        results['add'] = kernel_throughput(
+            transformer.computation(a + a, a), (a_value,),
+            n_iterations, n_skip, flops=size ** 2)
+        results['tanh'] = kernel_throughput(
+            transformer.computation(ng.tanh(a), a), (a_value,),
+            n_iterations, n_skip, flops=size ** 2)
+        results['sum'] = kernel_throughput(
+            transformer.computation(ng.sum(a, out_axes=[M]), a), (a_value,),
+            n_iterations, n_skip, flops=size ** 2)
+        results['max'] = kernel_throughput(
+            transformer.computation(ng.max(a, out_axes=[M]), a), (a_value,),
+            n_iterations, n_skip, flops=size ** 2)
+
+        cf = ConvParams(C=16, N=8 * scale, K=16, H=32, W=32, R=3, S=3)
+        inputs = ng.placeholder(cf.ax_i)
+        filters = ng.placeholder(cf.ax_f)
+        inputs_value = np.random.rand(*cf.dimI).astype(np.float32)
+        filters_value = np.random.rand(*cf.dimF).astype(np.float32)
+        conv = ng.convolution(cf.conv_params, inputs, filters, axes=cf.ax_o)
+        conv_flops = 2 * int(np.prod(cf.dimO)) * int(np.prod(cf.dimF[:-1]))
+        results['convolution'] = kernel_throughput(
+            transformer.computation(conv, inputs, filters), (inputs_value, filters_value),
+            n_iterations, n_skip, flops=conv_flops)
+
+        pool_params = dict(pad_c=0, pad_d=0, pad_h=0, pad_w=0,
+                           str_c=1, str_d=1, str_h=2, str_w=2,
+                           J=1, T=1, R=2, S=2, op='max')
+        pool_axes = ng.make_axes([ng.make_axis(name='C', length=16),
+                                  ng.make_axis(name='D', length=1),
+                                  ng.make_axis(name='H', length=16),
+                                  ng.make_axis(name='W', length=16),
+                                  cf.ax_i[-1]])
+        pool = ng.pooling(pool_params, inputs, axes=pool_axes)
+        results['pooling'] = kernel_throughput(
+            transformer.computation(pool, inputs), (inputs_value,),
+            n_iterations, n_skip, flops=int(np.prod(cf.dimI)))
+
+        V = ng.make_axis(length=1000, name='V')
+        F = ng.make_axis(length=64, name='F')
+        T = ng.make_axis(length=size, name='T')
+        lut = ng.placeholder([V, F])
+        idx = ng.placeholder([T])
+        lut_value = np.random.rand(1000, 64).astype(np.float32)
+        idx_value = np.random.randint(1000, size=size).astype(np.float32)
+        lookup = ng.lookuptable(lut, idx, ng.make_axes([T, F]))
+        results['lookuptable'] = kernel_throughput(
+            transformer.computation(lookup, lut, idx), (lut_value, idx_value),
+            n_iterations, n_skip)
+    return results
+
+
+@benchmark('hetr_comm')
+def hetr_comm(scale, n_iterations, n_skip):
+    """
+    Times a round trip of a tensor to a second hetr device and back.
+    """
+    H = ng.make_axis(length=64 * scale, name='H')
+    W = ng.make_axis(length=64, name='W')
+    x = ng.placeholder([H, W])
+    with ng.metadata(device_id='1'):
+        x_plus_one = x + 1
+    x_plus_two = x_plus_one + 1
+    x_value = np.random.rand(H.length, W.length).astype(np.float32)
+    try:
+        with closing(ngt.make_transformer_factory('hetr')()) as transformer:
+            computation = transformer.computation(x_plus_two, x)
+            return OrderedDict(send_recv=kernel_throughput(computation, (x_value,),
+                                                           n_iterations, n_skip))
+    except Exception as e:
+        return OrderedDict(send_recv={'skipped': '{}: {}'.format(type(e).__name__, e)})
+
+
+@benchmark('serde')
+def serde(scale, n_iterations, n_skip):
+    _, cost = mlp_graph(scale)
+    serialized = []
+
+    def serialize():
+        serialized.append(serialize_graph([cost]))
+
+    results = OrderedDict()
+    results['serialize'] = summarize(repeat(serialize, n_iterations, n_skip))
+    results['deserialize'] = summarize(repeat(lambda: deserialize_graph(serialized[0]),
+                                              n_iterations, n_skip))
+    results['serialized_size'] = summarize([len(serialized[0])], units='bytes')
+    return results
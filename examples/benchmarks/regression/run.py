@@ -0,0 +1,86 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Runs the regression benchmarks and optionally compares them against a stored baseline.
+
+Example:
+    python -m examples.benchmarks.regression.run -o results.json
+    python -m examples.benchmarks.regression.run --baseline results.json --threshold 0.2
+
+Exits with status 1 if any measurement regressed past the threshold.
+"""
+from __future__ import print_function
+from collections import OrderedDict
+import argparse
+import platform
+import sys
+
+import numpy as np
+
+from examples.benchmarks.regression.cases import BENCHMARKS
+from examples.benchmarks.regression.stats import save_results, load_results, \
+    compare_results, format_results, format_comparison
+
+
+def run_benchmarks(names, scale, n_iterations, n_skip):
+    results = OrderedDict()
+    for name in names:
+        print('Running {}'.format(name), file=sys.stderr)
+        results[name] = BENCHMARKS[name](scale, n_iterations, n_skip)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-b', '--benchmarks', nargs='+', default=list(BENCHMARKS),
+                        choices=list(BENCHMARKS), help='benchmarks to run')
+    parser.add_argument('-s', '--scale', type=int, default=1,
+                        help='scale factor for the size of the synthetic graphs')
+    parser.add_argument('-n', '--num_iterations', type=int, default=10,
+                        help='timed iterations of each measurement')
+    parser.add_argument('--skip_iter', type=int, default=1,
+                        help='untimed warm-up iterations of each measurement')
+    parser.add_argument('-o', '--output', help='JSON file to write the results to')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown of the median that counts as a regression')
+    args = parser.parse_args(argv)
+
+    np.random.seed(0)
+    results = run_benchmarks(args.benchmarks, args.scale, args.num_iterations, args.skip_iter)
+    print(format_results(results))
+
+    if args.output is not None:
+        save_results(OrderedDict([
+            ('config', OrderedDict([('scale', args.scale),
+                                    ('num_iterations', args.num_iterations),
+                                    ('skip_iter', args.skip_iter),
+                                    ('python', platform.python_version()),
+                                    ('numpy', np.__version__)])),
+            ('results', results),
+        ]), args.output)
+
+    if args.baseline is not None:
+        baseline = load_results(args.baseline)
+        comparison = compare_results(results, baseline['results'], args.threshold)
+        print(format_comparison(comparison))
+        if any(regressed for _, _, _, _, _, regressed in comparison):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
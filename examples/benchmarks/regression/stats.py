@@ -0,0 +1,115 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+from __future__ import division
+from collections import OrderedDict
+import json
+
+import numpy as np
+
+
+def summarize(times, units='msec'):
+    """
+    Summarizes repeated measurements.
+
+    Arguments:
+        times: The measurements.
+        units: The units of the measurements.
+
+    Returns:
+        An OrderedDict with the count, mean, std, min, median, p90 and max of times.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    return OrderedDict([
+        ('count', int(times.size)),
+        ('mean', float(times.mean())),
+        ('std', float(times.std())),
+        ('min', float(times.min())),
+        ('median', float(np.median(times))),
+        ('p90', float(np.percentile(times, 90))),
+        ('max', float(times.max())),
+        ('units', units),
+    ])
+
+
+def save_results(results, filename):
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(filename):
+    with open(filename) as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+
+
+def compare_results(results, baseline, threshold=0.1):
+    """
+    Compares the median of every measurement against a baseline.
+
+    Arguments:
+        results: Benchmark results, {benchmark: {measurement: summary}}.
+        baseline: Benchmark results to compare against.
+        threshold: Relative slowdown of the median above which a measurement regressed.
+
+    Returns:
+        A list of (benchmark, measurement, baseline median, median, ratio, regressed)
+        tuples for the measurements present in both results.
+    """
+    comparison = []
+    for name, measurements in results.items():
+        for measurement, summary in measurements.items():
+            base_summary = baseline.get(name, {}).get(measurement, None)
+            if not isinstance(summary, dict) or not isinstance(base_summary, dict):
+                continue
+            if 'median' not in summary or 'median' not in base_summary:
+                continue
+            base, current = base_summary['median'], summary['median']
+            ratio = current / base if base > 0 else float('inf')
+            comparison.append((name, measurement, base, current, ratio,
+                               ratio > 1 + threshold))
+    return comparison
+
+
+def format_results(results):
+    header = ('Benchmark', 'Measurement', 'Mean', 'Median', 'Min', 'Max', 'Units')
+    formatter = '| {:<24} | {:<32} | {:>10} | {:>10} | {:>10} | {:>10} | {:^6} |'
+    lines = [formatter.format(*header)]
+    lines.insert(0, '-' * len(lines[0]))
+    lines.append(lines[0])
+    for name, measurements in results.items():
+        for measurement, summary in measurements.items():
+            if 'skipped' in summary:
+                lines.append(formatter.format(name, measurement, '', '', '', '', 'skip'))
+                continue
+            lines.append(formatter.format(
+                name, measurement,
+                '{:.3f}'.format(summary['mean']), '{:.3f}'.format(summary['median']),
+                '{:.3f}'.format(summary['min']), '{:.3f}'.format(summary['max']),
+                summary['units']))
+    lines.append(lines[0])
+    return '\n'.join(lines)
+
+
+def format_comparison(comparison):
+    header = ('Benchmark', 'Measurement', 'Baseline', 'Current', 'Ratio', '')
+    formatter = '| {:<24} | {:<32} | {:>10} | {:>10} | {:>6} | {:^10} |'
+    lines = [formatter.format(*header)]
+    lines.insert(0, '-' * len(lines[0]))
+    lines.append(lines[0])
+    for name, measurement, base, current, ratio, regressed in comparison:
+        lines.append(formatter.format(
+            name, measurement, '{:.3f}'.format(base), '{:.3f}'.format(current),
+            '{:.2f}'.format(ratio), 'REGRESSED' if regressed else ''))
+    lines.append(lines[0])
+    return '\n'.join(lines)
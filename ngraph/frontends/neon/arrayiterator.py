@@ -16,24 +16,104 @@ import numpy as np
 import ngraph as ng
 from future.utils import viewitems
 import six
+from six.moves import queue
 from ngraph.frontends.neon import ax
 import collections
+import sys
+import threading
+import time
+
+
+class BatchPrefetcher(object):
+    """
+    Fills a ring of preallocated minibatch buffers on a worker thread, so that the next
+    minibatches are ready while the current one is being used.
+
+    A yielded minibatch is only valid until the next one is requested, after which its
+    buffers are refilled.
+
+    Arguments:
+        fill: Function fill(buffers, i) that writes minibatch i into buffers.
+        ring (list): The buffers of each minibatch in flight. With a single entry, each
+            minibatch is filled on the calling thread.
+
+    Attributes:
+        starvation_time (float): Total seconds spent waiting for the worker thread.
+    """
+    def __init__(self, fill, ring):
+        self.fill = fill
+        self.ring = ring
+        self.starvation_time = 0.0
+
+    def batches(self, indices):
+        """
+        Yields the filled buffers of each minibatch in indices.
+        """
+        if len(self.ring) == 1:
+            buffers = self.ring[0]
+            for i in indices:
+                self.fill(buffers, i)
+                yield buffers
+            return
+
+        free = queue.Queue()
+        ready = queue.Queue()
+        stop = threading.Event()
+        for buffers in self.ring:
+            free.put(buffers)
+
+        def worker():
+            try:
+                for i in indices:
+                    buffers = free.get()
+                    if stop.is_set():
+                        return
+                    self.fill(buffers, i)
+                    ready.put((buffers, None))
+            except Exception:
+                ready.put((None, sys.exc_info()))
+
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+        try:
+            for _ in indices:
+                start = time.time()
+                buffers, error = ready.get()
+                self.starvation_time += time.time() - start
+                if error is not None:
+                    six.reraise(*error)
+                yield buffers
+                free.put(buffers)
+        finally:
+            stop.set()
+            free.put(None)
+            thread.join()
 
 
 class ArrayIterator(object):
 
-    def __init__(self, data_arrays, batch_size, total_iterations=None):
+    def __init__(self, data_arrays, batch_size, total_iterations=None, shuffle=False,
+                 prefetch_depth=2, seed=None):
         """
         During initialization, the input data will be converted to backend tensor objects
         (e.g. CPUTensor or GPUTensor). If the backend uses the GPU, the data is copied over to the
         device.
 
+        Minibatches are gathered into preallocated buffers by a worker thread, which stays
+        up to prefetch_depth minibatches ahead. A minibatch is only valid until the next one
+        is requested.
+
         Args:
             data_arrays (ndarray, shape: [# examples, feature size]): Input features of the
                 dataset.
             batch_size (int): number of examples in each minibatch
             total_iterations (int): number of minibatches to cycle through on this iterator.
                                     If not provided, it will cycle through all of the data once.
+            shuffle (bool): visit the examples in a new random order in each epoch.
+            prefetch_depth (int): number of minibatches prepared ahead. 0 prepares each
+                                  minibatch on the calling thread.
+            seed (int): seed of the shuffling order.
         """
         # Treat singletons like list so that iteration follows same syntax
         self.batch_size = batch_size
@@ -59,9 +139,15 @@ class ArrayIterator(object):
 
         self.start = 0
         self.index = 0
+        self.epoch = 0
 
         self.total_iterations = self.nbatches if total_iterations is None else total_iterations
 
+        self.shuffle = shuffle
+        self.seed = np.random.randint(2 ** 31) if seed is None else seed
+        self.prefetch_depth = prefetch_depth
+        self.prefetcher = None
+
     @property
     def nbatches(self):
         """
@@ -87,6 +173,13 @@ class ArrayIterator(object):
             placeholders['iteration'] = ng.placeholder(axes=())
         return placeholders
 
+    @property
+    def starvation_time(self):
+        """
+        Total seconds spent waiting for minibatches to be prepared.
+        """
+        return self.prefetcher.starvation_time if self.prefetcher is not None else 0.0
+
     def reset(self):
         """
         Resets the starting index of this dataset to zero. Useful for calling
@@ -96,6 +189,43 @@ class ArrayIterator(object):
         self.start = 0
         self.index = 0
 
+    def make_prefetcher(self):
+        ring = [{k: np.empty((self.batch_size,) + src.shape[1:], dtype=src.dtype)
+                 for k, src in self.data_arrays.items()}
+                for _ in range(self.prefetch_depth + 1)]
+        # The example order of the current and the next epoch, so that a minibatch that
+        # wraps around is gathered with one take. Owned by the worker thread.
+        order = np.empty(2 * self.ndata, dtype=np.int64)
+        order_epoch = [None]
+        positions = np.empty(self.batch_size, dtype=np.int64)
+        indices = np.empty(self.batch_size, dtype=np.int64)
+        offsets = np.arange(self.batch_size, dtype=np.int64)
+
+        def epoch_order(out, epoch):
+            out[:] = np.arange(self.ndata)
+            if self.shuffle:
+                np.random.RandomState([self.seed, epoch]).shuffle(out)
+
+        def fill(buffers, index):
+            # self.start and self.epoch only change once the prefetcher is done
+            position = self.start + index * self.batch_size
+            start = position % self.ndata
+            epoch = self.epoch + position // self.ndata
+            if order_epoch[0] != epoch:
+                if order_epoch[0] == epoch - 1:
+                    order[:self.ndata] = order[self.ndata:]
+                else:
+                    epoch_order(order[:self.ndata], epoch)
+                epoch_order(order[self.ndata:], epoch + 1)
+                order_epoch[0] = epoch
+            np.add(offsets, start, out=positions)
+            np.take(order, positions, out=indices, mode='clip')
+            for k, src in self.data_arrays.items():
+                np.take(src, indices, axis=0, out=buffers[k], mode='clip')
+            buffers['iteration'] = index + 1
+
+        return BatchPrefetcher(fill, ring)
+
     def __iter__(self):
         """
         Returns a new minibatch of data with each call.
@@ -103,29 +233,43 @@ class ArrayIterator(object):
         Yields:
             tuple: The next minibatch which includes both features and labels.
         """
-        i1 = self.start
-        while self.index < self.total_iterations:
-            i1 = (self.start + self.index * self.batch_size) % self.ndata
-            bsz = min(self.batch_size, self.ndata - i1)
-            oslice1 = slice(i1, i1 + bsz)
-            self.index += 1
-
-            if self.batch_size > bsz:
-                batch_bufs = {k: np.concatenate([src[oslice1], src[:self.batch_size - bsz]])
-                              for k, src in self.data_arrays.items()}
-            else:
-                batch_bufs = {k: src[oslice1] for k, src in self.data_arrays.items()}
+        if self.prefetcher is None:
+            self.prefetcher = self.make_prefetcher()
 
-            batch_bufs['iteration'] = self.index
+        batches = range(self.index, self.total_iterations)
+        for batch_bufs in self.prefetcher.batches(batches):
+            self.index += 1
             yield batch_bufs
 
-        self.start = (self.start + self.total_iterations * self.batch_size) % self.ndata
+        position = self.start + self.total_iterations * self.batch_size
+        self.epoch += position // self.ndata
+        self.start = position % self.ndata
 
 
 class SequentialArrayIterator(object):
 
     def __init__(self, data_arrays, time_steps, batch_size,
-                 total_iterations=None, reverse_target=False, get_prev_target=False):
+                 total_iterations=None, reverse_target=False, get_prev_target=False,
+                 prefetch_depth=2):
+        """
+        Iterates over sequences of time_steps tokens, where each of the batch_size rows
+        of a minibatch continues the sequence of the same row in the previous minibatch.
+
+        Minibatches are copied into preallocated buffers by a worker thread, which stays
+        up to prefetch_depth minibatches ahead. A minibatch is only valid until the next one
+        is requested.
+
+        Args:
+            data_arrays (dict): Token arrays of the dataset.
+            time_steps (int): number of tokens in each sequence of a minibatch
+            batch_size (int): number of sequences in each minibatch
+            total_iterations (int): number of minibatches to cycle through on this iterator.
+                                    If not provided, it will cycle through all of the data once.
+            reverse_target (bool): reverse each sequence of 'tgt_txt'.
+            get_prev_target (bool): add 'prev_tgt', 'tgt_txt' delayed by one token.
+            prefetch_depth (int): number of minibatches prepared ahead. 0 prepares each
+                                  minibatch on the calling thread.
+        """
         self.get_prev_target = get_prev_target
         self.reverse_target = reverse_target
 
@@ -161,6 +305,9 @@ class SequentialArrayIterator(object):
         if self.get_prev_target:
             self.data_arrays['prev_tgt'] = np.roll(self.data_arrays['tgt_txt'], shift=1, axis=2)
 
+        self.prefetch_depth = prefetch_depth
+        self.prefetcher = None
+
     def make_placeholders(self):
         ax.N.length = self.batch_size
         ax.REC.length = self.time_steps
@@ -168,12 +315,32 @@ class SequentialArrayIterator(object):
         p_axes = ng.make_axes([ax.N, ax.REC])
         return {k: ng.placeholder(p_axes) for k in self.data_arrays.keys()}
 
+    @property
+    def starvation_time(self):
+        """
+        Total seconds spent waiting for minibatches to be prepared.
+        """
+        return self.prefetcher.starvation_time if self.prefetcher is not None else 0.0
+
     def reset(self):
         self.index = 0
 
+    def make_prefetcher(self):
+        ring = [{k: np.empty((self.batch_size, self.time_steps), dtype=x.dtype)
+                 for k, x in viewitems(self.data_arrays)}
+                for _ in range(self.prefetch_depth + 1)]
+
+        def fill(buffers, index):
+            idx = index % self.nbatches
+            for k, x in viewitems(self.data_arrays):
+                np.copyto(buffers[k], x[:, idx, :])
+
+        return BatchPrefetcher(fill, ring)
+
     def __iter__(self):
-        while self.index < self.total_iterations:
-            idx = self.index % self.nbatches
-            self.index += 1
+        if self.prefetcher is None:
+            self.prefetcher = self.make_prefetcher()
 
-            yield {k: np.squeeze(x[:, idx:(idx + 1), :]) for k, x in viewitems(self.data_arrays)}
+        for batch_bufs in self.prefetcher.batches(range(self.index, self.total_iterations)):
+            self.index += 1
+            yield batch_bufs
@@ -14,7 +14,8 @@
 # ----------------------------------------------------------------------------
 import numpy as np
 import os
-from ngraph.util.persist import pickle_load, valid_path_append, fetch_file
+from ngraph.util.persist import pickle_load, valid_path_append, fetch_file, \
+    load_cached_arrays, cache_name
 import tarfile
 
 
@@ -34,7 +35,8 @@ class CIFAR10(object):
 
     def load_data(self):
         """
-        Fetch the CIFAR-10 dataset and load it into memory.
+        Fetch the CIFAR-10 dataset and load it into memory, or memory map it from the data
+        cache if NGRAPH_DATA_CACHE_DIR is set.
 
         Arguments:
             path (str, optional): Local directory in which to cache the raw
@@ -45,39 +47,46 @@ class CIFAR10(object):
         Returns:
             tuple: Both training and test sets are returned.
         """
-        workdir, filepath = valid_path_append(self.path, '', self.filename)
-        if not os.path.exists(filepath):
-            fetch_file(self.url, self.filename, filepath, self.size)
+        def make_arrays():
+            workdir, filepath = valid_path_append(self.path, '', self.filename)
+            if not os.path.exists(filepath):
+                fetch_file(self.url, self.filename, filepath, self.size)
 
-        batchdir = os.path.join(workdir, 'cifar-10-batches-py')
-        if not os.path.exists(os.path.join(batchdir, 'data_batch_1')):
-            assert os.path.exists(filepath), "Must have cifar-10-python.tar.gz"
-            with tarfile.open(filepath, 'r:gz') as f:
-                f.extractall(workdir)
+            batchdir = os.path.join(workdir, 'cifar-10-batches-py')
+            if not os.path.exists(os.path.join(batchdir, 'data_batch_1')):
+                assert os.path.exists(filepath), "Must have cifar-10-python.tar.gz"
+                with tarfile.open(filepath, 'r:gz') as f:
+                    f.extractall(workdir)
 
-        train_batches = [os.path.join(batchdir, 'data_batch_' + str(i)) for i in range(1, 6)]
-        Xlist, ylist = [], []
-        for batch in train_batches:
-            with open(batch, 'rb') as f:
+            train_batches = [os.path.join(batchdir, 'data_batch_' + str(i))
+                             for i in range(1, 6)]
+            Xlist, ylist = [], []
+            for batch in train_batches:
+                with open(batch, 'rb') as f:
+                    d = pickle_load(f)
+                    Xlist.append(d['data'])
+                    ylist.append(d['labels'])
+
+            X_train = np.vstack(Xlist).reshape(-1, 3, 32, 32)
+            y_train = np.vstack(ylist).ravel()
+
+            with open(os.path.join(batchdir, 'test_batch'), 'rb') as f:
                 d = pickle_load(f)
-                Xlist.append(d['data'])
-                ylist.append(d['labels'])
+                X_test, y_test = d['data'], d['labels']
+                X_test = X_test.reshape(-1, 3, 32, 32)
 
-        X_train = np.vstack(Xlist).reshape(-1, 3, 32, 32)
-        y_train = np.vstack(ylist).ravel()
+            return {'train_image': X_train, 'train_label': y_train,
+                    'valid_image': X_test, 'valid_label': np.array(y_test)}
 
-        with open(os.path.join(batchdir, 'test_batch'), 'rb') as f:
-            d = pickle_load(f)
-            X_test, y_test = d['data'], d['labels']
-            X_test = X_test.reshape(-1, 3, 32, 32)
+        arrays = load_cached_arrays(cache_name('cifar10', self.path), make_arrays)
 
-        self.train_set = {'image': {'data': X_train,
+        self.train_set = {'image': {'data': arrays['train_image'],
                                     'axes': ('batch', 'C', 'height', 'width')},
-                          'label': {'data': y_train,
+                          'label': {'data': arrays['train_label'],
                                     'axes': ('batch',)}}
-        self.valid_set = {'image': {'data': X_test,
+        self.valid_set = {'image': {'data': arrays['valid_image'],
                                     'axes': ('batch', 'C', 'height', 'width')},
-                          'label': {'data': np.array(y_test),
+                          'label': {'data': arrays['valid_label'],
                                     'axes': ('batch',)}}
 
         return self.train_set, self.valid_set
@@ -12,7 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
-from ngraph.util.persist import valid_path_append, fetch_file, pickle_load
+from ngraph.util.persist import valid_path_append, fetch_file, pickle_load, \
+    load_cached_arrays, cache_name
 import os
 import numpy as np
 
@@ -98,18 +99,37 @@ class IMDB(object):
         self.pad_idx = pad_idx
 
     def load_data(self, test_split=0.2):
+        """
+        Fetch and preprocess the IMDB dataset. The preprocessed reviews are memory mapped
+        from the data cache if NGRAPH_DATA_CACHE_DIR is set, but shuffling copies them
+        into memory.
+
+        Arguments:
+            test_split (float): fraction of the reviews in the validation set.
+
+        Returns:
+            dict: The 'train' and 'valid' sets.
+        """
         self.data_dict = {}
         self.vocab = None
-        workdir, filepath = valid_path_append(self.path, '', self.filename)
-        if not os.path.exists(filepath):
-            fetch_file(self.url, self.filename, filepath, self.filesize)
 
-        with open(filepath, 'rb') as f:
-            X, y = pickle_load(f)
+        def make_arrays():
+            workdir, filepath = valid_path_append(self.path, '', self.filename)
+            if not os.path.exists(filepath):
+                fetch_file(self.url, self.filename, filepath, self.filesize)
+
+            with open(filepath, 'rb') as f:
+                X, y = pickle_load(f)
 
-        X = preprocess_text(X, self.vocab_size)
-        X = pad_sentences(
-            X, pad_idx=self.pad_idx, pad_to_len=self.sentence_length, pad_from='left')
+            X = preprocess_text(X, self.vocab_size)
+            X = pad_sentences(
+                X, pad_idx=self.pad_idx, pad_to_len=self.sentence_length, pad_from='left')
+            return {'review': X, 'label': np.asarray(y)}
+
+        arrays = load_cached_arrays(cache_name('imdb', self.path, self.vocab_size,
+                                               self.sentence_length, self.pad_idx),
+                                    make_arrays)
+        X, y = arrays['review'], arrays['label']
 
         if self.shuffle:
             indices = np.arange(len(y))
@@ -124,9 +144,6 @@ class IMDB(object):
         X_test = X[int(len(X) * (1 - test_split)):]
         y_test = y[int(len(X) * (1 - test_split)):]
 
-        y_train = np.array(y_train)
-        y_test = np.array(y_test)
-
         self.nclass = 1 + max(np.max(y_train), np.max(y_test))
 
         self.data_dict['train'] = {'review': {'data': X_train,
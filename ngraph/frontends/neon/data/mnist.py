@@ -13,7 +13,8 @@
 # limitations under the License.
 # ----------------------------------------------------------------------------
 import gzip
-from ngraph.util.persist import ensure_dirs_exist, pickle_load, valid_path_append, fetch_file
+from ngraph.util.persist import ensure_dirs_exist, pickle_load, valid_path_append, fetch_file, \
+    load_cached_arrays, cache_name
 import os
 from tqdm import tqdm
 import numpy as np
@@ -33,7 +34,8 @@ class MNIST(object):
 
     def load_data(self):
         """
-        Fetch the MNIST dataset and load it into memory.
+        Fetch the MNIST dataset and load it into memory, or memory map it from the data
+        cache if NGRAPH_DATA_CACHE_DIR is set.
 
         Arguments:
             path (str, optional): Local directory in which to cache the raw
@@ -42,20 +44,28 @@ class MNIST(object):
         Returns:
             tuple: Both training and test sets are returned.
         """
-        workdir, filepath = valid_path_append(self.path, '', self.filename)
-        if not os.path.exists(filepath):
-            fetch_file(self.url, self.filename, filepath, self.size)
+        def make_arrays():
+            workdir, filepath = valid_path_append(self.path, '', self.filename)
+            if not os.path.exists(filepath):
+                fetch_file(self.url, self.filename, filepath, self.size)
 
-        with gzip.open(filepath, 'rb') as f:
-            self.train_set, self.valid_set = pickle_load(f)
+            with gzip.open(filepath, 'rb') as f:
+                train_set, valid_set = pickle_load(f)
 
-        self.train_set = {'image': {'data': self.train_set[0].reshape(60000, 28, 28),
+            return {'train_image': train_set[0].reshape(60000, 28, 28),
+                    'train_label': train_set[1],
+                    'valid_image': valid_set[0].reshape(10000, 28, 28),
+                    'valid_label': valid_set[1]}
+
+        arrays = load_cached_arrays(cache_name('mnist', self.path), make_arrays)
+
+        self.train_set = {'image': {'data': arrays['train_image'],
                                     'axes': ('batch', 'height', 'width')},
-                          'label': {'data': self.train_set[1],
+                          'label': {'data': arrays['train_label'],
                                     'axes': ('batch',)}}
-        self.valid_set = {'image': {'data': self.valid_set[0].reshape(10000, 28, 28),
+        self.valid_set = {'image': {'data': arrays['valid_image'],
                                     'axes': ('batch', 'height', 'width')},
-                          'label': {'data': self.valid_set[1],
+                          'label': {'data': arrays['valid_label'],
                                     'axes': ('batch',)}}
 
         return self.train_set, self.valid_set
@@ -12,7 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
-from ngraph.util.persist import valid_path_append, fetch_file
+from ngraph.util.persist import valid_path_append, fetch_file, load_cached_arrays, \
+    cache_name
 import os
 import numpy as np
 
@@ -37,29 +38,50 @@ class PTB(object):
         self.shift_target = shift_target
 
     def load_data(self):
-        self.data_dict = {}
-        self.vocab = None
-        for phase in ['train', 'test', 'valid']:
-            filename, filesize = self.filemap[phase]['filename'], self.filemap[phase]['size']
-            workdir, filepath = valid_path_append(self.path, '', filename)
-            if not os.path.exists(filepath):
-                fetch_file(self.url, filename, filepath, filesize)
+        """
+        Fetch the PTB dataset and load it into memory, or memory map it from the data
+        cache if NGRAPH_DATA_CACHE_DIR is set.
 
-            tokens = open(filepath).read()  # add tokenization here if necessary
+        Returns:
+            dict: The 'train', 'test' and 'valid' sets.
+        """
+        def make_arrays():
+            arrays = {}
+            vocab = None
+            for phase in ['train', 'test', 'valid']:
+                filename = self.filemap[phase]['filename']
+                filesize = self.filemap[phase]['size']
+                workdir, filepath = valid_path_append(self.path, '', filename)
+                if not os.path.exists(filepath):
+                    fetch_file(self.url, filename, filepath, filesize)
 
-            self.vocab = sorted(set(tokens if self.vocab is None else self.vocab))
+                tokens = open(filepath).read()  # add tokenization here if necessary
 
-            # vocab dicts
-            self.token_to_index = dict((t, i) for i, t in enumerate(self.vocab))
-            self.index_to_token = dict((i, t) for i, t in enumerate(self.vocab))
+                vocab = sorted(set(tokens if vocab is None else vocab))
+                token_to_index = dict((t, i) for i, t in enumerate(vocab))
 
-            # map tokens to indices
-            X = np.asarray([self.token_to_index[t] for t in tokens], dtype=np.uint32)
-            if self.shift_target:
-                y = np.concatenate((X[1:], X[:1]))
-            else:
-                y = X.copy()
+                # map tokens to indices
+                X = np.asarray([token_to_index[t] for t in tokens], dtype=np.uint32)
+                if self.shift_target:
+                    y = np.concatenate((X[1:], X[:1]))
+                else:
+                    y = X.copy()
 
-            self.data_dict[phase] = {'inp_txt': X, 'tgt_txt': y}
+                arrays[phase + '_inp_txt'] = X
+                arrays[phase + '_tgt_txt'] = y
+            arrays['vocab'] = np.array(vocab)
+            return arrays
+
+        arrays = load_cached_arrays(cache_name('ptb', self.path, self.shift_target), make_arrays)
+
+        self.vocab = arrays['vocab'].tolist()
+
+        # vocab dicts
+        self.token_to_index = dict((t, i) for i, t in enumerate(self.vocab))
+        self.index_to_token = dict((i, t) for i, t in enumerate(self.vocab))
+
+        self.data_dict = {phase: {'inp_txt': arrays[phase + '_inp_txt'],
+                                  'tgt_txt': arrays[phase + '_tgt_txt']}
+                          for phase in ['train', 'test', 'valid']}
 
         return self.data_dict
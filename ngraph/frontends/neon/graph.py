@@ -2,12 +2,12 @@ import functools
 from contextlib import contextmanager
 from collections import OrderedDict
 
-import parsel
 from cachetools import keys, cached
 from orderedset import OrderedSet
 
 import ngraph as ng
-from ngraph.util.names import name_scope, NameableValue, NameScope
+from ngraph.frontends.neon.selector import OpSelector
+from ngraph.util.names import name_scope, NameScope
 
 
 @contextmanager
@@ -78,6 +78,7 @@ class ComputationalGraph(object):
             all_ops = ng.Op.get_all_ops()
             all_ops.append(ops)
         self.ops = ops
+        self._selector = None
 
     def __iter__(self):
         return iter(self.ops)
@@ -112,11 +113,6 @@ class ComputationalGraph(object):
         """
         A dictionary of all defined scopes in the graph as "scope:subgraph" pairs
         """
-        # TODO: How to extract nested values from the nested xml
-        # scopes = [selected.root.attrib["id"] for selected in self._to_xml().css(".scope")]
-        # scopes = {scope_name: SubGraph(self.select("[scope={}]".format(scope_name)))
-        #           for scope_name in scopes}
-
         scopes = dict()
         for op in self.select("[scope]"):
             scope_name = op.scope.name
@@ -139,45 +135,6 @@ class ComputationalGraph(object):
         return {mode: ComputationalGraph(ng.Op.all_op_references(ops))
                 for mode, ops in modes.items()}
 
-    @cached({}, key=_cache_ops_length)
-    def _to_xml(self):
-        xml = ['<?xml version="1.0" encoding="UTF-8" ?>',
-               '<subgraph>']
-
-        # __ops is a list of ops at any specific nesting level
-        xml_dict = {"__ops": list()}
-
-        def unravel_join(xml):
-            """
-            Unravels a dictionary of dictionaries and joins all of the strings
-            """
-            unraveled = xml.pop("__ops")
-            for key, subxml in xml.items():
-                unraveled.append("<{short_name} id={name} "
-                                 "class=scope>".format(short_name=key.split("_")[0],
-                                                       name=key))
-                unraveled.append(unravel_join(subxml))
-                unraveled.append("</{}>".format(key))
-            return "\n".join(unraveled)
-
-        def nest_xml(op_xml, scope):
-            """
-            Places op_xml at the right nesting level, creating levels if necessary.
-            """
-            start_dict = xml_dict
-            if scope is not None:
-                nest_list = scope.name.split("/")
-                for key in nest_list:
-                    start_dict = start_dict.setdefault(key, {"__ops": list()})
-            start_dict["__ops"].append(op_xml)
-
-        for op in self:
-            nest_xml(op._xml_description(), op.scope)
-
-        xml.append(unravel_join(xml_dict))
-        xml.append("</subgraph>")
-        return parsel.Selector(u"\n".join(xml))
-
     def select(self, css):
         """
         Select ops from the graph using css-like selectors. The available selectors
@@ -186,13 +143,17 @@ class ComputationalGraph(object):
             - id: Op name
             - class: Op label
             - attribute: Any key-value pair from op metadata
-            - hierarchy: Scopes provide op hierarchy
+            - hierarchy: Scopes provide op hierarchy, with descendant (" ") and
+              child (">") combinators
+
+        Selectors are evaluated with indexes that are updated as ops are added to
+        the graph, see OpSelector.
 
         Arguments:
             css (str): A css selector string
 
         Returns:
-            list of ops
+            list of ops, in graph order
 
         Examples:
             # Get all ops with the "bias" label
@@ -204,6 +165,9 @@ class ComputationalGraph(object):
             # Get the "bias" ops within Affine layers
             subgraph.select("Affine .bias")
 
+            # Get the "bias" ops directly within Affine layers, and all weights
+            subgraph.select("Affine > .bias, .weight")
+
             # Get all TensorValueOps
             subgraph.select("TensorValueOp")
 
@@ -211,21 +175,10 @@ class ComputationalGraph(object):
             subgraph.select("[recurrent_step=3]")
         """
 
-        ops = list()
-        for selected in self._to_xml().css(css):
-            op = self._selector_to_op(selected)
-            if op is not None:
-                ops.append(op)
-
-        return ops
-
-    @staticmethod
-    def _selector_to_op(selector):
-        op = selector.root.attrib.get("id", None)
-        if op is not None:
-            op = NameableValue.get_object_by_name(op)
+        if self._selector is None or self._selector.ops is not self.ops:
+            self._selector = OpSelector(self.ops)
 
-        return op
+        return self._selector.select(css)
 
 
 class SubGraph(ComputationalGraph):
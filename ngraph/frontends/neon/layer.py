@@ -16,6 +16,7 @@ from __future__ import division, print_function, absolute_import
 import collections
 import itertools
 from contextlib import contextmanager
+import numpy as np
 import ngraph as ng
 from ngraph.frontends.neon.axis import shadow_axes_map, is_shadow_axis, reorder_spatial_axes
 from ngraph.frontends.neon.graph import SubGraph
@@ -1078,21 +1079,34 @@ class LSTM(Recurrent):
                             set to False to be stateful.
         return_sequence (bool): default to be True to return the whole sequence output.
         backward (bool): default to be False to process the sequence left to right
+        fuse_gates (bool): default to be True to keep the weights of all gates in one matrix,
+                           so that each time step needs a single recurrent dot. Only used
+                           with a single hidden axis.
         name (str, optional): name to refer to this layer as.
     Attributes:
-        W_input (Tensor): weights from inputs to output units
+        W_input (dict of Tensor): weights from inputs to output units of each gate
             (output_size, input_size)
-        W_recur (Tensor): weights for recurrent connections
+        W_recur (dict of Tensor): weights for recurrent connections of each gate
             (output_size, output_size)
-        b (Tensor): Biases on output units (output_size, 1)
+        b (dict of Tensor): Biases on output units of each gate (output_size, 1)
+        W_input_fused (Tensor): weights from inputs to the output units of all gates
+            (4 * output_size, input_size) when the gates are fused, otherwise None.
+            W_input contains views of its rows.
+        W_recur_fused (Tensor): weights for recurrent connections of all gates
+            (4 * output_size, output_size) when the gates are fused, otherwise None.
+        b_fused (Tensor): Biases on the output units of all gates (4 * output_size, 1) when
+            the gates are fused, otherwise None.
 
     Gates: i - input gate, f - forget gate, o - output gate, g - input modulation
+
+    When the gates are fused, the per gate tensors are views of the fused variables, so
+    per gate values can still be read from and assigned to them.
     """
     metadata = {'gates': ['i', 'f', 'o', 'g']}
 
     def __init__(self, nout, init, init_inner=None, activation=None, gate_activation=None,
                  batch_norm=False, reset_cells=True, return_sequence=True, backward=False,
-                 **kwargs):
+                 fuse_gates=True, **kwargs):
         super(LSTM, self).__init__(nout, init, init_inner=init_inner, activation=activation,
                                    reset_cells=reset_cells, return_sequence=return_sequence,
                                    backward=backward, **kwargs)
@@ -1102,6 +1116,92 @@ class LSTM(Recurrent):
         else:
             self.batch_norm = None
         self.gate_activation = gate_activation if gate_activation is not None else self.activation
+        self.fuse_gates = fuse_gates
+        self.W_input_fused = None
+        self.W_recur_fused = None
+        self.b_fused = None
+
+    def _gate_slice(self, x, gate_axis, start, stop, axis):
+        """
+        Slices gates start to stop from the fused gate axis of x.
+
+        Arguments:
+            x (Tensor): A tensor with gate_axis.
+            gate_axis (Axis): An axis with the units of consecutive gates.
+            start (int): The first gate.
+            stop (int): The gate after the last.
+            axis (Axis): The axis that replaces gate_axis in the slice.
+
+        Returns:
+            A view of the units of the gates.
+        """
+        pos = x.axes.index(gate_axis)
+        units = self.out_feature_axes[0].length
+        slices = tuple(slice(start * units, stop * units) if i == pos else slice(None)
+                       for i in range(len(x.axes)))
+        return ng.tensor_slice(x, slices,
+                               axes=x.axes[:pos] + ng.make_axes([axis]) + x.axes[pos + 1:])
+
+    def _fused_step(self, h_ff, states):
+        h_state = states[0]
+        c_state = states[1]
+        ifog = h_ff + ng.dot(self.W_recur_fused, h_state) + self.b_fused
+
+        # The sigmoid gates are consecutive, so one activation covers all of them
+        hidden_axis = self.out_feature_axes[0]
+        ifo_act = self.gate_activation(self._gate_slice(ifog, self.gate_axis, 0, 3,
+                                                        self.ifo_axis))
+        i, f, o = (self._gate_slice(ifo_act, self.ifo_axis, k, k + 1, hidden_axis)
+                   for k in range(3))
+        g = self.activation(self._gate_slice(ifog, self.gate_axis, 3, 4, hidden_axis))
+
+        c = f * c_state + i * g
+        # c_prev is the state before applying activation
+        h = o * self.activation(c)
+        h = ng.cast_role(h, self.out_axes)
+        return [h, c]
+
+    def _fused_gate_variables(self):
+        """
+        Creates the fused variables and the per gate views of them.
+        """
+        gates = self.metadata["gates"]
+        hidden_axis = self.out_feature_axes[0]
+        self.gate_axis = ng.make_axis(len(gates) * hidden_axis.length)
+        self.ifo_axis = ng.make_axis(3 * hidden_axis.length)
+        gate_axes = ng.make_axes([self.gate_axis])
+
+        def gate_values(init, axes):
+            # Each gate is initialized as it would be on its own
+            def initial_value(fused_axes):
+                values = [init(axes) if callable(init) else init for _ in gates]
+                return np.concatenate([np.broadcast_to(value, axes.lengths)
+                                       for value in values])
+            return initial_value
+
+        self.W_input_fused = ng.variable(axes=gate_axes + self.in_feature_axes,
+                                         initial_value=gate_values(self.init, self.w_in_axes),
+                                         metadata={"label": LABELS["weight"]},
+                                         ).named("W_in")
+        self.W_recur_fused = ng.variable(axes=gate_axes + self.out_feature_axes,
+                                         initial_value=gate_values(self.init_inner,
+                                                                   self.w_re_axes),
+                                         metadata={"label": LABELS["weight"]},
+                                         ).named("W_re")
+        self.b_fused = ng.variable(axes=gate_axes, initial_value=0,
+                                   metadata={"label": LABELS["bias"]},
+                                   ).named("bias")
+
+        temp_axis = self.w_in_axes[0]
+        self.W_input = {k: self._gate_slice(self.W_input_fused, self.gate_axis, idx, idx + 1,
+                                            temp_axis).named("W_in_{}".format(k))
+                        for idx, k in enumerate(gates)}
+        self.W_recur = {k: self._gate_slice(self.W_recur_fused, self.gate_axis, idx, idx + 1,
+                                            temp_axis).named("W_re_{}".format(k))
+                        for idx, k in enumerate(gates)}
+        self.b = {k: self._gate_slice(self.b_fused, self.gate_axis, idx, idx + 1,
+                                      hidden_axis).named("bias_{}".format(k))
+                  for idx, k in enumerate(gates)}
 
     def _step(self, h_ff, states):
         h_state = states[0]
@@ -1168,20 +1268,24 @@ class LSTM(Recurrent):
 
             # params are dictionary for i, f, o, g
             gates = self.metadata["gates"]
-            self.W_input = {k: ng.variable(axes=self.w_in_axes,
-                                           initial_value=self.init,
-                                           metadata={"label": LABELS["weight"]},
-                                           ).named("W_in_{}".format(k)) for k in gates}
+            self.fuse_gates = self.fuse_gates and len(self.out_feature_axes) == 1
+            if self.fuse_gates:
+                self._fused_gate_variables()
+            else:
+                self.W_input = {k: ng.variable(axes=self.w_in_axes,
+                                               initial_value=self.init,
+                                               metadata={"label": LABELS["weight"]},
+                                               ).named("W_in_{}".format(k)) for k in gates}
 
-            self.W_recur = {k: ng.variable(axes=self.w_re_axes,
-                                           initial_value=self.init_inner,
-                                           metadata={"label": LABELS["weight"]},
-                                           ).named("W_re_{}".format(k)) for k in gates}
+                self.W_recur = {k: ng.variable(axes=self.w_re_axes,
+                                               initial_value=self.init_inner,
+                                               metadata={"label": LABELS["weight"]},
+                                               ).named("W_re_{}".format(k)) for k in gates}
 
-            self.b = {k: ng.variable(axes=self.out_feature_axes,
-                                     initial_value=0,
-                                     metadata={"label": LABELS["bias"]},
-                                     ).named("bias_{}".format(k)) for k in gates}
+                self.b = {k: ng.variable(axes=self.out_feature_axes,
+                                         initial_value=0,
+                                         metadata={"label": LABELS["bias"]},
+                                         ).named("bias_{}".format(k)) for k in gates}
 
         h = self.h_init
         c = self.c_init
@@ -1192,19 +1296,34 @@ class LSTM(Recurrent):
         # Compute feed forward weighted inputs
         # Batch norm is computed only on the weighted inputs
         # as in https://arxiv.org/abs/1510.01378
-        h_ff = dict()
-        for k in self.metadata["gates"]:
-            h_ff[k] = ng.dot(self.W_input[k], in_obj)
+        if self.fuse_gates:
+            # A single dot over the whole sequence for all gates
+            h_ff = ng.dot(self.W_input_fused, in_obj)
             if self.batch_norm is not None:
-                h_ff[k] = self.batch_norm[k](h_ff[k])
+                hidden_axis = self.out_feature_axes[0]
+                h_ff_gates = [self.batch_norm[k](self._gate_slice(h_ff, self.gate_axis,
+                                                                  idx, idx + 1, hidden_axis))
+                              for idx, k in enumerate(self.metadata["gates"])]
+                pos = h_ff_gates[0].axes.index(hidden_axis)
+                h_ff = ng.cast_axes(ng.concat_along_axis(h_ff_gates, hidden_axis),
+                                    h_ff_gates[0].axes[:pos] + ng.make_axes([self.gate_axis]) +
+                                    h_ff_gates[0].axes[pos + 1:])
+            step = self._fused_step
+        else:
+            h_ff = dict()
+            for k in self.metadata["gates"]:
+                h_ff[k] = ng.dot(self.W_input[k], in_obj)
+                if self.batch_norm is not None:
+                    h_ff[k] = self.batch_norm[k](h_ff[k])
+            step = self._step
 
-            # slice the weighted inputs into time slices
+        # slice the weighted inputs into time slices
         h_ff = get_steps(h_ff, self.recurrent_axis, self.backward)
 
         # recurrent computation
         for i in range(self.recurrent_axis.length):
             with ng.metadata(recurrent_step=str(i)):
-                [h, c] = self._step(h_ff[i], [h, c])
+                [h, c] = step(h_ff[i], [h, c])
                 h_list.append(h)
                 c_list.append(c)
 
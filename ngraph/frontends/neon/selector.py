@@ -0,0 +1,298 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import re
+from collections import defaultdict
+
+
+_token_re = re.compile(r"""
+    (?P<group>\s*,\s*) |
+    (?P<child>\s*>\s*) |
+    (?P<descendant>\s+) |
+    (?P<type>\*|[A-Za-z_][\w\-]*) |
+    \#(?P<id>(?:[\w\-/:]|\\.)+) |
+    \.(?P<label>(?:[\w\-]|\\.)+) |
+    \[\s*(?P<key>[\w\-]+)\s*
+        (?:=\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<value>[^\]\s]+))\s*)?\]
+    """, re.VERBOSE)
+
+_escape_re = re.compile(r"\\(.)")
+
+
+def _unescape(text):
+    return _escape_re.sub(r"\1", text)
+
+
+class Compound(object):
+    """
+    A compound selector, such as `Affine.bias[mode=inference]`, matching an op or a scope.
+
+    Attributes:
+        type: The lower case op type or scope type, or None for any.
+        ids: Names that must match.
+        labels: Labels that must match.
+        attributes: (key, value) pairs that must match, where a value of None only
+            requires the key.
+    """
+    def __init__(self):
+        self.type = None
+        self.ids = []
+        self.labels = []
+        self.attributes = []
+
+    def matches(self, element_type, name, labels, attributes):
+        if self.type is not None and self.type != element_type:
+            return False
+        if any(op_id != name for op_id in self.ids):
+            return False
+        if any(label not in labels for label in self.labels):
+            return False
+        for key, value in self.attributes:
+            if key not in attributes:
+                return False
+            if value is not None and attributes[key] != value:
+                return False
+        return True
+
+
+def parse_selector(css):
+    """
+    Parses a css-like selector string.
+
+    Arguments:
+        css (str): The selector, e.g. "Affine > .bias, #conv_filter".
+
+    Returns:
+        A list with one entry per comma separated selector. Each entry is a list of
+        (combinator, Compound) pairs from the outermost scope to the op, where the
+        combinator is ' ' for a descendant, '>' for a child, or None for the first.
+    """
+    css = css.strip()
+    selectors = []
+    path = []
+    compound = None
+    combinator = None
+    pos = 0
+    while pos < len(css):
+        match = _token_re.match(css, pos)
+        if match is None:
+            raise ValueError("Invalid selector {} at position {}".format(repr(css), pos))
+        pos = match.end()
+        kind = match.lastgroup
+        if kind in ('group', 'child', 'descendant'):
+            if compound is None:
+                raise ValueError("Invalid selector {} at position {}".format(repr(css),
+                                                                             match.start()))
+            path.append((combinator, compound))
+            compound = None
+            if kind == 'group':
+                selectors.append(path)
+                path = []
+                combinator = None
+            else:
+                combinator = '>' if kind == 'child' else ' '
+            continue
+        if compound is None:
+            compound = Compound()
+        if kind == 'type':
+            if compound.type is not None or compound.ids or compound.labels \
+                    or compound.attributes:
+                raise ValueError("Type must come first in selector {}".format(repr(css)))
+            if match.group('type') != '*':
+                compound.type = match.group('type').lower()
+        elif kind == 'id':
+            compound.ids.append(_unescape(match.group('id')))
+        elif kind == 'label':
+            compound.labels.append(_unescape(match.group('label')))
+        else:
+            key = match.group('key').lower()
+            if key == 'class':
+                key = 'label'
+            value = match.group('dq')
+            if value is None:
+                value = match.group('sq')
+            if value is None:
+                value = match.group('value')
+            compound.attributes.append((key, value))
+    if compound is None:
+        raise ValueError("Invalid selector {}".format(repr(css)))
+    path.append((combinator, compound))
+    selectors.append(path)
+    return selectors
+
+
+def op_attributes(op):
+    """
+    Returns:
+        The attributes of op that can be selected with [key=value], as strings.
+    """
+    attributes = {str(key).lower(): str(value) for key, value in op.metadata.items()}
+    attributes['id'] = op.name
+    if op.scope is not None:
+        attributes['scope'] = op.scope.name
+    return attributes
+
+
+def scope_path(op):
+    """
+    Returns:
+        The names of the nested scopes of op, from the outermost.
+    """
+    if op.scope is None:
+        return []
+    return op.scope.name.split("/")
+
+
+def scope_type(scope_name):
+    """
+    Returns:
+        The type of a scope as used in selectors, e.g. `affine` for the scope `Affine_0`.
+    """
+    return scope_name.split("_")[0].lower()
+
+
+class OpSelector(object):
+    """
+    Selects ops from a list of ops using css-like selectors.
+
+    Ops are indexed by type, name, label, metadata and the scopes they are in. The list
+    of ops may grow; ops appended since the last selection are indexed before selecting.
+    Changes to the metadata of an op after it has been indexed are not seen.
+
+    Scopes act as elements containing the ops created in them, so `Affine .bias`
+    selects the ops labeled `bias` in any scope of type `Affine` and `Affine > .bias`
+    only those directly in it. Scopes match their type, their name with `#` and the
+    label `scope`. Only ops are returned.
+
+    Arguments:
+        ops (list): The ops to select from.
+    """
+    def __init__(self, ops):
+        self.ops = ops
+        self.reset()
+
+    def reset(self):
+        """
+        Discards the indexes.
+        """
+        self.num_indexed = 0
+        self.by_type = defaultdict(set)
+        self.by_name = defaultdict(set)
+        self.by_label = defaultdict(set)
+        self.by_key = defaultdict(set)
+        self.by_key_value = defaultdict(set)
+        self.by_scope_type = defaultdict(set)
+        self.by_scope_name = defaultdict(set)
+
+    def update(self):
+        """
+        Indexes the ops appended since the last update.
+        """
+        if len(self.ops) < self.num_indexed:
+            self.reset()
+        for index in range(self.num_indexed, len(self.ops)):
+            op = self.ops[index]
+            self.by_type[type(op).__name__.lower()].add(index)
+            self.by_name[op.name].add(index)
+            for label in str(op.metadata.get('label', '')).split():
+                self.by_label[label].add(index)
+            for key, value in op_attributes(op).items():
+                self.by_key[key].add(index)
+                self.by_key_value[(key, value)].add(index)
+            for scope_name in scope_path(op):
+                self.by_scope_type[scope_type(scope_name)].add(index)
+                self.by_scope_name[scope_name].add(index)
+        self.num_indexed = len(self.ops)
+
+    def candidates(self, path):
+        """
+        Returns:
+            The indexes of the ops that can match path, or None for all ops.
+        """
+        compound = path[-1][1]
+        sets = []
+        if compound.type is not None:
+            sets.append(self.by_type.get(compound.type, set()))
+        sets.extend(self.by_name.get(op_id, set()) for op_id in compound.ids)
+        sets.extend(self.by_label.get(label, set()) for label in compound.labels)
+        for key, value in compound.attributes:
+            if value is None:
+                sets.append(self.by_key.get(key, set()))
+            else:
+                sets.append(self.by_key_value.get((key, value), set()))
+        for _, scope in path[:-1]:
+            if scope.type is not None:
+                sets.append(self.by_scope_type.get(scope.type, set()))
+            sets.extend(self.by_scope_name.get(name, set()) for name in scope.ids)
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def matches_scopes(self, scope_compounds, scopes, end):
+        """
+        Returns:
+            True if scope_compounds, a list of (Compound, combinator) pairs where the
+            combinator relates the scope to the element inside it, matches scopes[:end].
+        """
+        if not scope_compounds:
+            return True
+        compound, combinator = scope_compounds[-1]
+        if combinator == '>':
+            positions = [end - 1] if end > 0 else []
+        else:
+            positions = range(end - 1, -1, -1)
+        for position in positions:
+            name = scopes[position]
+            if compound.matches(scope_type(name), name, ('scope',),
+                                {'id': name, 'label': 'scope'}) \
+                    and self.matches_scopes(scope_compounds[:-1], scopes, position):
+                return True
+        return False
+
+    def select(self, css):
+        """
+        Select ops using a css-like selector.
+
+        Arguments:
+            css (str): A css selector string.
+
+        Returns:
+            list of ops in the order of the ops list.
+        """
+        self.update()
+        selected = set()
+        for path in parse_selector(css):
+            candidates = self.candidates(path)
+            if candidates is None:
+                candidates = range(len(self.ops))
+            if len(path) == 1:
+                # The indexes match the op against the only compound
+                selected.update(candidates)
+                continue
+            scope_compounds = [(scope, combinator) for (_, scope), (combinator, _)
+                               in zip(path[:-1], path[1:])]
+            # Many ops share a scope, so only match each scope once
+            scope_matches = dict()
+            for index in candidates:
+                scope = self.ops[index].scope
+                scope_name = scope.name if scope is not None else None
+                matches = scope_matches.get(scope_name, None)
+                if matches is None:
+                    scopes = scope_name.split("/") if scope_name is not None else []
+                    matches = self.matches_scopes(scope_compounds, scopes, len(scopes))
+                    scope_matches[scope_name] = matches
+                if matches:
+                    selected.add(index)
+        return [self.ops[index] for index in sorted(selected)]
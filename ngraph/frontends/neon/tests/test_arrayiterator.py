@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from ngraph.frontends.neon.arrayiterator import ArrayIterator, SequentialArrayIterator
+
+
+@pytest.fixture(params=[0, 2])
+def prefetch_depth(request):
+    return request.param
+
+
+def test_array_iterator_wraps_around(prefetch_depth):
+    """
+    Minibatches wrap around the end of the data and continue from there in the next pass.
+    """
+    x = np.arange(10 * 2).reshape(10, 2)
+    y = np.arange(10)
+    dataset = ArrayIterator([x, y], batch_size=4, prefetch_depth=prefetch_depth)
+    assert dataset.total_iterations == 3
+
+    batches = [(data[0].copy(), data[1].copy(), data['iteration']) for data in dataset]
+    indices = [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 0, 1]]
+    for (x_batch, y_batch, iteration), index in zip(batches, indices):
+        np.testing.assert_array_equal(x_batch, x[index])
+        np.testing.assert_array_equal(y_batch, y[index])
+    assert [iteration for _, _, iteration in batches] == [1, 2, 3]
+
+    dataset.reset()
+    dataset.total_iterations = 1
+    list(dataset)
+    assert dataset.start == 4
+    dataset.index = 0
+    np.testing.assert_array_equal(next(iter(dataset))[1], [4, 5, 6, 7])
+    assert dataset.starvation_time >= 0
+
+
+def test_array_iterator_shuffle(prefetch_depth):
+    """
+    Every example is visited once per epoch, in a different order in each epoch.
+    """
+    y = np.arange(12)
+    dataset = ArrayIterator(y, batch_size=4, total_iterations=6, shuffle=True, seed=0,
+                            prefetch_depth=prefetch_depth)
+    epoch1, epoch2 = np.split(np.concatenate([data[0].copy() for data in dataset]), 2)
+    np.testing.assert_array_equal(np.sort(epoch1), y)
+    np.testing.assert_array_equal(np.sort(epoch2), y)
+    assert not np.array_equal(epoch1, epoch2)
+    assert not np.array_equal(epoch1, y)
+
+
+def test_array_iterator_early_exit():
+    """
+    Leaving the loop early stops the worker and the next loop continues where it left off.
+    """
+    y = np.arange(20)
+    dataset = ArrayIterator(y, batch_size=2, prefetch_depth=3)
+    for data in dataset:
+        if data['iteration'] == 2:
+            break
+    assert dataset.index == 2
+    np.testing.assert_array_equal(next(iter(dataset))[0], [4, 5])
+
+
+def test_sequential_array_iterator(prefetch_depth):
+    tokens = np.arange(2 * 3 * 4)
+    dataset = SequentialArrayIterator({'inp_txt': tokens}, time_steps=4, batch_size=2,
+                                      prefetch_depth=prefetch_depth)
+    batches = [data['inp_txt'].copy() for data in dataset]
+    assert len(batches) == 3
+    rows = tokens.reshape(2, 3, 4)
+    for idx, batch in enumerate(batches):
+        assert batch.shape == (2, 4)
+        np.testing.assert_array_equal(batch, rows[:, idx, :])
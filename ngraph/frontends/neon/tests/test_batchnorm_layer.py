@@ -81,7 +81,9 @@ class RNNHelper(object):
                              return_sequence=True,
                              activation=Tanh())
 
-        self.reference_rnn = RNN(init=self.W_id, **self.rnn_args)
+        # Gate deltas are taken from the per gate dots of the reference
+        reference_args = dict(fuse_gates=False) if RNN is LSTM else dict()
+        self.reference_rnn = RNN(init=self.W_id, **dict(self.rnn_args, **reference_args))
         self.rnn = RNN(init=self.W_in, batch_norm=True, **self.rnn_args)
 
         if self.has_gates:
@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+
+from ngraph.frontends.neon.data import PTB
+from ngraph.util.persist import load_cached_arrays
+
+
+def test_load_cached_arrays(tmpdir, monkeypatch):
+    """
+    Arrays are made once and then memory mapped from the data cache.
+    """
+    calls = []
+
+    def make_arrays():
+        calls.append(None)
+        return {'x': np.arange(6, dtype=np.float32).reshape(2, 3), 'y': np.array([1, 2])}
+
+    monkeypatch.delenv('NGRAPH_DATA_CACHE_DIR', raising=False)
+    arrays = load_cached_arrays('test', make_arrays)
+    assert not isinstance(arrays['x'], np.memmap)
+
+    monkeypatch.setenv('NGRAPH_DATA_CACHE_DIR', str(tmpdir))
+    for _ in range(2):
+        arrays = load_cached_arrays('test', make_arrays)
+        assert isinstance(arrays['x'], np.memmap)
+        np.testing.assert_array_equal(arrays['x'], np.arange(6).reshape(2, 3))
+        np.testing.assert_array_equal(arrays['y'], [1, 2])
+    assert len(calls) == 2
+
+    # Writes are private to the process
+    arrays['y'][:] = 0
+    np.testing.assert_array_equal(load_cached_arrays('test', make_arrays)['y'], [1, 2])
+
+
+def test_ptb_data_cache(tmpdir, monkeypatch):
+    data_dir = tmpdir.mkdir('ptb')
+    for phase, text in (('train', 'abcab'), ('test', 'ba'), ('valid', 'cab')):
+        data_dir.join('ptb.{}.txt'.format(phase)).write(text)
+    monkeypatch.setenv('NGRAPH_DATA_CACHE_DIR', str(tmpdir.mkdir('cache')))
+
+    made = PTB(path=str(data_dir)).load_data()
+    ptb = PTB(path=str(data_dir))
+    os.remove(str(data_dir.join('ptb.train.txt')))
+    cached = ptb.load_data()
+
+    assert ptb.vocab == ['a', 'b', 'c']
+    for phase in ('train', 'test', 'valid'):
+        for key in ('inp_txt', 'tgt_txt'):
+            assert isinstance(cached[phase][key], np.memmap)
+            np.testing.assert_array_equal(cached[phase][key], made[phase][key])
+
+
+def test_data_cache_source_path(tmpdir, monkeypatch):
+    """
+    Loading a dataset from another directory does not return the arrays cached from
+    the first one.
+    """
+    monkeypatch.setenv('NGRAPH_DATA_CACHE_DIR', str(tmpdir.mkdir('cache')))
+    vocabs = []
+    for name, text in (('first', 'ab'), ('second', 'cd')):
+        data_dir = tmpdir.mkdir(name)
+        for phase in ('train', 'test', 'valid'):
+            data_dir.join('ptb.{}.txt'.format(phase)).write(text)
+        ptb = PTB(path=str(data_dir))
+        ptb.load_data()
+        vocabs.append(ptb.vocab)
+    assert vocabs == [['a', 'b'], ['c', 'd']]
@@ -271,3 +271,34 @@ def test_scopes_generation(input_placeholder):
     assert "outer/inner" in cg.scopes
     for op in layer:
         assert op in cg.scopes["outer/inner"]
+
+
+def test_select(input_placeholder):
+    """
+    Ops can be selected by type, name, label, metadata and scope hierarchy, and
+    selections see ops added after the previous selection.
+    """
+    cg = ComputationalGraph()
+    layer = NestedLayer(SimpleLayer(name="inner"), name="outer")
+    layer(input_placeholder)
+
+    weights = cg.select("AssignableTensorOp.weight")
+    assert weights == [layer.inner_layer.weight]
+    assert weights[0] in cg.select(".weight")
+    assert cg.select("#" + layer.inner_layer.weight.name) == weights
+    assert cg.select("outer assignabletensorop.weight") == weights
+    assert cg.select("outer > inner > AssignableTensorOp.weight") == weights
+    assert cg.select("outer > .weight") == []
+    assert cg.select("inner outer .weight") == []
+    assert cg.select("AssignableTensorOp[foo=bar].weight") == weights
+    assert cg.select("[foo='baz']") == []
+    assert set(cg.select("[scope]")) == set(op for op in cg if op.scope is not None)
+    assert cg.select("AssignOp") == [op for op in cg if isinstance(op, ng.AssignOp)]
+
+    with scope_ops(name="later", metadata={"label": "bias"}):
+        b = ng.variable(ng.make_axis(), initial_value=0)
+    assert cg.select("later AssignableTensorOp.bias, AssignableTensorOp.weight") == \
+        weights + [b]
+
+    with pytest.raises(ValueError):
+        cg.select("[foo")
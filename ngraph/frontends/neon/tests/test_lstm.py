@@ -288,6 +288,36 @@ def check_stacked_lstm(seq_len, input_size, hidden_size,
                                        fprop_ref_2_list[i], rtol=rtol, atol=atol)
 
 
+def test_fused_gates_load_per_gate_weights(transformer_factory):
+    """
+    Per gate weights assigned to a fused LSTM give the output of the per gate LSTM.
+    """
+    Cin = ng.make_axis(3, name='Feature')
+    REC = ng.make_axis(5, name='REC')
+    N = ng.make_axis(2, name='N')
+    inp_ng = ng.placeholder([Cin, REC, N])
+
+    lstm_args = dict(activation=Tanh(), gate_activation=Logistic())
+    per_gate = LSTM(4, GaussianInit(0.0, 0.1), fuse_gates=False, **lstm_args)
+    fused = LSTM(4, GaussianInit(0.0, 0.1), **lstm_args)
+    per_gate_out = per_gate(inp_ng)
+    fused_out = fused(inp_ng)
+    assert fused.W_input_fused is not None and per_gate.W_input_fused is None
+
+    gates = ['i', 'f', 'o', 'g']
+    load_weights = ng.doall([ng.assign(getattr(fused, name)[k], getattr(per_gate, name)[k])
+                             for name in ('W_input', 'W_recur', 'b') for k in gates])
+
+    with ExecutorFactory() as ex:
+        load_fun = ex.executor(load_weights)
+        out_fun = ex.executor([per_gate_out, fused_out], inp_ng)
+
+        load_fun()
+        input_value = rng.uniform(-1, 1, inp_ng.axes)
+        per_gate_value, fused_value = out_fun(input_value)
+        ng.testing.assert_allclose(fused_value, per_gate_value, rtol=rtol, atol=atol)
+
+
 if __name__ == '__main__':
     seq_len, input_size, hidden_size, batch_size, reset_cells = (8, 5, 16, 1, True)
     init = GaussianInit(0.0, 1)
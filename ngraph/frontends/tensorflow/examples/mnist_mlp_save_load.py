@@ -108,20 +108,16 @@ def ng_retrain_mnist(args):
     x_ng, t_ng, cost_ng, init_op_ng = importer.get_collection_handle(
         ['x', 't', 'cost', 'init_op'])
 
-    # get variable restore op
-    restore_op_ng = importer.get_restore_op()
-
     # transformer and computations
     with ExecutorFactory() as ex:
         updates = util.CommonSGDOptimizer(args.lrate).minimize(cost_ng, cost_ng.variables())
         train_comp = ex.executor([cost_ng, updates], x_ng, t_ng)
         init_comp = ex.executor(init_op_ng)
-        restore_comp = ex.executor(restore_op_ng)
         ex.transformer.initialize()
 
         # train in ngraph
         init_comp()
-        restore_comp()
+        importer.restore_variables(ex.transformer)
         ng_cost_vals = []
         for idx in range(args.max_iter):
             batch_xs, batch_ys = mnist.train.next_batch(args.batch_size)
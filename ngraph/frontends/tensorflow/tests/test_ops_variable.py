@@ -17,10 +17,13 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
 import tensorflow as tf
 import numpy as np
 import ngraph as ng
 from ngraph.frontends.tensorflow.tests.importer_tester import ImporterTester
+from ngraph.frontends.tensorflow.tf_importer.importer import TFImporter
+from ngraph.testing.execution import ExecutorFactory
 import pytest
 
 pytestmark = pytest.mark.transformer_dependent
@@ -74,3 +77,53 @@ class Tester(ImporterTester):
         tf_result = self.tf_run(a_update, tf_init_op=init_op)
         ng_result = self.ng_run(a)
         assert ng.testing.allclose(tf_result, ng_result)
+
+    def save_checkpoint(self, tmpdir, a_value, b_value):
+        """
+        Saves a model with the variables a and b, and returns its checkpoint path.
+        """
+        checkpoint_path = os.path.join(str(tmpdir), 'model')
+        with tf.Graph().as_default():
+            a = tf.Variable(a_value, name="a")
+            tf.Variable(b_value, name="b")
+            tf.add_to_collection('a', a)
+            with tf.Session() as sess:
+                sess.run(tf.global_variables_initializer())
+                tf.train.Saver().save(sess, checkpoint_path)
+        return checkpoint_path
+
+    def test_restore_variables(self, tmpdir):
+        a_value = np.random.randn(2, 3).astype(np.float32)
+        b_value = np.random.randn(4).astype(np.float32)
+        checkpoint_path = self.save_checkpoint(tmpdir, a_value, b_value)
+
+        importer = TFImporter()
+        importer.import_meta_graph(checkpoint_path + '.meta', checkpoint_path=checkpoint_path)
+        a_ng, = importer.get_collection_handle(['a'])
+        with ExecutorFactory() as ex:
+            # b is not used by any computation, so there is nothing to restore it into
+            a_comp = ex.executor(a_ng * 2)
+            ex.transformer.initialize()
+            restored = importer.restore_variables(ex.transformer)
+            assert restored == [a_ng]
+            ng.testing.assert_allclose(a_comp(), a_value * 2)
+
+    def test_restore_variables_shape_mismatch(self, tmpdir):
+        # a checkpoint whose a is broadcastable to, but not the shape of, the variable
+        checkpoint_path = self.save_checkpoint(tmpdir, np.zeros(3, np.float32),
+                                               np.zeros(4, np.float32))
+        with tf.Graph().as_default():
+            a = tf.Variable(np.zeros((2, 3), np.float32), name="a")
+            tf.Variable(np.zeros(4, np.float32), name="b")
+            tf.add_to_collection('a', a)
+            meta_graph_path = os.path.join(str(tmpdir), 'other.meta')
+            tf.train.export_meta_graph(meta_graph_path)
+
+        importer = TFImporter()
+        importer.import_meta_graph(meta_graph_path, checkpoint_path=checkpoint_path)
+        a_ng, = importer.get_collection_handle(['a'])
+        with ExecutorFactory() as ex:
+            ex.executor(a_ng * 2)
+            ex.transformer.initialize()
+            with pytest.raises(ValueError):
+                importer.restore_variables(ex.transformer)
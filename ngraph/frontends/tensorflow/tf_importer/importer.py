@@ -238,6 +238,53 @@ class TFImporter:
                     ng_restore_ops.append(ng.assign(ng_variable, val))
             return ng.doall(ng_restore_ops)
 
+    def restore_variables(self, transformer):
+        """
+        Restores the variables from the TF model checkpoint into the storage of
+        transformer, one tensor at a time.
+
+        Unlike `get_restore_op`, no ops are built and no TF session is run, so the
+        weights are neither compiled into a computation nor held in memory all at
+        once. Create the computations that use the variables and run any
+        initialization computation first, otherwise variable initialization would
+        overwrite the restored values.
+
+        Arguments:
+            transformer: The transformer holding the variables.
+
+        Returns:
+            A list of the ngraph variables that were restored. Variables that are not
+            in the checkpoint or not used by any computation are skipped.
+
+        Raises:
+            ValueError: If a checkpoint tensor does not have the shape of its variable.
+        """
+        if self._graph is None:
+            raise ValueError("self._graph is None, import meta_graph first.")
+        if self._checkpoint_path is None:
+            raise ValueError("self._checkpoint_path is None, please specify"
+                             "checkpoint_path while importing meta_graph.")
+        transformer.initialize()
+        checkpoint_path = os.path.join(os.getcwd(), self._checkpoint_path)
+        reader = tf.train.NewCheckpointReader(checkpoint_path)
+        with self._graph.as_default():
+            tf_variables = tf.global_variables()
+        ng_variables = self.get_op_handle(tf_variables)
+        restored = []
+        for tf_variable, ng_variable in zip(tf_variables, ng_variables):
+            name = tf_variable.op.name
+            if not reader.has_tensor(name) or not transformer.has_tensor_view(ng_variable):
+                # Not in the checkpoint, or not used by any computation
+                continue
+            value = reader.get_tensor(name)
+            if value.shape != tuple(ng_variable.axes.lengths):
+                raise ValueError("Checkpoint tensor {} has shape {}, but variable {} has "
+                                 "shape {}".format(name, value.shape, ng_variable.name,
+                                                   tuple(ng_variable.axes.lengths)))
+            transformer.set_tensor_view_value(ng_variable, value)
+            restored.append(ng_variable)
+        return restored
+
     def _post_process_op(self, op):
         """
         Replace op name for safety and cast op's axes if necessary.
@@ -15,6 +15,7 @@
 from __future__ import division
 
 import uuid
+import weakref
 import collections
 import operator
 import itertools
@@ -109,6 +110,10 @@ class Axis(object):
     """
     __name_counter = 0
 
+    # Incremented whenever the name or length of an existing axis changes, so that
+    # Axes can tell when their cached properties are stale.
+    _version = 0
+
     def __init__(self,
                  length=None,
                  name=None,
@@ -121,13 +126,35 @@ class Axis(object):
             name = '%s_%s' % (type(self).__name__, type(self).__name_counter)
             type(self).__name_counter += 1
 
-        self.name = name
+        self._name = name
 
         if length is not None and length < 0:
             raise ValueError("Axis length {} must be >= 0".format(length))
         self.__length = length
+        self._uuid = None
+
+    @property
+    def uuid(self):
+        if self._uuid is None:
+            self._uuid = uuid.uuid4()
+        return self._uuid
+
+    @uuid.setter
+    def uuid(self, value):
+        self._uuid = value
+
+    @property
+    def name(self):
+        """
+        Returns:
+            The name of the axis.
+        """
+        return self._name
 
-        self.uuid = uuid.uuid4()
+    @name.setter
+    def name(self, value):
+        self._name = value
+        Axis._version += 1
 
     def named(self, name):
         self.name = name
@@ -187,6 +214,7 @@ class Axis(object):
         if value < 0:
             raise ValueError("Axis length {} must be >= 0".format(value))
         self.__length = value
+        Axis._version += 1
 
     @property
     def axes(self):
@@ -310,16 +338,24 @@ class Axes(object):
     """
     An Axes is a tuple of Axis objects used as a label for a tensor's
     dimensions.
+
+    Axes are immutable and interned, so constructing an Axes from the same Axis
+    objects in the same order returns the same Axes. Derived properties such as the
+    names and lengths are cached until the name or length of an Axis changes.
     """
 
-    def __init__(self, axes=None):
+    __interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, axes=None):
+        if isinstance(axes, Axes):
+            return axes
         if axes is None:
             axes = []
         elif isinstance(axes, Axis):
-            axes = [axes]
+            return Axes._from_axes((axes,))
         elif isinstance(axes, types.GeneratorType):
             axes = tuple(axes)
-        elif isinstance(axes, (list, tuple)) and not isinstance(axes, Axes):
+        elif isinstance(axes, (list, tuple)):
             axes = tuple(axes)
 
         def convert(seq):
@@ -357,8 +393,61 @@ class Axes(object):
                 'The axes labels of a tensor cannot contain duplicates.  Found: {}'
                 .format(str(duplicates(axes)))
             )
-        self._axes = tuple(axes)
-        self.uuid = uuid.uuid4()
+        return Axes._from_axes(tuple(axes))
+
+    @staticmethod
+    def _from_axes(axes):
+        """
+        Returns the interned Axes of a tuple of Axis without checking it. The Axis must
+        not be nested and must have distinct names.
+
+        Arguments:
+            axes: A tuple of Axis.
+
+        Returns:
+            The Axes.
+        """
+        key = tuple(map(id, axes))
+        result = Axes.__interned.get(key, None)
+        if result is None:
+            result = object.__new__(Axes)
+            result._axes = axes
+            result._uuid = None
+            result._version = None
+            Axes.__interned[key] = result
+        return result
+
+    def __reduce__(self):
+        return Axes, (self._axes,)
+
+    def _refresh(self):
+        """
+        Recomputes the cached properties if an Axis has changed since they were computed.
+        """
+        if self._version == Axis._version:
+            return
+        axes = self._axes
+        self._names = tuple(axis.name for axis in axes)
+        self._name_set = frozenset(axis.name for axis in axes if not axis.is_flattened)
+        self._lengths = tuple(axis.length for axis in axes)
+        self._full_lengths = tuple(axis.axes.full_lengths if axis.is_flattened
+                                   else axis.length for axis in axes)
+        self._size = None
+        self._hash = hash(axes)
+        self._batch_axis = next((axis for axis in axes if axis.is_batch), None)
+        self._recurrent_axis = next((axis for axis in axes if axis.is_recurrent), None)
+        self._channel_axis = next((axis for axis in axes if axis.is_channel), None)
+        self._version = Axis._version
+
+    @property
+    def uuid(self):
+        if self._uuid is None:
+            self._uuid = uuid.uuid4()
+        return self._uuid
+
+    @uuid.setter
+    def uuid(self, value):
+        self._uuid = value
 
     @property
     def full_lengths(self):
@@ -371,8 +460,8 @@ class Axes(object):
         Returns:
             tuple: A nested tuple with the axis lengths.
         """
-        return tuple(x.axes.full_lengths if x.is_flattened
-                     else x.length for x in self)
+        self._refresh()
+        return self._full_lengths
 
     @property
     def names(self):
@@ -380,7 +469,8 @@ class Axes(object):
         Returns:
             tuple: The names of the outer axes.
         """
-        return tuple(x.name for x in self)
+        self._refresh()
+        return self._names
 
     @property
     def lengths(self):
@@ -388,7 +478,8 @@ class Axes(object):
         Returns:
             tuple: The lengths of the outer axes.
         """
-        return tuple(x.length for x in self)
+        self._refresh()
+        return self._lengths
 
     def batch_axes(self):
         """
@@ -398,7 +489,7 @@ class Axes(object):
         """
         batch_axis = self.batch_axis()
         if batch_axis:
-            return Axes([batch_axis])
+            return Axes._from_axes((batch_axis,))
         else:
             return None
 
@@ -407,18 +498,16 @@ class Axes(object):
         Returns:
             The tensor's batch Axis or None if there isn't one.
         """
-        for axis in self:
-            if axis.is_batch:
-                return axis
+        self._refresh()
+        return self._batch_axis
 
     def channel_axis(self):
         """
         Returns:
             The tensor's batch Axis or None if there isn't one.
         """
-        for axis in self:
-            if axis.is_channel:
-                return axis
+        self._refresh()
+        return self._channel_axis
 
     def spatial_axes(self):
         """
@@ -432,23 +521,23 @@ class Axes(object):
         Returns:
             The Axes subset that are not batch axes.
         """
-        return Axes(axis for axis in self if not axis.is_batch)
+        return Axes._from_axes(tuple(axis for axis in self._axes if not axis.is_batch))
 
     def feature_axes(self):
         """
         Returns:
             The Axes subset that are not batch or recurrent axes.
         """
-        return Axes(axis for axis in self if not axis.is_batch and not axis.is_recurrent)
+        return Axes._from_axes(tuple(axis for axis in self._axes
+                                     if not axis.is_batch and not axis.is_recurrent))
 
     def recurrent_axis(self):
         """
         Returns:
             The tensor's recurrent Axis or None if there isn't one.
         """
-        for axis in self:
-            if axis.is_recurrent:
-                return axis
+        self._refresh()
+        return self._recurrent_axis
 
     def flatten(self, force=False):
         """
@@ -480,7 +569,7 @@ class Axes(object):
             axis.length = length
 
     def find_by_name(self, name):
-        return Axes(axis for axis in self if axis.name == name)
+        return Axes._from_axes(tuple(axis for axis in self._axes if axis.name == name))
 
     def __iter__(self):
         return self._axes.__iter__()
@@ -488,9 +577,15 @@ class Axes(object):
     def __len__(self):
         return len(self._axes)
 
+    def __contains__(self, axis):
+        if isinstance(axis, Axis) and not axis.is_flattened:
+            self._refresh()
+            return axis.name in self._name_set
+        return axis in self._axes
+
     def __getitem__(self, item):
         if isinstance(item, slice):
-            return Axes(self._axes.__getitem__(item))
+            return Axes._from_axes(self._axes.__getitem__(item))
         else:
             return self._axes.__getitem__(item)
 
@@ -510,12 +605,11 @@ class Axes(object):
         """
         # self and other could not have common element
         other = make_axes(other)
-        common_axes = self & other
-        if len(common_axes) != 0:
+        if any(axis in self for axis in other._axes):
             raise ValueError("Trying to concatenate %s with %s, but they have"
                              "common axes %s, which is not allowed."
-                             % (self, other, common_axes))
-        return make_axes(tuple(self) + tuple(other))
+                             % (self, other, self & other))
+        return Axes._from_axes(self._axes + other._axes)
 
     def __sub__(self, other):
         """
@@ -528,7 +622,7 @@ class Axes(object):
             The ordered set difference of axes
         """
         other = make_axes(other)
-        return make_axes((axis for axis in self if axis not in other))
+        return Axes._from_axes(tuple(axis for axis in self._axes if axis not in other))
 
     def __or__(self, other):
         """
@@ -541,8 +635,8 @@ class Axes(object):
             The ordered set union of axes
         """
         other = make_axes(other)
-        return make_axes(tuple(self) +
-                         tuple(axis for axis in Axes(other) if axis not in self))
+        return Axes._from_axes(self._axes +
+                               tuple(axis for axis in other._axes if axis not in self))
 
     def __and__(self, other):
         """
@@ -555,7 +649,7 @@ class Axes(object):
             The ordered set intersection of axes
         """
         other = make_axes(other)
-        return make_axes((axis for axis in self._axes if axis in other))
+        return Axes._from_axes(tuple(axis for axis in self._axes if axis in other))
 
     def __eq__(self, other):
         """
@@ -569,6 +663,8 @@ class Axes(object):
 
         See Also ``is_equal_set`` if you want the comparison to ignore the Axes order
         """
+        if self is other:
+            return True
         if not isinstance(other, Axes):
             raise ValueError((
                 'other must be of type Axes, found type {}'
@@ -594,7 +690,8 @@ class Axes(object):
         return bool(self._axes)
 
     def __hash__(self):
-        return hash(self._axes)
+        self._refresh()
+        return self._hash
 
     def is_sub_set(self, other):
         """
@@ -760,7 +857,10 @@ class Axes(object):
         """
         TODO: delete this method, the size should come from the tensor
         """
-        return int(np.prod(self.lengths))
+        self._refresh()
+        if self._size is None:
+            self._size = int(np.prod(self._lengths))
+        return self._size
 
     def __repr__(self):
         return 'Axes({})'.format(
@@ -955,6 +1055,24 @@ class FlattenedAxis(Axis):
         """
         return True
 
+    @property
+    def length(self):
+        """
+        Returns:
+            The product of the lengths of the collapsed axes. This follows changes
+            to the lengths of the collapsed axes, e.g. when a graph is recompiled
+            for a different batch size.
+        """
+        return reduce(operator.mul, self._axes.lengths, 1)
+
+    @length.setter
+    def length(self, value):
+        if value != self.length:
+            raise ValueError((
+                "The length of {axis} is the product of the lengths of its "
+                "collapsed axes and can not be set to {value}"
+            ).format(axis=self, value=value))
+
     @property
     def empty(self):
         """
@@ -15,6 +15,7 @@ from __future__ import division
 
 from contextlib import contextmanager
 import collections
+import itertools
 import uuid
 
 import inspect
@@ -156,13 +157,17 @@ class Op(ScopedNameableValue):
         const: The value of a constant.
         constant (bool): The value is constant.
         control_deps (OrderedSet): Ops in addtion to args that must run before this op.
+        id (int): Unique id for this op, increasing in construction order.
         persistent (bool): The value will be retained from computation to computation and
             not shared.  Always True if reference is set.
         metadata: Dictionary with of string keys and values used for attaching
             arbitrary metadata to nodes.
         trainable: The value is trainable.
+        uuid: Globally unique id for this op, generated when first used.
     """
 
+    __ids = itertools.count()
+
     # Default is to not collect Ops as they are created
     @staticmethod
     def _get_thread_ops():
@@ -326,7 +331,8 @@ class Op(ScopedNameableValue):
         self._control_deps = OrderedSet()
         self._deriv_handler = None
         self._const = const
-        self.uuid = uuid.uuid4()
+        self._id = next(Op.__ids)
+        self._uuid = None
         self._is_constant = constant
         self._is_persistent = persistent
         self._is_trainable = trainable
@@ -342,6 +348,21 @@ class Op(ScopedNameableValue):
         self.style = {}
         self._forward = None
 
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def uuid(self):
+        # uuid4 reads os.urandom, so only generate it for ops that are serialized
+        if self._uuid is None:
+            self._uuid = uuid.uuid4()
+        return self._uuid
+
+    @uuid.setter
+    def uuid(self, value):
+        self._uuid = value
+
     def copy_with_new_args(self, args):
         """
         This method creates a new op given an original op and new args. The purpose here
@@ -752,20 +773,6 @@ class Op(ScopedNameableValue):
         """
         return False
 
-    def _xml_description(self):
-        element = type(self).__name__
-        op_xml = ["<{} id={}".format(element, self.name)]
-        if self.scope is not None:
-            op_xml.append(" scope={}".format(self.scope.name))
-        for attr, val in self.metadata.items():
-            if attr == "label":
-                attr = "class"
-            op_xml.append(" {}={}".format(str(attr), str(val)))
-
-        op_xml.append("></{}>".format(element))
-
-        return "".join(op_xml)
-
 
 class MutateInsteadOfCopyWithNewArgsMixin(object):
     """
@@ -3674,6 +3681,8 @@ class SoftmaxOp(ValueOp):
 
         if normalization_axes is None:
             normalization_axes = x.axes.sample_axes() - x.axes.recurrent_axis()
+        self.logits = x
+        self.normalization_axes = normalization_axes
         self.x = x - max(x, reduction_axes=normalization_axes)
         self.exps = exp(self.x)
         self.Z = sum(self.exps, reduction_axes=normalization_axes)
@@ -4160,6 +4169,138 @@ def deriv(dependent, independent, error=None):
     return DerivOp(dependent, independent, error).value_tensor
 
 
+class SoftmaxCrossEntropyOp(TensorOp):
+    """
+    Computes the cross-entropy of softmax(x) and t in a single op, as
+    log(sum(exp(x - max(x)))) + max(x) - sum(x * t), without computing softmax(x).
+
+    The derivative with respect to x is computed in closed form by
+    SoftmaxCrossEntropyBpropOp.
+
+    Arguments:
+        x: The logits.
+        t: The true values, either with the axes of x, where each sample is a PDF, or
+            integer class indices with the axes of the result.
+        normalization_axes: The axes the softmax is computed over. Default sample axes
+            except the recurrent axis. Class indices need a single normalization axis.
+
+    Attributes:
+        index_labels: True if t contains class indices.
+
+    Raises:
+        UnmatchedAxesError: If t does not have the axes of x or of the result.
+    """
+
+    def __init__(self, x, t, normalization_axes=None, **kwargs):
+        if normalization_axes is None:
+            normalization_axes = x.axes.sample_axes() - x.axes.recurrent_axis()
+        normalization_axes = make_axes(normalization_axes)
+        out_axes = x.axes - normalization_axes
+        if t.axes.is_equal_set(x.axes):
+            self.index_labels = False
+        elif t.axes.is_equal_set(out_axes):
+            if len(normalization_axes) != 1:
+                raise ValueError("Class indices need a single normalization axis, got {}"
+                                 .format(normalization_axes))
+            self.index_labels = True
+        else:
+            raise UnmatchedAxesError("t must have the axes of x or of the result: {} vs. {}"
+                                     .format(t.axes, x.axes))
+        self.normalization_axes = normalization_axes
+        super(SoftmaxCrossEntropyOp, self).__init__(args=(x, t), axes=out_axes, **kwargs)
+
+    def copy_with_new_args(self, args):
+        return type(self)(*args, normalization_axes=self.normalization_axes)
+
+    def generate_adjoints(self, adjoints, delta, x, t):
+        x.generate_add_delta(adjoints, SoftmaxCrossEntropyBpropOp(x, t, delta,
+                                                                  self.normalization_axes))
+        if not self.index_labels:
+            x_max = max(x, reduction_axes=self.normalization_axes)
+            log_z = log(sum(exp(x - x_max), reduction_axes=self.normalization_axes)) + x_max
+            t.generate_add_delta(adjoints, (log_z - x) * delta)
+
+    def as_primitive_ops(self, args=None):
+        """
+        Constructs a subgraph that is equivalent to this op for transformers without a
+        fused kernel.
+
+        Arguments:
+            args: The arguments to use instead of the args of this op.
+
+        Returns:
+            A subgraph equivalent to this op.
+        """
+        x, t = self.args if args is None else args
+        if self.index_labels:
+            t = one_hot(t, axis=self.normalization_axes[0])
+        x_max = max(x, reduction_axes=self.normalization_axes)
+        log_z = log(sum(exp(x - x_max), reduction_axes=self.normalization_axes)) + x_max
+        return sum((log_z - x) * t, reduction_axes=self.normalization_axes)
+
+
+class SoftmaxCrossEntropyBpropOp(TensorOp):
+    """
+    The derivative of SoftmaxCrossEntropyOp with respect to its logits,
+    (softmax(x) * sum(t) - t) * delta, which is (softmax(x) - onehot(t)) * delta for class
+    indices.
+
+    Arguments:
+        x: The logits.
+        t: The true values of the SoftmaxCrossEntropyOp.
+        delta: The adjoint of the SoftmaxCrossEntropyOp.
+        normalization_axes: The axes the softmax is computed over.
+    """
+
+    def __init__(self, x, t, delta, normalization_axes, **kwargs):
+        self.normalization_axes = make_axes(normalization_axes)
+        self.index_labels = not t.axes.is_equal_set(x.axes)
+        super(SoftmaxCrossEntropyBpropOp, self).__init__(args=(x, t, delta), axes=x.axes,
+                                                         **kwargs)
+
+    def copy_with_new_args(self, args):
+        return type(self)(*args, normalization_axes=self.normalization_axes)
+
+    def as_primitive_ops(self, args=None):
+        """
+        Constructs a subgraph that is equivalent to this op for transformers without a
+        fused kernel.
+
+        Arguments:
+            args: The arguments to use instead of the args of this op.
+
+        Returns:
+            A subgraph equivalent to this op.
+        """
+        x, t, delta = self.args if args is None else args
+        if self.index_labels:
+            t = one_hot(t, axis=self.normalization_axes[0])
+        exps = exp(x - max(x, reduction_axes=self.normalization_axes))
+        probs = exps / sum(exps, reduction_axes=self.normalization_axes)
+        if not self.index_labels:
+            probs = probs * sum(t, reduction_axes=self.normalization_axes)
+        return (probs - t) * delta
+
+
+def softmax_cross_entropy(x, t, normalization_axes=None):
+    """
+    Computes the cross-entropy of softmax(x) and t.
+
+    This is cross_entropy_multi(softmax(x), t) computed directly from the logits.
+
+    Arguments:
+        x: The logits.
+        t: The true values, either with the axes of x, where each sample is a PDF, or
+            integer class indices with the axes of the result.
+        normalization_axes: The axes the softmax is computed over. Default sample axes
+            except the recurrent axis.
+
+    Returns:
+        The cross-entropy.
+    """
+    return SoftmaxCrossEntropyOp(x, t, normalization_axes=normalization_axes)
+
+
 class CrossEntropyMultiOp(ValueOp):
     """
     Computes the cross-entropy of two distributions.
@@ -4190,7 +4331,16 @@ class CrossEntropyMultiOp(ValueOp):
             # Compute along non-recurrent and non-batch axes
             index_axes = y.axes.sample_axes() - y.axes.recurrent_axis()
             out_axes = y.axes - index_axes
-        if enable_softmax_opt and isinstance(y.deriv_handler, SoftmaxOp):
+        out_axes = make_axes(out_axes)
+        softmax_op = y.deriv_handler
+        if enable_softmax_opt and enable_diff_opt and isinstance(softmax_op, SoftmaxOp) \
+                and out_axes.is_equal_set(y.axes - softmax_op.normalization_axes):
+            # Fused log-sum-exp with a closed form derivative
+            self.value_tensor = SoftmaxCrossEntropyOp(softmax_op.logits, t,
+                                                      softmax_op.normalization_axes)
+            if self.value_tensor.axes != out_axes:
+                self.value_tensor = axes_with_order(self.value_tensor, out_axes)
+        elif enable_softmax_opt and isinstance(softmax_op, SoftmaxOp):
             # This depends on sum(t) being 1
             self.y = y
             self.x = y.deriv_handler.x
@@ -55,6 +55,13 @@ import ngraph.op_graph.serde.ops_pb2 as ops_pb
 # Attributes of an Op that are private but we want to serialize
 EXCEPTION_ATTRIBUTES = {'_axes', '_tensor', '_const', '_deriv_handler'}
 
+# Attributes of an Op that are handled separately from the other attributes
+IGNORED_ATTRIBUTES = {'valfun', 'uuid', 'dtype', 'metadata', 'layout_view', 'in_view', 'out_view',
+                      'all_deps'}
+
+# Metadata only used by hetr, which is not serialized
+HETR_METADATA = ('hetr_replaced_by', 'replaces_op', 'layout', 'clones')
+
 # Dict of Axis and Axes UUID to Axis to enable matching of deserialized axis
 GLOBAL_AXIS_REGISTRY = weakref.WeakValueDictionary()
 
@@ -64,6 +71,15 @@ GLOBAL_AXIS_REGISTRY = weakref.WeakValueDictionary()
 ##################
 
 
+def is_serialized_attribute(key):
+    """
+    Returns:
+        True if the op attribute key is serialized. Private attributes are not, except
+        those in EXCEPTION_ATTRIBUTES and those starting with `_is_`.
+    """
+    return not key.startswith('_') or key.startswith('_is_') or key in EXCEPTION_ATTRIBUTES
+
+
 def dtype_to_protobuf(numpy_dtype):
     if numpy_dtype.name == 'flex':
         dtype_name = 'FLEX' + str(numpy_dtype.storage_bits)
@@ -204,7 +220,7 @@ def op_to_protobuf(op):
     # Hoist metadata into the general purpose attrs dict with namespacing
     for key in op.metadata:
         # hetr only
-        if key in ('hetr_replaced_by', 'replaces_op', 'layout', 'clones'):
+        if key in HETR_METADATA:
             continue
         assign_op_attr(pb_op.attrs['_ngraph_metadata_' + key], op.metadata[key])
 
@@ -221,12 +237,10 @@ def op_to_protobuf(op):
             tensor_to_protobuf(op.valfun(op.tensor_description())))
 
     # These are handled above
-    ignored_keys = {'valfun', 'uuid', 'dtype', 'metadata', 'layout_view', 'in_view', 'out_view',
-                    'all_deps'}
-    remaining_keys = set(op.__dict__.keys()).difference(ignored_keys)
+    remaining_keys = set(op.__dict__.keys()).difference(IGNORED_ATTRIBUTES)
 
     for key in remaining_keys:
-        if not key.startswith('_is_') and key not in EXCEPTION_ATTRIBUTES and key.startswith('_'):
+        if not is_serialized_attribute(key):
             continue
         val = getattr(op, key)
         if isinstance(val, Op) or \
@@ -244,7 +258,8 @@ def add_edges(pb_edges, pb_ops, op):
 
     def add_edge(from_op, to_op, edge_type):
         edge = ops_pb.Edge()
-        edge.uuid.uuid = uuid.uuid4().bytes
+        # Edges are only identified within a graph, so number them instead of using uuid4
+        edge.uuid.uuid = uuid.UUID(int=len(pb_edges)).bytes
         edge.from_uuid.uuid = from_op.uuid.bytes
         edge.to_uuid.uuid = to_op.uuid.bytes
         edge.edge_type = edge_type
@@ -268,7 +283,7 @@ def add_edges(pb_edges, pb_ops, op):
     # other Ops we make edges that we can deserialize as Op attributes later
     remaining_keys = set(op.__dict__.keys()).difference({'all_deps'})
     for key in remaining_keys:
-        if not key.startswith('_is_') and key not in EXCEPTION_ATTRIBUTES and key.startswith('_'):
+        if not is_serialized_attribute(key):
             continue
         val = getattr(op, key)
         if isinstance(val, Op):
@@ -454,8 +469,7 @@ def protobuf_to_op(pb_op):
         if key.startswith('_ngraph_metadata_'):
             value = pb_op.attrs[key]
             py_op.metadata[key[17:]] = protobuf_attr_to_python(value)
-        elif not key.startswith('_is_') and key not in EXCEPTION_ATTRIBUTES and \
-                key.startswith('_'):
+        elif not is_serialized_attribute(key):
             continue
         else:
             value = pb_op.attrs[key]
@@ -530,3 +544,94 @@ def deserialize_graph(graph_msg):
     the Ops of the graph.
     """
     return _deserialize_graph(ops_pb.GraphDef.FromString(graph_msg))
+
+
+##################
+# COPYING
+##################
+
+
+def _referenced_ops(op):
+    """ Yields the ops that `add_edges` would make edges to from op. """
+    for arg in op._args:
+        yield arg
+    for dep in op._control_deps:
+        yield dep
+    if op._forward is not None:
+        yield op._forward
+    for sub_op in getattr(op, '_ops', ()):
+        yield sub_op
+    for key, val in op.__dict__.items():
+        if key in IGNORED_ATTRIBUTES or not is_serialized_attribute(key):
+            continue
+        if isinstance(val, Op):
+            yield val
+        elif isinstance(val, (list, tuple, set)):
+            for item in val:
+                if isinstance(item, Op):
+                    yield item
+
+
+def _copy_value(val, copies):
+    if isinstance(val, Op):
+        return copies[val]
+    if isinstance(val, (list, tuple, set)):
+        if any(isinstance(item, Op) for item in val):
+            return type(val)(copies[item] if isinstance(item, Op) else item for item in val)
+        if not isinstance(val, tuple):
+            return type(val)(val)
+    if isinstance(val, dict):
+        return dict(val)
+    return val
+
+
+def copy_graph(ops):
+    """
+    Copies ops and the ops they reference, like a serialization round trip without the
+    protobuf encoding.
+
+    The same attributes are copied and linked as by serialize_graph and deserialize_graph,
+    but only the ops reachable through them are copied. Other values are shared with the
+    original ops, except for lists, sets and dicts, which are copied. The copies get new
+    uuids.
+
+    Arguments:
+        ops: The ops to copy.
+
+    Returns:
+        A dict from each copied op to its copy.
+    """
+    copies = dict()
+    frontier = list(ops)
+    while frontier:
+        op = frontier.pop()
+        if op in copies:
+            continue
+        cls = type(op)
+        copy = cls.__new__(cls)
+        op_graph.Op.__init__(copy)
+        copy.name = op.name
+        copies[op] = copy
+        frontier.extend(_referenced_ops(op))
+
+    for op, copy in copies.items():
+        copy._args = tuple(copies[arg] for arg in op._args)
+        copy._control_deps = OrderedSet(copies[dep] for dep in op._control_deps)
+        if op._forward is not None:
+            copy._forward = copies[op._forward]
+        if hasattr(op, '_ops'):
+            copy._ops = [copies[sub_op] for sub_op in op._ops]
+        copy.metadata = {key: val for key, val in op.metadata.items()
+                         if key not in HETR_METADATA}
+        if hasattr(op, 'valfun'):
+            copy.valfun = op.valfun
+        for key, val in op.__dict__.items():
+            if key in IGNORED_ATTRIBUTES or not is_serialized_attribute(key):
+                continue
+            setattr(copy, key, _copy_value(val, copies))
+
+    # dtype may depend on the tensor, so it is set once the references are in place
+    for op, copy in copies.items():
+        if hasattr(op, 'dtype'):
+            copy.dtype = op.dtype
+    return copies
@@ -23,11 +23,10 @@ from builtins import object
 from future.utils import with_metaclass
 
 from ngraph.op_graph.op_graph import Op, computation
+from ngraph.transformers.staging import InputStager, StagedInputs
 from ngraph.util.names import NameableValue
 from orderedset import OrderedSet
 
-from ngraph.util.trace_events import is_tracing_enabled
-
 PYCUDA_LOGIC_ERROR_CODE = 4
 
 logger = logging.getLogger(__name__)
@@ -48,7 +47,11 @@ class Computation(NameableValue):
             a set return a map, if None, return None.
         *args: AllocationOps marked input will be arguments to the function.
         **kwargs: Args for related classes.
+
+    Attributes:
+        num_staging_buffers: The number of calls whose arguments can be staged at once.
     """
+    num_staging_buffers = 2
 
     def __init__(self, transformer, computation_op, **kwargs):
         super(Computation, self).__init__(**kwargs)
@@ -57,6 +60,9 @@ class Computation(NameableValue):
         self.computation_op = computation_op
         self.computation_name = None
         self.executor = None
+        # Filled in by the transformer with what happened while compiling the computation
+        self.compile_report = dict()
+        self.stager = None
 
         self.send_nodes = []
         self.recv_nodes = []
@@ -69,6 +75,9 @@ class Computation(NameableValue):
         self.broadcast_recv_nodes = []
 
     def unpack_args_or_feed_dict(self, args, kwargs):
+        if len(args) == 1 and isinstance(args[0], StagedInputs):
+            return tuple(args[0].wait())
+
         feed_dict = kwargs.pop('feed_dict', None)
         if feed_dict is not None:
             if len(args) != 0:
@@ -89,24 +98,44 @@ class Computation(NameableValue):
             ))
         return args
 
+    def stage(self, *args, **kwargs):
+        """
+        Starts preparing the arguments of a later call on a background thread, so that
+        they can be cast and copied while the current call runs.
+
+        Arguments:
+            *args: The arguments of the call, or a feed_dict keyword argument.
+
+        Returns:
+            A StagedInputs to pass as the only argument of the call.
+        """
+        args = self.unpack_args_or_feed_dict(args, kwargs)
+        if self.stager is None:
+            self.stager = InputStager(self.computation_op.parameters,
+                                      self.num_staging_buffers)
+            self.transformer.stagers.append(self.stager)
+        return self.stager.stage(args)
+
     def __call__(self, *args, **kwargs):
         """
         Executes the computation passing args in to the function.
+
+        The arguments may also be a single StagedInputs returned by stage.
         """
+        staged = args[0] if len(args) == 1 and isinstance(args[0], StagedInputs) else None
         args = self.unpack_args_or_feed_dict(args, kwargs)
 
         # TODO Should this be automatic?
         self.transformer.initialize()
 
         # Get the parameters to the device
-        self.transformer.host_to_device(self, self.computation_op.parameters, args)
-
-        self.executor()
+        try:
+            self.transformer.host_to_device(self, self.computation_op.parameters, args)
+        finally:
+            if staged is not None:
+                staged.release()
 
-        # Generate a timeline for the computation
-        if is_tracing_enabled():
-            self.generate_profile(self.executor.__profiler_start__,
-                                  self.executor.__profiler_stop__)
+        self.execute()
 
         # TODO Should copy this out of the device to a destination when it is not scalar
         def value(op):
@@ -133,8 +162,11 @@ class Computation(NameableValue):
         else:
             return None
 
-    def generate_profile(self, profiler_start, profiler_stop):
-        pass
+    def execute(self):
+        """
+        Runs the executor of the computation.
+        """
+        self.executor()
 
 
 class DeviceBufferStorage(with_metaclass(abc.ABCMeta, NameableValue)):
@@ -296,10 +328,12 @@ class Transformer(with_metaclass(Transformer_ABC_Meta, object)):
         initialized (bool): True when variables have been initialized/restored.
         fusion (bool): True when fusion was enabled.
         device_buffers (set): Set of handles for storage allocations.
+        stagers (list): The InputStagers of the computations, closed with the transformer.
     """
     def __init__(self, **kwargs):
         super(Transformer, self).__init__(**kwargs)
         self.graph_passes = []
+        self.stagers = []
 
     @abc.abstractproperty
     def use_exop(self):
@@ -465,7 +499,15 @@ class Transformer(with_metaclass(Transformer_ABC_Meta, object)):
             self.graph_passes.append(graph_pass)
 
     def close(self):
-        pass
+        self.close_stagers()
+
+    def close_stagers(self):
+        """
+        Stops the staging threads of the computations.
+        """
+        for stager in getattr(self, 'stagers', ()):
+            stager.close()
+        self.stagers = []
 
     def __del__(self):
         self.close()
@@ -523,6 +565,19 @@ class ComputationGraphTransformer(Transformer):
         """
         return op.forwarded.tensor.forwarded.tensor_description().base in self.op_tensors
 
+    def has_tensor_view(self, op):
+        """
+        Returns true if the op has a device tensor view.
+
+        Args:
+            op: A computation graph op.
+
+        Returns:
+            True if the op has a device tensor view.
+
+        """
+        return op.forwarded.tensor.forwarded.tensor_description() in self.op_tensor_views
+
     def get_op_tensor_view(self, op):
         """
         Returns the tensor view for this op.
@@ -550,6 +605,20 @@ class ComputationGraphTransformer(Transformer):
         """
         return self.get_op_tensor_view(op).get(host_tensor)
 
+    def set_tensor_view_value(self, op, value):
+        """
+        Copies a value into the tensor view for op, without running a computation.
+
+        The storage for op must already be allocated, i.e. op must be used by a
+        computation of this transformer and the transformer must be initialized.
+
+        Args:
+            op: The computation graph op.
+            value: A NumPy tensor with the elements for op.
+
+        """
+        self.get_op_tensor_view(op)[()] = value
+
     def get_tensor_description_tensor(self, tensor_description):
         """
         Returns a tensor for a tensor description.
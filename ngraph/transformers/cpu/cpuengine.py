@@ -42,6 +42,9 @@ class Mkldnn(object):
         self.kernels = dict()        # MKL Op kernels
         self.op_layouts = dict()     # Layout objects for MKL tensors
         self.native_layouts = dict()  # Layout objects for Non-MKL tensors
+        self.batchnorm_weights = dict()  # gamma and beta of MKL batchnorm kernels
+        self.batchnorm_states = dict()  # Buffers of the numpy batchnorm
+        self.relu_masks = dict()  # Buffers of the numpy relu
         try:
             self.mkllib = ct.CDLL(engine_path)
             self.enabled = True
@@ -181,9 +184,47 @@ class Mkldnn(object):
             self.destroy_mkldnn_engine_fn(self.mkldnn_engine)
             self.mkldnn_engine_initialized = False
 
+    def get_batchnorm_weights(self, name, gamma, bias):
+        # MKL takes gamma and beta stacked, kept in one buffer per kernel
+        weights = self.batchnorm_weights.get(name)
+        if weights is None:
+            weights = np.empty((2, gamma.shape[0]), dtype=gamma.dtype)
+            self.batchnorm_weights[name] = weights
+        weights[0] = gamma[:, 0]
+        weights[1] = bias[:, 0]
+        return weights
+
+    def get_batchnorm_state(self, name, inputs):
+        """
+        The buffers of the numpy batchnorm of name, allocated on the first call: xhat,
+        the normalized inputs, and inv_std, the inverse standard deviation of each
+        channel, which fprop leaves for bprop, and scale, dgamma and dbeta used by bprop.
+        """
+        state = self.batchnorm_states.get(name)
+        if state is None or state['xhat'].shape != inputs.shape:
+            channels = (inputs.shape[0], 1)
+            state = {'xhat': np.empty_like(inputs),
+                     'inv_std': np.empty(channels, dtype=inputs.dtype),
+                     'scale': np.empty(channels, dtype=inputs.dtype),
+                     'dgamma': np.empty(channels, dtype=inputs.dtype),
+                     'dbeta': np.empty(channels, dtype=inputs.dtype),
+                     'inputs': None}
+            self.batchnorm_states[name] = state
+        return state
+
+    def normalize_batchnorm(self, state, inputs, mean, variance, epsilon):
+        inv_std = state['inv_std']
+        np.add(variance[:, None], epsilon, out=inv_std)
+        np.sqrt(inv_std, out=inv_std)
+        np.reciprocal(inv_std, out=inv_std)
+        xhat = state['xhat']
+        np.subtract(inputs, mean, out=xhat)
+        xhat *= inv_std
+        state['inputs'] = inputs.ctypes.data
+
     def fprop_batchnorm(self, name, inputs, outputs, gamma, bias, mean, variance, epsilon):
         if (self.enabled and name in self.kernels):
-            weights = np.stack([gamma[:, 0], bias[:, 0]])
+            weights = self.get_batchnorm_weights(name, gamma, bias)
             mean_ch = mean[:, 0]
             self.set_input_tensor(self.kernels[name], inputs.ctypes.data, 0)
             self.set_input_tensor(self.kernels[name], mean_ch.ctypes.data, 1)
@@ -192,15 +233,16 @@ class Mkldnn(object):
             self.set_output_tensor(self.kernels[name], outputs.ctypes.data, 0)
             self.run_opkernel(self.kernels[name], self.mkldnn_verbose)
         else:
-            # self.gamma * ((in_obj - xmean) * ng.reciprocal(ng.sqrt(xvar +
-            # self.eps))) + self.beta)
-            self.xhat = (inputs - mean) / (np.sqrt(variance + epsilon))[:, None]
-            self.batch_norm_output = gamma * self.xhat + bias
-            np.copyto(outputs, self.batch_norm_output)
-
-    def bprop_batchnorm(self, name, outputs, delta, inputs, gamma, bias, mean, variance, epsilon):
+            # gamma * ((inputs - mean) / sqrt(variance + epsilon)) + bias
+            state = self.get_batchnorm_state(name, inputs)
+            self.normalize_batchnorm(state, inputs, mean, variance, epsilon)
+            np.multiply(gamma, state['xhat'], out=outputs)
+            outputs += bias
+
+    def bprop_batchnorm(self, name, outputs, delta, inputs, gamma, bias, mean, variance, epsilon,
+                        fprop_name=None):
         if (self.enabled and name in self.kernels):
-            weights = np.stack([gamma[:, 0], bias[:, 0]])
+            weights = self.get_batchnorm_weights(name, gamma, bias)
             mean_ch = mean[:, 0]
             self.set_input_tensor(self.kernels[name], inputs.ctypes.data, 0)
             self.set_input_tensor(self.kernels[name], mean_ch.ctypes.data, 1)
@@ -210,17 +252,29 @@ class Mkldnn(object):
             self.set_output_tensor(self.kernels[name], outputs.ctypes.data, 0)
             self.run_opkernel(self.kernels[name], self.mkldnn_verbose)
         else:
-            # compute intermediate fprop op's outputs required for batchnorm bprop
-            # axis over which need to sum during bprop
-            axis = (1,)
-            red_args = {'axis': axis, 'keepdims': True}
-            gamma_scale = gamma / np.sqrt(variance + epsilon)[:, None]
-            xhat = (inputs - mean) / np.sqrt(variance + epsilon)[:, None]
-            m = np.prod([inputs.shape[ii] for ii in axis])
-            dgamma = np.sum(delta * xhat, **red_args)
-            dbeta = np.sum(delta, **red_args)
-            dx = gamma_scale * (delta - (xhat * dgamma + dbeta) / m)
-            np.copyto(outputs, dx)
+            # dx = gamma * inv_std * (delta - (xhat * dgamma + dbeta) / m), summing over
+            # axis 1, with xhat and inv_std left by fprop_batchnorm of fprop_name if it
+            # normalized the same inputs
+            state = self.batchnorm_states.get(fprop_name)
+            if state is None or state['xhat'].shape != inputs.shape or \
+                    state['inputs'] != inputs.ctypes.data:
+                state = self.get_batchnorm_state(name, inputs)
+                self.normalize_batchnorm(state, inputs, mean, variance, epsilon)
+            xhat = state['xhat']
+            dgamma = state['dgamma']
+            dbeta = state['dbeta']
+            scale = state['scale']
+            m = inputs.shape[1]
+
+            np.multiply(delta, xhat, out=outputs)
+            np.sum(outputs, axis=1, keepdims=True, out=dgamma)
+            np.sum(delta, axis=1, keepdims=True, out=dbeta)
+            np.multiply(xhat, dgamma, out=outputs)
+            outputs += dbeta
+            outputs *= -1. / m
+            outputs += delta
+            np.multiply(gamma, state['inv_std'], out=scale)
+            outputs *= scale
 
     def fprop_conv(self, name, conv_slices, I, F, B, O):
         if (self.enabled and name in self.kernels):
@@ -347,28 +401,51 @@ class Mkldnn(object):
         else:
             np.add(I_array1, I_array2, out=O_array)
 
+    def get_relu_mask(self, name, inputs):
+        # Buffer for where the fprop input of a numpy relu bprop is positive
+        mask = self.relu_masks.get(name)
+        if mask is None or mask.shape != inputs.shape:
+            mask = np.empty(inputs.shape, dtype=np.bool_)
+            self.relu_masks[name] = mask
+        return mask
+
     def fprop_relu(self, name, inputs, out, slope):
-        assert(self.enabled)
-        assert(name in self.kernels)
-        self.set_input_tensor(self.kernels[name], inputs.ctypes.data, 0)
-        self.set_output_tensor(self.kernels[name], out.ctypes.data, 0)
-        self.run_opkernel(self.kernels[name], self.mkldnn_verbose)
+        if (self.enabled and name in self.kernels):
+            self.set_input_tensor(self.kernels[name], inputs.ctypes.data, 0)
+            self.set_output_tensor(self.kernels[name], out.ctypes.data, 0)
+            self.run_opkernel(self.kernels[name], self.mkldnn_verbose)
+        elif 0 <= slope <= 1:
+            # max(x, slope * x) is x where x > 0 and slope * x elsewhere
+            np.multiply(inputs, slope, out=out)
+            np.maximum(inputs, out, out=out)
+        else:
+            positive = np.greater(inputs, 0, out=self.get_relu_mask(name, inputs))
+            np.multiply(inputs, slope, out=out)
+            np.copyto(out, inputs, where=positive)
 
     def bprop_relu(self, name, inputs, out, fpropSrc, slope):
-        assert(self.enabled)
-        assert(name in self.kernels)
-        self.set_input_tensor(self.kernels[name], fpropSrc.ctypes.data, 0)
-        self.set_input_tensor(self.kernels[name], inputs.ctypes.data, 1)
-        self.set_output_tensor(self.kernels[name], out.ctypes.data, 0)
-        self.run_opkernel(self.kernels[name], self.mkldnn_verbose)
+        if (self.enabled and name in self.kernels):
+            self.set_input_tensor(self.kernels[name], fpropSrc.ctypes.data, 0)
+            self.set_input_tensor(self.kernels[name], inputs.ctypes.data, 1)
+            self.set_output_tensor(self.kernels[name], out.ctypes.data, 0)
+            self.run_opkernel(self.kernels[name], self.mkldnn_verbose)
+        else:
+            # the delta where the fprop input is positive and slope times the delta elsewhere
+            positive = np.greater(fpropSrc, 0, out=self.get_relu_mask(name, fpropSrc))
+            if slope == 0:
+                np.multiply(inputs, positive, out=out)
+            else:
+                np.multiply(inputs, slope, out=out)
+                np.copyto(out, inputs, where=positive)
 
     def mkl_reorder(self, name, output, input):
-        assert self.enabled
-        assert name in self.kernels
-        if name in self.kernels:
+        if (self.enabled and name in self.kernels):
             self.set_input_tensor(self.kernels[name], input.ctypes.data, 0)
             self.set_output_tensor(self.kernels[name], output.ctypes.data, 0)
             self.run_opkernel(self.kernels[name], self.mkldnn_verbose)
+        else:
+            # without a kernel both tensors are in the native layout
+            np.copyto(output, input)
 
     def update_conv(self, name, conv_slices, I, E, U):
         if (self.enabled and name in self.kernels):
@@ -411,6 +488,108 @@ def update_lut(error, idx, pad_idx, axis, dW):
                 dW[:, wrd_id] = np.sum(error.take(group[0], axis=axis), axis=axis)
 
 
+def _gather_class(x, axis, idx):
+    """
+    Views x[..., idx, ...] where idx selects along axis and has the other dimensions of x.
+    """
+    x = np.moveaxis(x, axis, -1)
+    grid = np.ix_(*[np.arange(length) for length in idx.shape])
+    return x, grid + (idx.astype(np.intp),)
+
+
+def softmax_cross_entropy(x, t, axis, t_order, out_order, out):
+    """
+    Cross-entropy of softmax(x) and t, computed from the log-sum-exp of x.
+
+    Arguments:
+        x: The logits.
+        t: The true values, either with the dimensions of x or class indices.
+        axis: The tuple of class dimensions of x.
+        t_order: Transposes t to the dimensions of x, or of x without axis for indices.
+        out_order: Transposes out to the dimensions of x without axis.
+        out: The cross-entropy.
+    """
+    t = np.transpose(t, t_order)
+    out = np.transpose(out, out_order)
+    x_max = np.amax(x, axis=axis, keepdims=True)
+    scratch = np.subtract(x, x_max)
+    np.exp(scratch, out=scratch)
+    log_z = np.log(np.sum(scratch, axis=axis, keepdims=True))
+    log_z += x_max
+    if t.ndim < x.ndim:
+        x, index = _gather_class(x, axis[0], t)
+        np.subtract(log_z.reshape(out.shape), x[index], out=out)
+    else:
+        np.subtract(log_z, x, out=scratch)
+        scratch *= t
+        np.sum(scratch, axis=axis, out=out)
+
+
+def softmax_cross_entropy_bprop(x, t, delta, axis, t_order, delta_order, out_order, out):
+    """
+    Derivative of softmax_cross_entropy with respect to x, (softmax(x) * sum(t) - t) * delta.
+
+    Arguments:
+        x: The logits.
+        t: The true values, either with the dimensions of x or class indices.
+        delta: The adjoint of the cross-entropy.
+        axis: The tuple of class dimensions of x.
+        t_order: Transposes t to the dimensions of x, or of x without axis for indices.
+        delta_order: Transposes delta to the dimensions of x without axis.
+        out_order: Transposes out to the dimensions of x.
+        out: The derivative.
+    """
+    t = np.transpose(t, t_order)
+    out = np.transpose(out, out_order)
+    x_max = np.amax(x, axis=axis, keepdims=True)
+    np.subtract(x, x_max, out=out)
+    np.exp(out, out=out)
+    scale = np.reciprocal(np.sum(out, axis=axis, keepdims=True))
+    delta = np.transpose(delta, delta_order).reshape(scale.shape)
+    scale *= delta
+    if t.ndim < x.ndim:
+        out *= scale
+        out, index = _gather_class(out, axis[0], t)
+        out[index] -= delta.reshape(t.shape)
+    else:
+        scale *= np.sum(t, axis=axis, keepdims=True)
+        out *= scale
+        out -= t * delta
+
+
+def quantize_int8(x, scale):
+    return np.clip(np.rint(x / scale), -127, 127).astype(np.int8)
+
+
+def quantized_dot(x, w, w_scale, x_scale, out):
+    """
+    out = dot(w, x) with x quantized to int8 and the products accumulated in int32.
+    """
+    acc = np.einsum('mk,kn->mn', w, quantize_int8(x, x_scale), dtype=np.int32)
+    np.multiply(acc, (w_scale * x_scale)[:, np.newaxis], out=out, casting='unsafe')
+
+
+def quantized_fprop_conv(conv_slices, I, F, F_scale, x_scale, O):
+    """
+    Convolution of I quantized to int8 with the int8 filters F, accumulated in int32.
+    """
+    mSlice, pSlice, qSlice, _, _, _ = conv_slices
+    K, M, P, Q, N = O.shape
+    I = quantize_int8(I, x_scale)
+    scale = (F_scale * x_scale)[:, np.newaxis]
+
+    for (m, mS), (p, pS), (q, qS) in itt.product(enumerate(mSlice),
+                                                 enumerate(pSlice),
+                                                 enumerate(qSlice)):
+        sliceT, sliceD, _ = mS
+        sliceR, sliceH, _ = pS
+        sliceS, sliceW, _ = qS
+        slicedF = F[:, sliceT, sliceR, sliceS, :].reshape((-1, K))
+        slicedI = I[:, sliceD, sliceH, sliceW, :].reshape((-1, N))
+        acc = np.einsum('ck,cn->kn', slicedF, slicedI, dtype=np.int32)
+        np.multiply(acc, scale, out=O[:, m, p, q, :], casting='unsafe')
+
+
 class ConvLocals(object):
 
     def __init__(self, conv_params, conv_slices, pool_params, pool_slices, **kwargs):
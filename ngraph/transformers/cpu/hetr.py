@@ -15,6 +15,14 @@
 from __future__ import division
 from functools import reduce
 
+import numpy as np
+
+
+def queue_put(q, x_nparr):
+    # multiprocessing.Queue pickles x_nparr in a feeder thread after put returns, so it is
+    # copied before the next run of the computation overwrites its buffer
+    q.put(np.array(x_nparr))
+
 
 class HetrLocals(object):
     def __init__(self, send_nodes, recv_nodes,
@@ -40,7 +48,7 @@ class HetrLocals(object):
         # TODO
         # below converts DeviceTensor to numpy array
         # should we instead serialize DeviceTensor?
-        q.put(x_nparr)
+        queue_put(q, x_nparr)
 
     def recv_from_queue_send(self, recv_id, out):
         recv_op = self.recv_nodes[recv_id]
@@ -54,7 +62,7 @@ class HetrLocals(object):
         # TODO
         # below converts DeviceTensor to numpy array
         # should we instead serialize DeviceTensor?
-        q.put(x_nparr)
+        queue_put(q, x_nparr)
 
     def gather_recv_from_queue_gather_send(self, gather_recv_id, out):
         gather_recv_op = self.gather_recv_nodes[gather_recv_id]
@@ -77,7 +85,7 @@ class HetrLocals(object):
         # should we instead serialize DeviceTensor?
         for i in range(len(scatter_send_op.to_id)):
             q = scatter_send_op.shared_queues[i]
-            q.put(x_nparr[scatter_send_op.slices[i]])
+            queue_put(q, x_nparr[scatter_send_op.slices[i]])
 
     def scatter_recv_from_queue_scatter_send(self, scatter_recv_id, out):
         scatter_recv_op = self.scatter_recv_nodes[scatter_recv_id]
@@ -92,7 +100,7 @@ class HetrLocals(object):
         # Send to all devices
         for i, q in enumerate(allreduce_op.shared_queues):
             if i != allreduce_op.idx:
-                q.put(x_nparr)
+                queue_put(q, x_nparr)
 
         # Receive from all devices
         recv_buf.append(x_nparr)
@@ -115,7 +123,7 @@ class HetrLocals(object):
         broadcast_send_op = self.broadcast_send_nodes[broadcast_send_id]
         for i in range(len(broadcast_send_op.to_id)):
             q = broadcast_send_op.shared_queues[i]
-            q.put(x_nparr)
+            queue_put(q, x_nparr)
 
     def broadcast_recv_from_queue_broadcast_send(self, broadcast_recv_id, out):
         broadcast_recv_op = self.broadcast_recv_nodes[broadcast_recv_id]
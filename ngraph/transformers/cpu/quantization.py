@@ -0,0 +1,240 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Post-training int8 quantization for CPU inference.
+
+Typical use::
+
+    calibration = calibrate(transformer, inference, [x], calibration_batches)
+    int8_transformer = CPUTransformer(quantization=calibration)
+    int8_inference = int8_transformer.computation(inference, x)
+
+The CPU transformer replaces each calibrated DotOp and ConvolutionOp with an op that
+quantizes its activation to int8 with the calibrated range, multiplies it with weights
+that were quantized to int8 with one scale per output channel, accumulates in int32 and
+scales the result back to float.
+"""
+from __future__ import division
+
+import numpy as np
+
+from ngraph.op_graph.op_graph import Op, TensorOp, DotOp, AssignableTensorOp, TensorValueOp
+from ngraph.op_graph.convolution import ConvolutionOp, DeconvolutionOp
+
+
+INT8_MAX = 127
+
+
+class QuantizedDotOp(TensorOp):
+    """
+    Matrix product of int8 weights and an activation quantized to int8.
+
+    Arguments:
+        x: The float activation, a matrix whose first axis is reduced.
+        weights: The int8 weight matrix, whose second axis is reduced.
+        weight_scale: The float scale of each row of weights.
+        x_scale (float): The scale used to quantize x.
+    """
+    def __init__(self, x, weights, weight_scale, x_scale, **kwargs):
+        super(QuantizedDotOp, self).__init__(args=(x, weights, weight_scale), **kwargs)
+        self.x_scale = x_scale
+
+
+class QuantizedConvolutionOp(TensorOp):
+    """
+    Convolution of an input quantized to int8 with int8 filters.
+
+    Arguments:
+        conv_params: The parameters of the convolution.
+        inputs: The float input tensor.
+        filters: The int8 filters.
+        filter_scale: The float scale of each output channel of filters.
+        x_scale (float): The scale used to quantize inputs.
+    """
+    def __init__(self, conv_params, inputs, filters, filter_scale, x_scale, **kwargs):
+        super(QuantizedConvolutionOp, self).__init__(args=(inputs, filters, filter_scale),
+                                                     **kwargs)
+        self.conv_params = conv_params
+        self.x_scale = x_scale
+
+
+def quantize_per_channel(value, axis):
+    """
+    Symmetrically quantizes value to int8 with one scale per index of axis.
+
+    Arguments:
+        value: A NumPy array.
+        axis (int): The channel axis.
+
+    Returns:
+        The int8 array and the float32 scale of each channel.
+    """
+    value = np.asarray(value, dtype=np.float32)
+    reduction = tuple(i for i in range(value.ndim) if i != axis)
+    scale = np.max(np.abs(value), axis=reduction, keepdims=True) / INT8_MAX
+    scale[scale == 0] = 1
+    quantized = np.clip(np.rint(value / scale), -INT8_MAX, INT8_MAX).astype(np.int8)
+    return quantized, scale.reshape(-1)
+
+
+def is_weight(op):
+    """
+    Returns:
+        True if the value of op only depends on variables and constants, at least one of
+        them trainable.
+    """
+    leaves = [leaf.tensor if isinstance(leaf, TensorValueOp) else leaf
+              for leaf in Op.ordered_ops([op])]
+    leaves = [leaf for leaf in leaves if isinstance(leaf, AssignableTensorOp)]
+    return any(leaf.is_trainable for leaf in leaves) and \
+        not any(leaf.is_placeholder for leaf in leaves)
+
+
+def weight_index(op):
+    """
+    Returns:
+        The index of the weight argument of op if it can be quantized, otherwise None.
+    """
+    if isinstance(op, (ConvolutionOp, DeconvolutionOp)):
+        if type(op) is ConvolutionOp and len(op.args) == 2 \
+                and is_weight(op.args[1]) and not is_weight(op.args[0]):
+            return 1
+        return None
+    if isinstance(op, DotOp) and op.bias is None:
+        weights = [is_weight(arg) for arg in op.args]
+        if weights.count(True) == 1:
+            return weights.index(True)
+    return None
+
+
+def quantizable_ops(results):
+    """
+    Returns:
+        The DotOps and ConvolutionOps needed for results that multiply an activation
+        with weights.
+    """
+    return [op for op in Op.ordered_ops(results) if weight_index(op) is not None]
+
+
+class Int8Calibration(object):
+    """
+    The ranges and weights collected by calibrate.
+
+    Attributes:
+        ranges: The largest absolute value of the activation of each calibrated op.
+        weights: The index and value of the weight argument of each calibrated op,
+            with the axes of the argument.
+    """
+    def __init__(self):
+        self.ranges = dict()
+        self.weights = dict()
+
+    def __contains__(self, op):
+        return op in self.weights
+
+    def activation_scale(self, op):
+        """
+        Returns:
+            The scale for quantizing the activation of op to int8.
+        """
+        max_abs = self.ranges[op]
+        if max_abs == 0:
+            return 1.0
+        return float(max_abs) / INT8_MAX
+
+
+def calibrate(transformer, results, parameters, batches):
+    """
+    Collects the activation ranges and weights needed to quantize the computation of
+    results.
+
+    The computations used for calibration are added to transformer, which can already
+    have run other computations, e.g. training steps. The weights are read when
+    calibrate runs, so calibrating with the transformer used for training gives the
+    weights as trained so far.
+
+    Arguments:
+        transformer: A transformer holding the weights.
+        results: The results of the inference computation.
+        parameters: The placeholders of the inference computation.
+        batches: An iterable of the values of parameters for each calibration batch.
+
+    Returns:
+        An Int8Calibration.
+    """
+    if isinstance(results, Op):
+        results = [results]
+    calibration = Int8Calibration()
+    ops = quantizable_ops(results)
+    if not ops:
+        return calibration
+
+    indexes = [weight_index(op) for op in ops]
+    activations = transformer.computation([op.args[1 - index]
+                                           for op, index in zip(ops, indexes)],
+                                          *parameters)
+    weights = transformer.computation([op.args[index] for op, index in zip(ops, indexes)])
+
+    for op in ops:
+        calibration.ranges[op] = 0.0
+    for batch in batches:
+        for op, value in zip(ops, activations(*batch)):
+            calibration.ranges[op] = max(calibration.ranges[op], float(np.max(np.abs(value))))
+    for op, index, value in zip(ops, indexes, weights()):
+        calibration.weights[op] = index, np.array(value, dtype=np.float32)
+    return calibration
+
+
+def compare_accuracy(reference, quantized, batches, class_axis=0):
+    """
+    Runs a float and a quantized computation on the same batches and compares the
+    results.
+
+    Arguments:
+        reference: The float32 computation.
+        quantized: The int8 computation.
+        batches: An iterable of the arguments of both computations for each batch.
+        class_axis (int): The axis of the classes for top-1 agreement.
+
+    Returns:
+        A dict with the largest and mean absolute error, the error relative to the norm
+        of the reference and the fraction of argmaxes along class_axis that agree.
+    """
+    max_abs_error = 0.0
+    sum_abs_error = 0.0
+    sum_square_error = 0.0
+    sum_square = 0.0
+    size = 0
+    agree = 0
+    count = 0
+    for batch in batches:
+        expected = np.array(reference(*batch), dtype=np.float64)
+        actual = np.array(quantized(*batch), dtype=np.float64)
+        error = np.abs(actual - expected)
+        max_abs_error = max(max_abs_error, float(np.max(error)))
+        sum_abs_error += float(np.sum(error))
+        sum_square_error += float(np.sum(np.square(error)))
+        sum_square += float(np.sum(np.square(expected)))
+        size += error.size
+        if expected.ndim > class_axis:
+            matches = np.argmax(expected, class_axis) == np.argmax(actual, class_axis)
+            agree += int(np.sum(matches))
+            count += matches.size
+    return {
+        'max_abs_error': max_abs_error,
+        'mean_abs_error': sum_abs_error / size if size else 0.0,
+        'relative_error': np.sqrt(sum_square_error / sum_square) if sum_square else 0.0,
+        'top1_agreement': agree / count if count else 1.0,
+    }
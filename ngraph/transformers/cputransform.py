@@ -18,6 +18,8 @@ from __future__ import print_function
 
 from functools import wraps
 from operator import itemgetter
+from future.utils import itervalues
+from monotonic import monotonic
 # These are indirectly used by the generated code
 import numpy as np
 import os
@@ -31,7 +33,7 @@ from ngraph.op_graph.op_graph import AbsoluteOp, Add, Argmax, Argmin, \
     LogOp, Max, Maximum, Min, Minimum, Multiply, NegativeOp, NotEqual, OneHotOp, \
     ReciprocalOp, Power, AssignOp, SignOp, SinOp, SqrtOp, SquareOp, RngOp, \
     Subtract, Sum, Prod, TanhOp, TensorSizeOp, Fill, TensorDescription, \
-    ReductionOp, WriteOp, ReadOp
+    ReductionOp, WriteOp, ReadOp, SoftmaxCrossEntropyOp, SoftmaxCrossEntropyBpropOp
 from ngraph.op_graph.convolution import ConvolutionOp, update_conv, bprop_conv, \
     DeconvolutionOp, DeconvDerivOp
 from ngraph.op_graph.pooling import PoolingOp, BpropPoolOp
@@ -40,16 +42,20 @@ from ngraph.op_graph.ctc import CTCOp
 from ngraph.op_graph.debug import PrintOp
 from ngraph.transformers.cpu.batchnorm import BatchnormOp, BpropBatchnormOp
 from ngraph.transformers.cpu.relu import ReluOp, BpropReluOp
+from ngraph.transformers.cpu.quantization import QuantizedDotOp, QuantizedConvolutionOp
 from ngraph.transformers.passes.passes import RequiredTensorShaping, \
     CPUTensorShaping, SimplePrune
+from ngraph.transformers.passes.constantfolding import ConstantFolding
 from ngraph.transformers.passes.cpulayout import CPUTensorLayout
 from ngraph.transformers.passes.cpufusion import CPUFusion
+from ngraph.transformers.passes.cpuquantization import CPUQuantization
 from ngraph.transformers.passes.mkldnnpasses import MklCreateOpDescriptors, \
     MklAddLayoutConversions, MklReorderOp
 from ngraph.transformers.passes.layout import AddLayoutConversions
 from ngraph.transformers.passes.expass import SSAConversion, IndexElision, DeadCodeEliminationPass
 from ngraph.transformers.passes.memlayout import MemLayoutPass
 from ngraph.transformers.passes.memoptimize import MemOptimizePass
+from ngraph.transformers.passes.commschedule import CommSchedulePass
 from ngraph.transformers.passes.liveness import LivenessPass
 
 from ngraph.transformers.base import make_transformer_factory, \
@@ -64,8 +70,6 @@ from ngraph.op_graph.comm_nodes import CPUQueueSendOp, CPUQueueRecvOp, \
     CPUQueueScatterRecvOp, CPUQueueAllReduceOp, CPUQueueBroadcastSendOp, \
     CPUQueueBroadcastRecvOp
 
-from ngraph.util.trace_events import is_tracing_enabled
-
 
 class CPUConvEngine(object):
 
@@ -429,6 +433,12 @@ class CPUCodeGenerator(PyGen):
         self.conv_slices[op.safe_name] = \
             CPUConvEngine.get_slices(inputs, filters, outputs, op.conv_params)
 
+    @allocate_op.on_type(QuantizedConvolutionOp)
+    def allocate_op(self, op, outputs, inputs, filters, filter_scale):
+        self.conv_params[op.safe_name] = op.conv_params
+        self.conv_slices[op.safe_name] = \
+            CPUConvEngine.get_slices(inputs, filters, outputs, op.conv_params)
+
     @allocate_op.on_type(DeconvolutionOp)
     def allocate_op(self, op, outputs, inputs, filters):
         # get_slices args: Swap outputs and inputs
@@ -450,8 +460,7 @@ class CPUCodeGenerator(PyGen):
         # for output_decl in exop.output_decls:
         #     output_decl_name = 'a_'+output_decl.tensor.tensor_name
         #     self.append("#    output_decl {}", val_name)
-        if is_tracing_enabled():
-            self.append("self.__profiler_start__.append(monotonic())")
+        pass
 
     def generate_op_post(self, op):
         # exop = self.exop
@@ -464,8 +473,9 @@ class CPUCodeGenerator(PyGen):
         #     self.append("#    output_decl {}", output_decl_name)
         #     self.append("print('   output_decl {} = {{}}'.format({}))", \
         #            output_decl_name, output_decl_name)
-        if is_tracing_enabled():
-            self.append("self.__profiler_stop__.append(monotonic())")
+        self.append("if profile_timestamps is not None:")
+        with indenting(self):
+            self.append("profile_timestamps.append(monotonic())")
 
     @generic_method(Op)
     def generate_op(self, op, *args):
@@ -514,6 +524,12 @@ class CPUCodeGenerator(PyGen):
         self.append("mkldnn.fprop_conv('{}', self.conv_slices['{}'], I={}, F={}, B={}, O={})",
                     op.safe_name, op.safe_name, inputs, filters, bias, outputs)
 
+    @generate_op.on_type(QuantizedConvolutionOp)
+    def generate_op(self, op, outputs, inputs, filters, filter_scale):
+        self.append("quantized_fprop_conv(self.conv_slices['{}'], I={}, F={}, F_scale={}, "
+                    "x_scale={}, O={})",
+                    op.safe_name, inputs, filters, filter_scale, repr(op.x_scale), outputs)
+
     @generate_op.on_type(bprop_conv)
     def generate_op(self, op, outputs, delta, filters):
         self.append("mkldnn.bprop_conv('{}', self.conv_slices['{}'], E={}, F={}, gI={})",
@@ -560,6 +576,29 @@ class CPUCodeGenerator(PyGen):
         self.append("ctc_cpu(acts={}, lbls={}, utt_lens={}, lbl_lens={}, grads={}, costs={})",
                     activations, lbls, utt_lens, lbl_lens, grads, outputs)
 
+    @generate_op.on_type(SoftmaxCrossEntropyOp)
+    def generate_op(self, op, out, x, t):
+        x_axes = op.args[0].axes
+        class_axes = op.normalization_axes
+        label_axes = x_axes - class_axes if op.index_labels else x_axes
+        self.append("softmax_cross_entropy(x={}, t={}, axis={}, t_order={}, out_order={}, "
+                    "out={})",
+                    x, t, tuple(x_axes.index(axis) for axis in class_axes),
+                    tuple(op.args[1].axes.index(axis) for axis in label_axes),
+                    tuple(op.axes.index(axis) for axis in x_axes - class_axes), out)
+
+    @generate_op.on_type(SoftmaxCrossEntropyBpropOp)
+    def generate_op(self, op, out, x, t, delta):
+        x_axes = op.args[0].axes
+        class_axes = op.normalization_axes
+        label_axes = x_axes - class_axes if op.index_labels else x_axes
+        self.append("softmax_cross_entropy_bprop(x={}, t={}, delta={}, axis={}, t_order={}, "
+                    "delta_order={}, out_order={}, out={})",
+                    x, t, delta, tuple(x_axes.index(axis) for axis in class_axes),
+                    tuple(op.args[1].axes.index(axis) for axis in label_axes),
+                    tuple(op.args[2].axes.index(axis) for axis in x_axes - class_axes),
+                    tuple(op.axes.index(axis) for axis in x_axes), out)
+
     @generate_op.on_type(RngOp)
     def generate_op(self, op, out, x):
         if op.distribution == 'uniform':
@@ -594,6 +633,11 @@ class CPUCodeGenerator(PyGen):
         self.append("mkldnn.innerproduct_fprop('{}', {}, {}, {}, out={})",
                     op.safe_name, x, y, bias, out)
 
+    @generate_op.on_type(QuantizedDotOp)
+    def generate_op(self, op, out, x, weights, weight_scale):
+        self.append("quantized_dot({}, {}, {}, {}, out={})",
+                    x, weights, weight_scale, repr(op.x_scale), out)
+
     @generate_op.on_type(BatchnormOp)
     def generate_op(self, op, output, inputs, gamma, bias, epsilon, mean, variance):
         self.append("mkldnn.fprop_batchnorm('{}', inputs={}, outputs={}, gamma={},\
@@ -603,8 +647,9 @@ class CPUCodeGenerator(PyGen):
     @generate_op.on_type(BpropBatchnormOp)
     def generate_op(self, op, output, delta, inputs, gamma, bias, mean, variance):
         self.append("mkldnn.bprop_batchnorm('{}', outputs={}, delta={}, inputs={}, \
-                    gamma={}, bias={}, mean={}, variance={}, epsilon={})", op.safe_name, output,
-                    delta, inputs, gamma, bias, mean, variance, op.fprop.eps)
+                    gamma={}, bias={}, mean={}, variance={}, epsilon={}, fprop_name='{}')",
+                    op.safe_name, output, delta, inputs, gamma, bias, mean, variance,
+                    op.fprop.eps, op.fprop.forwarded.safe_name)
 
     @generate_op.on_type(ReluOp)
     def generate_op(self, op, outputs, inputs):
@@ -804,6 +849,11 @@ class CPUTransformer(ExecutionGraphTransformer):
     Given a list of ops you want to compute the results of, this transformer
     will compile the graph required to compute those results and exposes an
     evaluate method to execute the compiled graph.
+
+    Arguments:
+        quantization: An Int8Calibration. When given, the calibrated dots and
+            convolutions run on int8 weights and activations, see
+            ngraph.transformers.cpu.quantization.
     """
 
     transformer_name = "cpu"
@@ -817,7 +867,7 @@ class CPUTransformer(ExecutionGraphTransformer):
     except ImportError:
         use_mlsl = False
 
-    def __init__(self, **kwargs):
+    def __init__(self, quantization=None, **kwargs):
         super(CPUTransformer, self).__init__(**kwargs)
         self.device_computation = None
         self.conv_engine = CPUConvEngine()
@@ -844,12 +894,15 @@ class CPUTransformer(ExecutionGraphTransformer):
         # from ngraph.transformers.passes.dumpgraphpass import DumpGraphPass
 
         self.graph_passes = []
+        if quantization is not None:
+            self.graph_passes.append(CPUQuantization(quantization))
         if self.mkldnn.enabled:
             self.graph_passes.append(CPUFusion())
         self.graph_passes += [
             # ExVizPass(view=True, filename="initial"),
             CPUTensorLayout(),
             SimplePrune(),
+            ConstantFolding(),
             RequiredTensorShaping(),
             CPUTensorShaping(),
             DeadCodeEliminationPass(),
@@ -867,6 +920,7 @@ class CPUTransformer(ExecutionGraphTransformer):
             IndexElision(),
             # DCE here eliminates return values. Need to figure out why.
             # DeadCodeEliminationPass(),
+            CommSchedulePass(),
             LivenessPass(),
             MemOptimizePass(),
             LivenessPass(),
@@ -886,13 +940,10 @@ class CPUTransformer(ExecutionGraphTransformer):
         with indenting(self.exop_codegen):
             self.exop_codegen.append("def __init__(self, **kwargs):")
             with indenting(self.exop_codegen):
-                if is_tracing_enabled():
-                    self.exop_codegen.append("""
-self.__profiler_start__ = list()
-self.__profiler_stop__  = list()
-""")
                 self.exop_codegen.append('super({}, self).__init__(**kwargs)',
                                          computation_decl.computation_op.name)
+                # Set to a list by the device computation to record the time of each exop
+                self.exop_codegen.append('self.profile_timestamps = None')
                 for exop in computation_decl.exop_block:
                     output_decl = exop.output_decls[0] if len(exop.output_decls) > 0 else None
                     # TODO better way to deal with multiple values
@@ -904,6 +955,10 @@ self.__profiler_stop__  = list()
         self.exop_codegen.indent(1)
         self.exop_codegen.append("def __call__(self):")
         self.exop_codegen.indent(1)
+        self.exop_codegen.append("profile_timestamps = self.profile_timestamps")
+        self.exop_codegen.append("if profile_timestamps is not None:")
+        with indenting(self.exop_codegen):
+            self.exop_codegen.append("profile_timestamps.append(monotonic())")
         self.codegen_define_length = self.exop_codegen.code_length
 
     def generate_exop(self, exop):
@@ -922,7 +977,16 @@ self.__profiler_stop__  = list()
     def finish_load_computation(self, computation_decl):
         device_computation = computation_decl.device_computation
         temp_pool_size = computation_decl.exop_block.memory_footprint() // 4
-        persistent_pool_size = computation_decl.exop_block.persistent_size() // 4
+        # Persistent tensors shared with computations that were loaded earlier already
+        # live in the pool of the computation that first generated them, so only the
+        # tensors generated against this computation need to fit in its pool.
+        persistent_pool_size = 0
+        for device_tensor in itervalues(self.device_tensors):
+            if device_tensor.is_persistent and \
+                    device_tensor.device_computation is device_computation:
+                persistent_pool_size = max(persistent_pool_size,
+                                           device_tensor.buffer_pool_offset + device_tensor.size)
+        persistent_pool_size //= 4
         self.exop_codegen_pools.append("{}_temporary_pool = np.empty({}, dtype=np.dtype('{}'))",
                                        computation_decl.computation_op.name, temp_pool_size,
                                        'float32')
@@ -946,7 +1010,15 @@ self.__profiler_stop__  = list()
         code += '# code\n'
         code += '#---------------------------------------------\n'
         code += self.exop_codegen.take_code()
+        module_compile_start = monotonic()
         self.globals.compile(code)
+        device_computation.compile_report.update({
+            'codegen_bytes': len(code),
+            'codegen_lines': code.count('\n') + 1,
+            'module_compile_time': monotonic() - module_compile_start,
+            'temporary_pool_size': temp_pool_size * 4,
+            'persistent_pool_size': persistent_pool_size * 4,
+        })
         cls = self.globals[computation_decl.computation_op.name]
         executor = cls(conv_params=device_computation.conv_params,
                        pool_params=device_computation.pool_params,
@@ -991,6 +1063,9 @@ except ImportError:
     pass
 from ngraph.op_graph import axes
 from ngraph.transformers.cpu.cpuengine import fprop_lut, update_lut
+from ngraph.transformers.cpu.cpuengine import softmax_cross_entropy
+from ngraph.transformers.cpu.cpuengine import softmax_cross_entropy_bprop
+from ngraph.transformers.cpu.cpuengine import quantized_dot, quantized_fprop_conv
 from ngraph.transformers.cpu.cpuengine import Mkldnn
 from ngraph.transformers.cpu.cpuengine import ConvLocals
 from ngraph.transformers.cpu.hetr import HetrLocals
@@ -1024,6 +1099,7 @@ from ngraph.transformers.cpu.ctc import ctc_cpu
         pass
 
     def close(self):
+        self.close_stagers()
         if self.code is not None:
             try:
                 if self.globals.get('mkldnn', None) is not None:
@@ -1176,7 +1176,8 @@ class ExecutionState(object):
     def get_op_tensor(self, op):
         tensor_description = op.tensor_description()
         tensor_description_base = tensor_description.base
-        return self.__tensors_decls.get(tensor_description_base)
+        return self.__tensors_decls.get((tensor_description_base.op,
+                                         tensor_description_base.shape))
 
     def ensure_tensor_decl(self, execution_graph, tensor_description=None, op=None):
         tensor_description_base = tensor_description.base
@@ -1184,7 +1185,11 @@ class ExecutionState(object):
             raise ValueError(
                 "Tensor description base {} has no Op".format(tensor_description_base))
 
-        tensor_decl = self.__tensors_decls.get(tensor_description_base.op, None)
+        # Persistent tensors are shared by every computation that uses them at the same
+        # shape. A computation compiled with different axis lengths, such as another
+        # batch size bucket, gets its own storage for the tensors that change shape.
+        key = (tensor_description_base.op, tensor_description_base.shape)
+        tensor_decl = self.__tensors_decls.get(key, None)
         if tensor_decl is None:
             tensor_decl = TensorDecl(op,
                                      element_type=etype(tensor_description_base.dtype),
@@ -1193,7 +1198,7 @@ class ExecutionState(object):
                                      is_input=tensor_description_base.is_input,
                                      tensor_description_base=tensor_description_base,
                                      execution_graph=execution_graph)
-            self.__tensors_decls[tensor_description_base.op] = tensor_decl
+            self.__tensors_decls[key] = tensor_decl
         return tensor_decl
 
 
@@ -1218,13 +1223,16 @@ class ExecutionGraph(object):
         if tensor_description is None:
             tensor_description = op.tensor_description()
         tensor_description_base = tensor_description.base
-        if tensor_description_base.is_persistent:
-            return self.execution_state.ensure_tensor_decl(self, tensor_description, op)
         if tensor_description_base.op is None:
             raise ValueError(
                 "Tensor description base {} has no Op".format(tensor_description_base))
         tensor_decl = self.tensor_decls.get(tensor_description_base.op, None)
-        if tensor_decl is None:
+        if tensor_decl is None and tensor_description_base.is_persistent:
+            # Remember the shared tensor so that later lookups from this graph find it
+            # even if axis lengths have changed since it was compiled.
+            tensor_decl = self.execution_state.ensure_tensor_decl(self, tensor_description, op)
+            self.tensor_decls[tensor_description_base.op] = tensor_decl
+        elif tensor_decl is None:
             tensor_decl = TensorDecl(op,
                                      element_type=etype(tensor_description_base.dtype),
                                      size=tensor_description_base.tensor_size,
@@ -15,18 +15,26 @@
 from __future__ import division
 from future.utils import iteritems, itervalues
 import abc
+import collections
+import itertools
 from future.utils import with_metaclass
 import weakref
 
+import numpy as np
+from monotonic import monotonic
+from orderedset import OrderedSet
+
 from ngraph.util.names import NameableValue
-from ngraph.op_graph.op_graph import AssignableTensorOp, TensorValueOp
+from ngraph.op_graph.op_graph import AssignableTensorOp, TensorValueOp, Op, computation, \
+    tdcache
 from ngraph.transformers.base import Transformer
 from ngraph.transformers.base import DeviceTensor as BaseDeviceTensorView
 from ngraph.transformers.base import Computation as BaseDeviceComputation
 from ngraph.transformers.exop import ExecutionState
 from ngraph.transformers.passes.exopdelegate import ExOpGraphOpAccessor
+from ngraph.transformers.profiler import Profiler
 
-from ngraph.util.trace_events import TraceEventTracker
+from ngraph.util.trace_events import TraceEventTracker, is_tracing_enabled
 
 
 class DeviceComputation(BaseDeviceComputation):
@@ -36,13 +44,35 @@ class DeviceComputation(BaseDeviceComputation):
     def __init__(self, transformer, computation_op, **kwargs):
         super(DeviceComputation, self).__init__(transformer, computation_op, **kwargs)
 
-    def generate_profile(self, profiler_start, profiler_stop):
+    def execute(self):
+        """
+        Runs the executor, recording the time of each exop when profiling or tracing.
+        """
+        profiler = self.transformer.profiler
+        tracing = is_tracing_enabled()
+        if not (profiler.enabled or tracing):
+            self.executor()
+            return
+
+        timestamps = []
+        self.executor.profile_timestamps = timestamps
+        try:
+            self.executor()
+        finally:
+            self.executor.profile_timestamps = None
+
+        if profiler.enabled:
+            profiler.record(self.computation_decl, timestamps)
+        # Generate a timeline for the computation
+        if tracing:
+            self.generate_profile(timestamps)
+
+    def generate_profile(self, timestamps):
         tracker = TraceEventTracker(self.computation_op.name)
-        start = iter(profiler_start)
-        stop = iter(profiler_stop)
-        for exop in self.computation_decl.exop_block:
-            start_time = next(start) * 1e6
-            duration = (next(stop) * 1e6) - start_time
+        for exop, start, stop in zip(self.computation_decl.exop_block,
+                                     timestamps, timestamps[1:]):
+            start_time = start * 1e6
+            duration = (stop * 1e6) - start_time
             args = {}
             count = 0
             for input_decl in exop.input_decls:
@@ -53,6 +83,214 @@ class DeviceComputation(BaseDeviceComputation):
         tracker.serialize_to_file()
 
 
+class BucketedComputation(object):
+    """
+    A computation compiled once for each bucket of lengths of a set of axes, such as the
+    batch or the sequence length axes. Each call is dispatched to the smallest bucket
+    that fits the arguments. Arguments are padded up to the bucket lengths and results
+    are sliced back down to the lengths of the arguments.
+
+    The buckets share the persistent tensors of the transformer, so variables are only
+    allocated and initialized once. Padding is only correct for computations whose
+    results do not combine values along the bucketed axes, e.g. inference on
+    independent samples.
+
+    Arguments:
+        transformer: The ExecutionGraphTransformer used to compile the buckets.
+        computation_op: The computation to compile.
+        buckets: A dict mapping each bucketed Axis to the lengths to compile for.
+        pad_value: The value used to pad arguments up to the bucket lengths.
+
+    Attributes:
+        axes: The bucketed axes.
+        buckets: A list of (lengths, computation) pairs ordered from the smallest to the
+            largest bucket, where lengths holds the length of each bucketed axis.
+    """
+    def __init__(self, transformer, computation_op, buckets, pad_value=0, **kwargs):
+        super(BucketedComputation, self).__init__(**kwargs)
+        self.transformer = transformer
+        self.computation_op = computation_op
+        self.pad_value = pad_value
+        self.axes = tuple(buckets)
+        if len(self.axes) == 0:
+            raise ValueError("At least one axis must be bucketed")
+
+        bucket_lengths = []
+        for axis in self.axes:
+            lengths = sorted(set(buckets[axis]))
+            if len(lengths) == 0 or lengths[0] <= 0:
+                raise ValueError((
+                    "Bucket lengths for axis {axis} must be positive, found {lengths}"
+                ).format(axis=axis, lengths=lengths))
+            bucket_lengths.append(lengths)
+
+        ops = Op.ordered_ops([computation_op])
+        self.axis_instances = [OrderedSet() for _ in self.axes]
+        for op in ops:
+            if not op.is_tensor_op:
+                continue
+            for axis in self._leaf_axes(op.axes):
+                if axis in self.axes:
+                    self.axis_instances[self.axes.index(axis)].add(axis)
+                    tensor = op.tensor
+                    if tensor.is_persistent and not tensor.is_placeholder:
+                        raise ValueError((
+                            "{op} is persistent and has the bucketed axis {axis}; persistent "
+                            "tensors are shared by all buckets and must not depend on "
+                            "bucketed axes."
+                        ).format(op=tensor, axis=axis))
+
+        self.parameter_positions = [self._bucket_positions(param)
+                                    for param in computation_op.parameters]
+        for index, axis in enumerate(self.axes):
+            if not any(i == index for positions in self.parameter_positions
+                       for i, _ in positions):
+                raise ValueError((
+                    "Bucketed axis {axis} is not used by any parameter of the computation"
+                ).format(axis=axis))
+
+        returns = computation_op.returns
+        if isinstance(returns, Op):
+            returns = [returns]
+        elif returns is None:
+            returns = []
+        self.return_positions = dict((op, self._bucket_positions(op))
+                                     for op in returns if op.is_tensor_op)
+
+        self.buckets = []
+        for lengths in sorted(itertools.product(*bucket_lengths),
+                              key=lambda lengths: (np.prod(lengths), lengths)):
+            self.buckets.append((lengths, self._compile(lengths)))
+        self.staging = dict()
+
+    @staticmethod
+    def _leaf_axes(axes):
+        for axis in axes:
+            if axis.is_flattened:
+                for leaf in BucketedComputation._leaf_axes(axis.axes):
+                    yield leaf
+            else:
+                yield axis
+
+    def _bucket_positions(self, op):
+        """
+        Returns:
+            A list of (bucketed axis index, dimension) pairs for the bucketed axes of op.
+        """
+        positions = []
+        for dim, axis in enumerate(op.axes):
+            if axis.is_flattened:
+                if any(leaf in self.axes for leaf in self._leaf_axes(axis.axes)):
+                    raise ValueError((
+                        "{op} has a bucketed axis inside the flattened axis {axis} and "
+                        "can not be padded or sliced"
+                    ).format(op=op, axis=axis))
+            elif axis in self.axes:
+                positions.append((self.axes.index(axis), dim))
+        return positions
+
+    def _compile(self, lengths):
+        """
+        Compiles the computation with the bucketed axes set to lengths.
+
+        Arguments:
+            lengths: The length of each bucketed axis.
+
+        Returns:
+            The device computation for the bucket.
+        """
+        saved_lengths = [[(axis, axis.length) for axis in instances]
+                         for instances in self.axis_instances]
+        try:
+            for instances, length in zip(self.axis_instances, lengths):
+                for axis in instances:
+                    axis.length = length
+            tdcache.tensor_description_cache.clear()
+            bucket_op = computation(self.computation_op.returns, *self.computation_op.parameters)
+            return self.transformer.add_computation(bucket_op)
+        finally:
+            for saved in saved_lengths:
+                for axis, length in saved:
+                    axis.length = length
+            tdcache.tensor_description_cache.clear()
+
+    def select_bucket(self, lengths):
+        """
+        Finds the smallest bucket that fits lengths.
+
+        Arguments:
+            lengths: The length of each bucketed axis.
+
+        Returns:
+            A (bucket lengths, computation) pair.
+        """
+        for bucket in self.buckets:
+            if all(length <= bucket_length
+                   for length, bucket_length in zip(lengths, bucket[0])):
+                return bucket
+        raise ValueError((
+            "No bucket fits lengths {lengths} of axes {axes}; the largest bucket is {largest}"
+        ).format(lengths=tuple(lengths), axes=self.axes, largest=self.buckets[-1][0]))
+
+    def _pad(self, param_index, arg, bucket_lengths):
+        shape = list(np.shape(arg))
+        for index, dim in self.parameter_positions[param_index]:
+            shape[dim] = bucket_lengths[index]
+        shape = tuple(shape)
+        if shape == np.shape(arg):
+            return arg
+
+        key = (param_index, shape)
+        staging = self.staging.get(key, None)
+        if staging is None:
+            dtype = self.computation_op.parameters[param_index].dtype
+            staging = np.empty(shape, dtype=dtype)
+            self.staging[key] = staging
+        staging.fill(self.pad_value)
+        staging[tuple(slice(0, length) for length in np.shape(arg))] = arg
+        return staging
+
+    def _unpad(self, op, value, lengths):
+        positions = self.return_positions.get(op, None)
+        if not positions or value is None:
+            return value
+        index = [slice(None)] * np.ndim(value)
+        for i, dim in positions:
+            index[dim] = slice(0, lengths[i])
+        return value[tuple(index)]
+
+    def __call__(self, *args, **kwargs):
+        """
+        Executes the smallest bucket that fits the arguments.
+        """
+        args = self.buckets[0][1].unpack_args_or_feed_dict(args, kwargs)
+
+        lengths = [None] * len(self.axes)
+        for arg, positions in zip(args, self.parameter_positions):
+            shape = np.shape(arg)
+            for index, dim in positions:
+                if lengths[index] is None:
+                    lengths[index] = shape[dim]
+                elif lengths[index] != shape[dim]:
+                    raise ValueError((
+                        "Arguments disagree on the length of bucketed axis {axis}: "
+                        "{length} and {other}"
+                    ).format(axis=self.axes[index], length=lengths[index], other=shape[dim]))
+
+        bucket_lengths, bucket = self.select_bucket(lengths)
+        args = tuple(self._pad(i, arg, bucket_lengths) for i, arg in enumerate(args))
+        result = bucket(*args)
+
+        returns = self.computation_op.returns
+        if isinstance(returns, Op):
+            return self._unpad(returns, result, lengths)
+        elif isinstance(returns, (collections.Sequence, OrderedSet)):
+            return tuple(self._unpad(op, value, lengths) for op, value in zip(returns, result))
+        elif isinstance(returns, collections.Set):
+            return dict((op, self._unpad(op, value, lengths)) for op, value in iteritems(result))
+        return result
+
+
 class DeviceBuffer(NameableValue):
     def __init__(self, transformer, buffer, **kwargs):
         super(DeviceBuffer, self).__init__(name=buffer.buffer_name, **kwargs)
@@ -209,6 +447,7 @@ class ExecutionGraphTransformer(Transformer):
         self.device_tensor_views = dict()
         self.device_computations = dict()
         self.device_initializations = dict()
+        self.profiler = Profiler()
 
     @property
     def use_exop(self):
@@ -220,11 +459,20 @@ class ExecutionGraphTransformer(Transformer):
         return True
 
     def run_registered_graph_passes(self, computation_decl, **kwargs):
+        """
+        Runs the registered graph passes on the execution graph of a computation.
+
+        Returns:
+            A list with the report of each pass.
+        """
         op_accessor = ExOpGraphOpAccessor()
+        pass_reports = []
         for graph_pass in self.graph_passes:
-            graph_pass.wrapped_do_pass(op_accessor=op_accessor,
-                                       computation_decl=computation_decl,
-                                       **kwargs)
+            pass_reports.append(graph_pass.wrapped_do_pass(report=True,
+                                                           op_accessor=op_accessor,
+                                                           computation_decl=computation_decl,
+                                                           **kwargs))
+        return pass_reports
 
     @abc.abstractmethod
     def make_device_tensor(self, computation, tensor_decl):
@@ -258,10 +506,26 @@ class ExecutionGraphTransformer(Transformer):
         """
         if isinstance(op, AssignableTensorOp):
             tensor_decl = self.execution_state.get_op_tensor(op)
-            return self.device_tensor_view(tensor_decl.values[0].tensor_view_decl)
+            if tensor_decl is None:
+                raise ValueError("{} is not used by any computation".format(op.name))
+            return self.device_tensor_view(tensor_decl.root_tensor_view_decl)
         else:
             raise ValueError()
 
+    def has_tensor_view(self, op):
+        """
+        Returns true if op has storage in this transformer.
+
+        Args:
+            op: A computation graph op.
+
+        Returns:
+            True if op is used by a computation of this transformer.
+
+        """
+        return isinstance(op, AssignableTensorOp) and \
+            self.execution_state.get_op_tensor(op) is not None
+
     def get_tensor_view_value(self, op, host_tensor=None):
         """
         Returns the contents of the tensor view for op.
@@ -276,6 +540,20 @@ class ExecutionGraphTransformer(Transformer):
         """
         return self.get_op_tensor_view(op).get(host_tensor)
 
+    def set_tensor_view_value(self, op, value):
+        """
+        Copies a value into the tensor view for op, without running a computation.
+
+        The storage for op must already be allocated, i.e. op must be used by a
+        computation of this transformer and the transformer must be initialized.
+
+        Args:
+            op: The computation graph op.
+            value: A NumPy tensor with the elements for op.
+
+        """
+        self.get_op_tensor_view(op)[()] = value
+
     def load_computation(self, computation_decl):
         """
         Load a computation and associated storage into the current execution state.
@@ -432,6 +710,22 @@ class ExecutionGraphTransformer(Transformer):
 
         return device_tensor.get(tensor)
 
+    def bucketed_computation(self, buckets, results, *parameters, **kwargs):
+        """
+        Adds a computation that is compiled once for every bucket of axis lengths.
+
+        Arguments:
+            buckets: A dict mapping each bucketed Axis, e.g. the batch axis, to the
+                lengths to compile for.
+            results: Values to be computed.
+            *parameters: Values to be set as arguments to evaluate.
+            pad_value: The value used to pad arguments up to the bucket lengths.
+
+        Returns:
+            A BucketedComputation.
+        """
+        return BucketedComputation(self, computation(results, *parameters), buckets, **kwargs)
+
     computation_count = 0
 
     def add_computation(self, computation_op):
@@ -449,9 +743,12 @@ class ExecutionGraphTransformer(Transformer):
         if device_computation is not None:
             return device_computation
 
+        start = monotonic()
         execution_graph = self.execution_state.make_execution_graph(computation_op)
         computation_decl = execution_graph.computation_decl
-        self.run_registered_graph_passes(computation_decl=computation_decl)
+        pass_start = monotonic()
+        pass_reports = self.run_registered_graph_passes(computation_decl=computation_decl)
+        load_start = monotonic()
         ExecutionGraphTransformer.computation_count += 1
 
         device_computation = self.make_computation(computation_op)
@@ -461,4 +758,12 @@ class ExecutionGraphTransformer(Transformer):
 
         device_computation.executor = self.load_computation(computation_decl)
 
+        end = monotonic()
+        compile_report = device_computation.compile_report
+        compile_report['passes'] = pass_reports
+        compile_report['execution_graph_time'] = pass_start - start
+        compile_report['pass_time'] = load_start - pass_start
+        compile_report['load_time'] = end - load_start
+        compile_report['compile_time'] = end - start
+        compile_report['exops'] = sum(1 for _ in computation_decl.exop_block)
         return device_computation
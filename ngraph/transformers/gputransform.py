@@ -49,6 +49,7 @@ from ngraph.op_graph.ctc import CTCOp
 from ngraph.util.generics import generic_method
 
 from ngraph.transformers.passes.passes import SimplePrune
+from ngraph.transformers.passes.constantfolding import ConstantFolding
 from ngraph.transformers.passes.gpusimplification import GPUSubstitution
 from ngraph.transformers.passes.layout import GenerateLayoutDomains, GenerateLayoutConstraints, \
     AssignLayouts, AddLayoutConversions, PruneContiguousPass
@@ -1056,7 +1057,8 @@ class GPUTransformer(ComputationGraphTransformer):
         layout_constraints_pass = GenerateLayoutConstraints(self)
         layout_assign_pass = AssignLayouts(layout_domain_pass, layout_constraints_pass)
         layout_convert_pass = AddLayoutConversions(layout_assign_pass)
-        self.graph_passes = [SimplePrune(), PruneContiguousPass(), GPUSubstitution(),
+        self.graph_passes = [SimplePrune(), ConstantFolding(), PruneContiguousPass(),
+                             GPUSubstitution(),
                              layout_domain_pass, layout_constraints_pass, layout_assign_pass,
                              layout_convert_pass]  # , VizPass(show_metadata="layout")]
 
@@ -1075,6 +1077,7 @@ class GPUTransformer(ComputationGraphTransformer):
             self.runtime = GPURuntime(device_id=self.device_id)
 
     def close(self):
+        self.close_stagers()
         if self.runtime is None:
             return
         # Free the pool buffers
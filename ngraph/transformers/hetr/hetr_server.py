@@ -23,6 +23,7 @@ class HetrServer(hetr_pb2_grpc.HetrServicer):
         self.comp_id_ctr = 0
         self.comm = comm
         self.server = server
+        self.transformer = None
 
     def new_comp_id(self):
         c_id = self.comp_id_ctr
@@ -34,6 +35,11 @@ class HetrServer(hetr_pb2_grpc.HetrServicer):
             return hetr_pb2.BuildReply(status=False)
 
         try:
+            # A new client resets the server, e.g. when it is leased from a HetrWorkerPool
+            if self.transformer is not None:
+                self.transformer.close()
+                self.computations.clear()
+                self.results.clear()
             self.transformer = build_transformer(name=request.transformer_type, comm=self.comm)
             return hetr_pb2.BuildReply(status=True)
         except:
@@ -13,16 +13,30 @@
 # limitations under the License.
 # ----------------------------------------------------------------------------
 from __future__ import division
+from ngraph.op_graph.axes import Axis, Axes
 from ngraph.op_graph.comm_nodes import calculate_scatter_axes
 from ngraph.op_graph.op_graph import Op, DotOp, TensorValueOp
 from ngraph.op_graph.comm_nodes import GatherSendOp, RecvOp, ScatterRecvOp, CPUQueueRecvOp, \
     GPUQueueRecvOp, CPUQueueSendOp, AllReduceOp, BroadcastRecvOp
 from orderedset import OrderedSet
-from ngraph.op_graph.serde.serde import serialize_graph, deserialize_graph
+from ngraph.op_graph.serde.serde import copy_graph, is_serialized_attribute, \
+    IGNORED_ATTRIBUTES, HETR_METADATA
+from six import iteritems, string_types
 
-import uuid
 import collections
+import io
+import multiprocessing.queues
+import numbers
 import os
+import pickle
+import numpy as np
+
+
+# Metadata that only places an op on a device, which differs between replicas
+PLACEMENT_METADATA = ('device', 'device_id', 'transformer', 'host_transformer')
+
+# Attributes that select the shared queue of a replica when a communication op runs
+REPLICA_ATTRIBUTES = ('idx',)
 
 
 def get_iterable(x):
@@ -74,6 +88,22 @@ def find_recvs(fro):
     return recvs
 
 
+def find_sends(ops, send_nodes):
+    # Find the Senders in send_nodes that ops depend on, also through Receivers
+    visit = OrderedSet(ops)
+    visited = set()
+    while visit:
+        v = visit.pop()
+        if v in visited:
+            continue
+        visited.add(v)
+        if isinstance(v, RecvOp):
+            visit |= get_iterable(v.send_node())
+        visit.update(v.all_deps)
+
+    return OrderedSet(op for op in send_nodes if op in visited)
+
+
 def update_comm_deps(ops):
     """
     Sort the subgraphs identified by ops using communication dependencies.
@@ -121,17 +151,16 @@ def update_comm_deps(ops):
 
 def clone_graph(root, clone_id, shared_queues_idx, parallel_axis, num_clones):
     """
-    clone graph with serde (serialization)
+    clone graph with a structural copy of the ops root depends on
     input:
     output: new_root of the cloned graph
     """
-    # clone nodes with GatherSendOp as root using serde
-    ser_cloned_nodes = deserialize_graph(serialize_graph([root]))
-    new_root = next((o for o in ser_cloned_nodes if o.uuid == root.uuid), None)
+    # clone nodes with GatherSendOp as root, mapping each clone back to its original
+    clones = copy_graph([root])
+    new_root = clones[root]
+    orig_ops = {clone: op for op, clone in iteritems(clones)}
 
-    orig_ops = {op.uuid: op for op in Op.ordered_ops([root])}
-    # Prune ops that are not control_deps of new_gather_send_op
-    # deserialize includes extra referenced nodes
+    # Ops that are only referenced, such as the senders of receivers, are not cloned
     cloned_graph = Op.ordered_ops([new_root])
 
     new_send_nodes = OrderedSet()
@@ -139,24 +168,24 @@ def clone_graph(root, clone_id, shared_queues_idx, parallel_axis, num_clones):
 
     # update newly cloned op metadata, generate new UUIDs
     for op in cloned_graph:
-        cloned_ops = orig_ops[op.uuid].metadata.get('clones')
+        cloned_ops = orig_ops[op].metadata.get('clones')
         if cloned_ops is None or cloned_ops.get(str(clone_id)) is None:
             op.metadata['transformer'] = op.metadata['device'] + str(clone_id)
             op.metadata['device_id'] = str(clone_id)
 
             if isinstance(op, (ScatterRecvOp, GatherSendOp, AllReduceOp, BroadcastRecvOp)):
-                op._shared_queues = orig_ops[op.uuid]._shared_queues
+                op._shared_queues = orig_ops[op]._shared_queues
                 op.idx = shared_queues_idx
                 if isinstance(op, (ScatterRecvOp, BroadcastRecvOp)):
-                    op._send_node = orig_ops[op.uuid].send_node()
+                    op._send_node = orig_ops[op].send_node()
             elif isinstance(op, (CPUQueueRecvOp, GPUQueueRecvOp)):
                 # Cloning a recv node means we need a broadcast, so simulate one by adding an
                 # additional sender with the same input data as the original sender.
-                send_op = CPUQueueSendOp(orig_ops[op.uuid].send_node().args[0])
+                send_op = CPUQueueSendOp(orig_ops[op].send_node().args[0])
                 op._queue = send_op.queue
                 op._send_node = send_op
                 new_send_nodes.add(send_op)
-                replaced_send_nodes.add(orig_ops[op.uuid].send_node())
+                replaced_send_nodes.add(orig_ops[op].send_node())
             if hasattr(op, '_axes') and parallel_axis in op._axes:
                 op._axes = calculate_scatter_axes(op.axes, parallel_axis, num_clones)
                 # TODO: Revisit to handle axes updation better. Github Ticket #1355
@@ -179,27 +208,183 @@ def clone_graph(root, clone_id, shared_queues_idx, parallel_axis, num_clones):
 
             args_list = list(op.args)
             for arg_idx, arg_op in enumerate(args_list):
-                if arg_op.uuid in orig_ops.keys():
-                    if orig_ops[arg_op.uuid].metadata.get('clones') and \
-                       orig_ops[arg_op.uuid].metadata['clones'].get(str(clone_id)):
+                if arg_op in orig_ops:
+                    if orig_ops[arg_op].metadata.get('clones') and \
+                       orig_ops[arg_op].metadata['clones'].get(str(clone_id)):
                         args_list[arg_idx] = \
-                            orig_ops[arg_op.uuid].metadata['clones'].get(str(clone_id))
+                            orig_ops[arg_op].metadata['clones'].get(str(clone_id))
             op.invalidate_property_cache('all_deps')
             op._args = tuple(args_list)
             if op != new_root:
-                if orig_ops[op.uuid].metadata.get('clones') is None:
-                    orig_ops[op.uuid].metadata['clones'] = dict()
-                    orig_ops[op.uuid].metadata['clones'][str(clone_id)] = op
+                if orig_ops[op].metadata.get('clones') is None:
+                    orig_ops[op].metadata['clones'] = dict()
+                    orig_ops[op].metadata['clones'][str(clone_id)] = op
                 else:
-                    orig_ops[op.uuid].metadata['clones'][str(clone_id)] = op
-
-            op.uuid = uuid.uuid4()
+                    orig_ops[op].metadata['clones'][str(clone_id)] = op
 
     return new_root, new_send_nodes, replaced_send_nodes
 
 
+class _GraphPickler(pickle.Pickler):
+    def __init__(self, file, shared_queue, shipped_ops):
+        pickle.Pickler.__init__(self, file, pickle.HIGHEST_PROTOCOL)
+        self.shared_queue = shared_queue
+        self.shipped_ops = shipped_ops
+
+    def persistent_id(self, obj):
+        if isinstance(obj, multiprocessing.queues.Queue):
+            return 'queue', self.shared_queue(obj)
+        if isinstance(obj, Op) and obj.uuid in self.shipped_ops:
+            return 'op', obj.uuid
+        return None
+
+
+class _GraphUnpickler(pickle.Unpickler):
+    def __init__(self, file, shipped_ops):
+        pickle.Unpickler.__init__(self, file)
+        self.shipped_ops = shipped_ops
+
+    def persistent_load(self, pid):
+        kind, value = pid
+        if kind == 'op':
+            return self.shipped_ops[value]
+        return value
+
+
+def dumps_computation(returns, placeholders, shared_queue, shipped_ops):
+    """
+    Pickles the ops of a computation for a process that is already running.
+
+    A multiprocessing.Queue can only reach a process by being inherited when it is
+    forked, so the queues of the communication ops are replaced by the queues that
+    shared_queue returns for them, e.g. the queues of a Manager. Ops that were pickled
+    for an earlier computation are only referred to, so that computations keep sharing
+    their variables in the other process.
+
+    Arguments:
+        returns: The returns of the computation.
+        placeholders: The placeholders of the computation.
+        shared_queue: A function from a multiprocessing.Queue to the queue to use instead.
+        shipped_ops: The ops pickled so far for the process, by uuid. Updated with the
+            ops of this computation.
+
+    Returns:
+        The pickled ops.
+    """
+    returns, placeholders = list(returns), list(placeholders)
+    ops = [op for op in Op.all_op_references(returns + placeholders)
+           if op.uuid not in shipped_ops]
+    data = io.BytesIO()
+    _GraphPickler(data, shared_queue, shipped_ops).dump((returns, placeholders, ops))
+    shipped_ops.update((op.uuid, op) for op in ops)
+    return data.getvalue()
+
+
+def loads_computation(data, shipped_ops):
+    """
+    Unpickles the ops of a computation pickled by dumps_computation.
+
+    The names of the ops were made unique in the process that pickled them, so they are
+    made unique again among the names of this process.
+
+    Arguments:
+        data: The pickled ops.
+        shipped_ops: The ops unpickled so far in this process, by uuid. Updated with the
+            ops of this computation.
+
+    Returns:
+        The returns and the placeholders of the computation.
+    """
+    returns, placeholders, ops = _GraphUnpickler(io.BytesIO(data), shipped_ops).load()
+    for op in ops:
+        op.name = op.name
+        shipped_ops[op.uuid] = op
+    return returns, placeholders
+
+
 def get_available_ports():
     if "HETR_SERVER_PORTS" in os.environ:
         return os.getenv("HETR_SERVER_PORTS")
     else:
         return ['52051', '52052', '52053', '52054', '52055', '52056', '52057', '52058']
+
+
+def _op_attributes(op):
+    for key in sorted(op.__dict__):
+        if key in IGNORED_ATTRIBUTES or key in REPLICA_ATTRIBUTES \
+                or key in ('_args', '_control_deps') or not is_serialized_attribute(key):
+            continue
+        yield key, op.__dict__[key]
+
+
+def _attribute_ops(val):
+    if isinstance(val, Op):
+        yield val
+    elif isinstance(val, (list, tuple, set, OrderedSet)):
+        for item in val:
+            if isinstance(item, Op):
+                yield item
+
+
+def _describe(val, index):
+    if isinstance(val, Op):
+        return 'op', index[val]
+    if isinstance(val, Axis):
+        return 'axis', val.name, val.length
+    if isinstance(val, np.dtype):
+        return 'dtype', val.str
+    if isinstance(val, Axes):
+        return ('axes',) + tuple(_describe(axis, index) for axis in val)
+    if isinstance(val, (list, tuple, OrderedSet)):
+        return (type(val).__name__,) + tuple(_describe(item, index) for item in val)
+    if isinstance(val, (set, frozenset)):
+        return ('set',) + tuple(sorted((_describe(item, index) for item in val), key=repr))
+    if isinstance(val, dict):
+        return ('dict',) + tuple(sorted(((repr(key), _describe(item, index))
+                                         for key, item in iteritems(val)), key=repr))
+    if val is None or isinstance(val, (bool, numbers.Number, string_types, bytes)):
+        return val
+    # Anything else, e.g. the initial value of a variable, is only equal to itself, which
+    # holds for the replicas made by clone_graph since they share these values.
+    return 'object', id(val)
+
+
+def replica_signature(ops):
+    """
+    Describes the graph of ops as it is compiled, leaving out what differs between the
+    data parallel replicas made by clone_graph: the device the ops are placed on and the
+    index of the replica in the shared queues of the communication ops.
+
+    Arguments:
+        ops: The returns and placeholders of a computation of a child transformer.
+
+    Returns:
+        The description, which is equal for graphs that can be run by the same compiled
+        computation, and the ops of the graph in the order they are described.
+    """
+    ordered = []
+    index = dict()
+    stack = list(reversed(ops))
+    while stack:
+        op = stack.pop()
+        if op in index:
+            continue
+        index[op] = len(ordered)
+        ordered.append(op)
+        refs = list(op.args) + list(op.control_deps)
+        for key, val in _op_attributes(op):
+            refs.extend(_attribute_ops(val))
+        stack.extend(reversed(refs))
+
+    description = [tuple(index[op] for op in ops)]
+    for op in ordered:
+        metadata = {key: val for key, val in iteritems(op.metadata)
+                    if key not in PLACEMENT_METADATA and key not in HETR_METADATA}
+        description.append((type(op),
+                            _describe(getattr(op, 'dtype', None), index),
+                            tuple(index[arg] for arg in op.args),
+                            tuple(index[dep] for dep in op.control_deps),
+                            tuple((key, _describe(val, index))
+                                  for key, val in _op_attributes(op)),
+                            _describe(metadata, index)))
+    return tuple(description), ordered
@@ -3,16 +3,69 @@ import subprocess
 import time
 
 
-STARTUP_TIME = 1.0
+STARTUP_TIMEOUT = 60.0
+SHUTDOWN_TIMEOUT = 1.0
+POLL_INTERVAL = 0.05
+
+
+def wait_for_servers(ports, timeout=STARTUP_TIMEOUT, proc=None):
+    """
+    Blocks until a gRPC connection to the hetr server on each port succeeds.
+
+    Arguments:
+        ports: The ports of the servers on localhost.
+        timeout (float): The number of seconds to wait for all servers.
+        proc: The process running the servers; waiting stops if it exits.
+
+    Raises:
+        RuntimeError: If a server is not ready before timeout or proc exits.
+    """
+    import grpc
+    deadline = time.time() + timeout
+    for port in ports:
+        channel = grpc.insecure_channel('localhost:' + port)
+        ready = grpc.channel_ready_future(channel)
+        try:
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise RuntimeError("hetr server on port %s not ready after %s seconds"
+                                       % (port, timeout))
+                try:
+                    ready.result(timeout=min(POLL_INTERVAL, remaining))
+                    break
+                except grpc.FutureTimeoutError:
+                    pass
+                if proc is not None and proc.poll() is not None:
+                    raise RuntimeError("hetr servers exited with code %s before port %s "
+                                       "was ready" % (proc.returncode, port))
+        finally:
+            ready.cancel()
+            channel.close()
+
+
+def wait_for_exit(proc, timeout):
+    """
+    Returns:
+        True if proc exits within timeout seconds.
+    """
+    deadline = time.time() + timeout
+    while proc.poll() is None:
+        if time.time() >= deadline:
+            return False
+        time.sleep(POLL_INTERVAL)
+    return True
 
 
 class Launcher(object):
     """
     execute mpirun cmd
+    wait until the servers accept connections
     close process for mpirun
     """
-    def __init__(self, ports):
+    def __init__(self, ports, timeout=STARTUP_TIMEOUT):
         self.port_list = ports
+        self.timeout = timeout
         self.mpirun_proc = None
 
     def launch(self):
@@ -35,14 +88,18 @@ class Launcher(object):
                    '-p'] + self.port_list
             try:
                 self.mpirun_proc = subprocess.Popen(cmd)
-                time.sleep(STARTUP_TIME)
             except:
                 raise RuntimeError("Process launch failed!")
+            try:
+                wait_for_servers(self.port_list[:int(hetr_server_gpu_num)],
+                                 self.timeout, self.mpirun_proc)
+            except RuntimeError:
+                self.close()
+                raise
 
     def close(self):
         if self.mpirun_proc:
             self.mpirun_proc.terminate()
-            time.sleep(STARTUP_TIME)
-            if self.mpirun_proc:
+            if not wait_for_exit(self.mpirun_proc, SHUTDOWN_TIMEOUT):
                 self.mpirun_proc.kill()
                 self.mpirun_proc.wait()
@@ -0,0 +1,110 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Gradient accumulation for micro-batch pipelines of hetr model parallel graphs.
+
+Typical use, with a graph built for one micro-batch::
+
+    accumulator = GradientAccumulator(cost)
+    updates = accumulator.update(lambda variable, grad: ng.assign(variable,
+                                                                  variable - lr * grad))
+    train = hetr.pipeline_computation(N, [cost] + accumulator.accumulate, x, t,
+                                      update=updates)
+    cost_per_step, _ = train(whole_batch_x, whole_batch_t)
+"""
+import collections
+
+import ngraph as ng
+
+
+# The metadata placing an op on a hetr device
+PLACEMENT_METADATA = ('device', 'device_id')
+
+
+def placement(op):
+    """
+    Returns:
+        The metadata placing op on its device, to be used with ng.metadata.
+    """
+    return {key: op.metadata[key] for key in PLACEMENT_METADATA if key in op.metadata}
+
+
+class GradientAccumulator(object):
+    """
+    Sums the gradients of the cost of each micro-batch of a step, so that the variables are
+    updated once per step.
+
+    The gradient of each variable is computed and accumulated on the device of the
+    variable. The ops of each device are kept in separate ops, since the hetr passes give
+    an op and the ops it controls to one device.
+
+    Arguments:
+        cost: The scalar cost of a micro-batch.
+        variables: The variables to train. If None, all trainable variables of cost.
+
+    Attributes:
+        accumulate: A list with an op for each device, which adds the gradients of a
+            micro-batch to the accumulators.
+        gradients: The accumulator of each variable, which holds the sum of the gradients
+            of the micro-batches, i.e. the gradient of the cost of the whole batch.
+    """
+    def __init__(self, cost, variables=None):
+        if variables is None:
+            variables = [variable for variable in cost.variables() if variable.is_trainable]
+        self.variables = list(variables)
+        self.gradients = collections.OrderedDict()
+
+        accumulate = collections.OrderedDict()
+        for variable in self.variables:
+            with ng.metadata(**placement(variable)):
+                gradient = ng.persistent_tensor(axes=variable.axes, initial_value=0.) \
+                    .named(variable.name + '_grad')
+                self.gradients[variable] = gradient
+                accumulate.setdefault(self._device(variable), []).append(
+                    ng.assign(gradient, gradient + ng.deriv(cost, variable)))
+        self.accumulate = self._doall(accumulate)
+
+    @staticmethod
+    def _device(op):
+        return tuple(sorted(placement(op).items()))
+
+    @staticmethod
+    def _doall(device_ops):
+        ops = []
+        for device, device_op_list in device_ops.items():
+            with ng.metadata(**dict(device)):
+                ops.append(ng.doall(device_op_list))
+        return ops
+
+    def update(self, variable_update):
+        """
+        Makes the update of a step.
+
+        Arguments:
+            variable_update: A function of a variable and its accumulated gradient that
+                returns the op updating the variable, e.g. a plain gradient descent step or
+                the variable_update of an optimizer.
+
+        Returns:
+            A list with an op for each device, which updates the variables and clears the
+            accumulators for the next step.
+        """
+        updates = collections.OrderedDict()
+        for variable, gradient in self.gradients.items():
+            with ng.metadata(**placement(variable)):
+                updates.setdefault(self._device(variable), []).append(
+                    ng.sequential([variable_update(variable, gradient),
+                                   ng.assign(gradient, 0.)]))
+        return self._doall(updates)
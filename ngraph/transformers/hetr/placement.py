@@ -0,0 +1,185 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+Automatic placement of ops on hetr devices with a cost model.
+
+The ops are placed one at a time in topological order on the device where they would
+finish first, counting the time to receive their arguments from other devices, as long
+as the device stays under its memory cap.
+"""
+from __future__ import division
+
+from ngraph.op_graph.op_graph import Op, DotOp, ParallelOp, SequentialOp
+from ngraph.op_graph.convolution import ConvolutionOp, DeconvolutionOp, ConvDerivOp
+
+
+class CostModel(object):
+    """
+    Estimates the time an op takes on a device and the time its value takes to reach
+    another device, from the axes and dtypes of the ops.
+
+    Arguments:
+        flops (float): The floating point operations per second of a device.
+        bandwidth (float): The bytes per second sent between two devices.
+        latency (float): The seconds to send a value, whatever its size.
+    """
+    def __init__(self, flops=1e10, bandwidth=1e9, latency=1e-4):
+        self.flops = flops
+        self.bandwidth = bandwidth
+        self.latency = latency
+
+    @staticmethod
+    def size(op):
+        return op.axes.size if op.is_tensor_op else 0
+
+    def nbytes(self, op):
+        """
+        Returns:
+            The bytes of the value of op.
+        """
+        if not op.is_tensor_op:
+            return 0
+        return self.size(op) * op.dtype.itemsize
+
+    def op_flops(self, op):
+        """
+        Returns:
+            The floating point operations to compute op.
+        """
+        if isinstance(op, ConvDerivOp):
+            op = op.fprop.forwarded
+        if isinstance(op, (ConvolutionOp, DeconvolutionOp)):
+            filters = op.args[1]
+            return 2 * self.size(op) * filters.axes.size // filters.axes[-1].length
+        if isinstance(op, DotOp):
+            return 2 * max(self.size(op), 1) * op.reduction_axes.size
+        if not op.is_device_op or op.is_state_op:
+            return 0
+        return max([self.size(op)] + [self.size(arg) for arg in op.args])
+
+    def compute_time(self, op):
+        return self.op_flops(op) / self.flops
+
+    def transfer_time(self, op):
+        return self.latency + self.nbytes(op) / self.bandwidth
+
+
+def placement_groups(ops):
+    """
+    Groups the ops that have to be on the same device: an op and the states it reads or
+    writes, and a control op such as a doall or a sequential and the ops it controls.
+
+    Returns:
+        A dict from each op, and each state of the ops, to the list of ops of its group.
+    """
+    group = {op: [op] for op in ops}
+
+    def merge(op, other):
+        group.setdefault(other, [other])
+        if group[op] is group[other]:
+            return
+        merged = group[op] + group[other]
+        for member in merged:
+            group[member] = merged
+
+    for op in ops:
+        for state in op.states_read | op.states_written:
+            merge(op, state.forwarded)
+        if isinstance(op, (ParallelOp, SequentialOp)):
+            for dep in op.all_deps:
+                merge(op, dep.forwarded)
+    return group
+
+
+def place(ops, device_ids, cost_model=None, memory_cap=None):
+    """
+    Chooses a device for each op without a device_id.
+
+    Arguments:
+        ops: The ops of the graph.
+        device_ids: The device ids to place the ops on.
+        cost_model: A CostModel, or None for the default one.
+        memory_cap: The bytes each device can hold, or None if unlimited. The values of
+            all the ops of a device are counted, as if none of them shared memory.
+
+    Returns:
+        A dict from each op without a device_id to its device_id.
+    """
+    if cost_model is None:
+        cost_model = CostModel()
+    device_ids = list(device_ids)
+    ops = Op.ordered_ops(ops)
+    group = placement_groups(ops)
+
+    device = dict()
+    for op in group:
+        device_id = op.metadata.get('device_id')
+        if isinstance(device_id, (list, tuple)):
+            device_id = device_id[0] if len(device_id) == 1 else None
+        if device_id is not None:
+            device[op] = device_id
+        elif 'device_id' in op.metadata:
+            device[op] = None
+    pinned = set(device)
+
+    ready = {device_id: 0. for device_id in device_ids}
+    memory = {device_id: 0 for device_id in device_ids}
+    finish = dict()
+
+    def start_time(op, device_id):
+        # ops without compute, such as reading a state, do not wait for the device
+        start = ready.get(device_id, 0.) if cost_model.op_flops(op) else 0.
+        for arg in op.args:
+            arg = arg.forwarded
+            arrival = finish.get(arg, 0.)
+            if device.get(arg) != device_id:
+                arrival += cost_model.transfer_time(arg)
+            start = max(start, arrival)
+        return start
+
+    placement = dict()
+    for op in ops:
+        if op not in device:
+            members = [member for member in group[op] if member not in pinned]
+            group_bytes = sum(cost_model.nbytes(member) for member in members)
+            group_time = sum(cost_model.compute_time(member) for member in members)
+            # a group with a placed op stays on its device
+            placed = [device[member] for member in group[op]
+                      if device.get(member) is not None]
+            best = None
+            for device_id in placed[:1] or device_ids:
+                if memory_cap is not None and \
+                        memory.get(device_id, 0) + group_bytes > memory_cap:
+                    continue
+                estimate = start_time(op, device_id) + group_time
+                if best is None or estimate < best[0]:
+                    best = estimate, device_id
+            if best is None:
+                raise ValueError("{} and the ops on its device need {} bytes, more than the "
+                                 "memory cap of {} bytes left on the devices"
+                                 .format(op.name, group_bytes, memory_cap))
+            for member in members:
+                device[member] = best[1]
+                placement[member] = best[1]
+            if best[1] in memory:
+                memory[best[1]] += group_bytes
+        elif op in pinned and device[op] in memory:
+            memory[device[op]] += cost_model.nbytes(op)
+
+        device_id = device[op]
+        finish[op] = start_time(op, device_id) + cost_model.compute_time(op)
+        if device_id in ready:
+            ready[device_id] = max(ready[device_id], finish[op])
+    return placement
@@ -12,13 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
+import atexit
 import collections
 import os
+import pickle
 import signal
 import sys
-import time
+import weakref
 from multiprocessing import Process, Manager, Event
 
+import numpy as np
 from orderedset import OrderedSet
 from queue import Empty
 from six import itervalues, iteritems
@@ -31,10 +34,13 @@ from ngraph.transformers.base import PYCUDA_LOGIC_ERROR_CODE
 from ngraph.transformers.base import make_transformer_factory
 from ngraph.transformers.hetr.mpilauncher import Launcher
 from ngraph.transformers.hetr.hetr_utils import get_available_ports
-from ngraph.transformers.hetr.hetr_utils import update_comm_deps
+from ngraph.transformers.hetr.hetr_utils import update_comm_deps, replica_signature, \
+    find_sends, dumps_computation, loads_computation
 from ngraph.transformers.passes.hetrpasses import CommunicationPass
 from ngraph.transformers.passes.hetrpasses import DeviceAssignPass
+from ngraph.transformers.passes.hetrpasses import AutoPlacementPass
 from ngraph.transformers.passes.hetrpasses import DistributedPass
+from ngraph.transformers.staging import StagedInputs
 
 
 def build_transformer(name, comm=None):
@@ -58,23 +64,66 @@ def build_transformer(name, comm=None):
     return transformer
 
 
+def device_type(tname):
+    """
+    Returns:
+        The device type of child transformer tname, e.g. 'cpu' for 'cpu1'.
+    """
+    return tname.rstrip('0123456789')
+
+
+# The lists of a device computation that hold its communication ops
+COMMUNICATION_NODES = ('send_nodes', 'recv_nodes', 'scatter_send_nodes', 'scatter_recv_nodes',
+                       'gather_send_nodes', 'gather_recv_nodes', 'allreduce_nodes',
+                       'broadcast_send_nodes', 'broadcast_recv_nodes')
+
+
 class AsyncTransformer(Process):
+    """
+    Runs the computations of a child transformer in a separate process.
+
+    The process blocks on its work queue, so a step starts as soon as it is fed. Steps
+    are queued, so the next step can be fed while one is running; the results of each
+    computation come back in the order its steps were fed.
+
+    The process is normally started on the first feed and gets its computations by being
+    forked. A HetrWorkerPool starts it ahead of time instead and keeps it between
+    HetrTransformers; the computations of a started process are pickled to it with
+    dumps_computation, and reset drops them when the process is leased again.
+
+    Arguments:
+        transformer_type: The name of the child transformer, e.g. 'cpu0'.
+        manager: The Manager holding the queues. If None, the AsyncTransformer starts
+            its own Manager and shuts it down on close.
+        shared_queue: For a started process, a function from each multiprocessing.Queue
+            of the communication ops to a queue of manager that replaces it.
+    """
 
+    # How often a caller waiting for results checks that the process is alive
     SLEEP_S = 0.2
 
-    def __init__(self, transformer_type):
+    def __init__(self, transformer_type, manager=None, shared_queue=None):
         super(AsyncTransformer, self).__init__()
         self.transformer_type = transformer_type
         self.init_id = id(self)
 
-        self.manager = Manager()
+        self.owns_manager = manager is None
+        self.manager = Manager() if manager is None else manager
+        self.shared_queue = shared_queue
         self.computation_q = self.manager.Queue()
         self.work_q = self.manager.Queue()
         self.results_qs = dict()
         self.computations = dict()
         self.computation_builds = dict()
+        # The ops pickled to a started process, by uuid
+        self.shipped_ops = dict()
         self.comp_id_ctr = 0
 
+        # Set by HetrTransformer.compile_replicas when the computations are compiled before
+        # the process is started
+        self.transformer = None
+        self.replica_ops = None
+
         self.started = False
         self.exit = Event()
         self.daemon = True
@@ -92,6 +141,9 @@ class AsyncTransformer(Process):
         # instead, return a lightweight computation wrapper that can be used later.
         class AsyncComputation(object):
 
+            # feed_input can be called again before get_results
+            pipelined = True
+
             def __init__(self, async_transformer):
                 self.async_transformer = async_transformer
                 self.comp_id = self.async_transformer.new_comp_id()
@@ -133,9 +185,29 @@ class AsyncTransformer(Process):
         c = AsyncComputation(self)
         self.results_qs[c.comp_id] = self.manager.Queue()
         self.computation_builds[c.comp_id] = (returns, placeholders)
-        self.computation_q.put(c.comp_id)
+        if self.started:
+            # The process can not inherit the computation anymore. The results queue is
+            # pickled too, since the Manager can not unpickle proxies of its own queues.
+            self.work_q.put(('build', c.comp_id,
+                             dumps_computation(returns, placeholders, self.shared_queue,
+                                               self.shipped_ops),
+                             pickle.dumps(self.results_qs[c.comp_id])))
+        else:
+            self.computation_q.put(c.comp_id)
         return c
 
+    def reset(self):
+        """
+        Drops the computations and has the process build a new transformer, so that it
+        can run the computations of another HetrTransformer.
+        """
+        if self.started:
+            self.work_q.put('reset')
+        self.computations.clear()
+        self.computation_builds.clear()
+        self.results_qs.clear()
+        self.shipped_ops.clear()
+
     def close(self):
         if self.my_pid != os.getpid():
             # Forked into another process
@@ -145,52 +217,84 @@ class AsyncTransformer(Process):
         if self.started:
             self.started = False
             self.exit.set()
+            self.work_q.put(None)
             self.join()
 
         # safe to call manager shutdown more than once
-        self.manager.shutdown()
-
-    def run(self):
-        # build the transformer first to catch any errors
-        transformer = build_transformer(self.transformer_type)
-
-        # collect requests to make computations, but do them all at once
-        while self.work_q.empty():
-            if self.exit.is_set():
-                return
-            time.sleep(AsyncTransformer.SLEEP_S)
+        if self.owns_manager:
+            self.manager.shutdown()
 
-        # build all the computations
-        while not self.computation_q.empty():
-            if self.exit.is_set():
-                return
-            # comp_wrapper objects useful for caller, but only map into
-            # real computation objects stored here:
-            comp_id = self.computation_q.get()
-            returns, placeholders = self.computation_builds[comp_id]
-            computation = transformer.computation(returns, *placeholders)
+    def adopt(self, transformer, computations, replica_ops=None):
+        """
+        Runs computations compiled by transformer instead of building a transformer when
+        the process starts.
 
-            self.computations[comp_id] = computation
+        Arguments:
+            transformer: The transformer that compiled computations.
+            computations: The compiled computation for each comp_id.
+            replica_ops: If computations were compiled for another replica, the op of this
+                replica for each communication op of the other replica.
+        """
+        assert not self.started, "computations must be adopted before the process starts"
+        self.transformer = transformer
+        self.computations.update(computations)
+        self.replica_ops = replica_ops
 
-        # begin doing work; trigger transformer init on first call
+    def run(self):
+        # build the transformer first to catch any errors
+        transformer = self.transformer
+        if transformer is None:
+            transformer = build_transformer(self.transformer_type)
+        if self.replica_ops is not None:
+            # the computations of another replica exchange data through its queues
+            for computation in itervalues(self.computations):
+                for name in COMMUNICATION_NODES:
+                    nodes = getattr(computation, name)
+                    nodes[:] = [self.replica_ops.get(op, op) for op in nodes]
+
+        # block until there is work; close() sends None to wake the worker up
+        shipped = []
         while not self.exit.is_set():
-            try:
-                # shared work q serializes work requests
-                comp_id, inputs = self.work_q.get(timeout=AsyncTransformer.SLEEP_S)
-
-                # actual computation objects stored in this process, indexed
-                computation = self.computations[comp_id]
-                outputs = computation(*inputs)
-
-                # individual results q makes it easy for caller to find results
-                self.results_qs[comp_id].put(outputs)
-
-            except Exception as e:
-                if isinstance(e, Empty):
-                    pass
-                else:
-                    # TODO : Issue #1796 handle and exit gracefully
-                    raise
+            work = self.work_q.get()
+            if work is None:
+                return
+            if work == 'reset':
+                transformer.close()
+                transformer = build_transformer(self.transformer_type)
+                self.computations.clear()
+                self.computation_builds.clear()
+                self.results_qs.clear()
+                self.shipped_ops.clear()
+                continue
+            if work[0] == 'build':
+                _, comp_id, build, results_q = work
+                self.computation_builds[comp_id] = loads_computation(build, self.shipped_ops)
+                self.results_qs[comp_id] = pickle.loads(results_q)
+                shipped.append(comp_id)
+                continue
+
+            # collect requests to make computations, but do them all at once before
+            # the first call, which triggers transformer init
+            while not self.computation_q.empty():
+                shipped.append(self.computation_q.get())
+            for comp_id in shipped:
+                # comp_wrapper objects useful for caller, but only map into
+                # real computation objects stored here:
+                if comp_id in self.computations:
+                    continue
+                returns, placeholders = self.computation_builds[comp_id]
+                self.computations[comp_id] = transformer.computation(returns, *placeholders)
+            del shipped[:]
+
+            # shared work q serializes work requests, several steps can be queued
+            comp_id, inputs = work
+
+            # actual computation objects stored in this process, indexed
+            computation = self.computations[comp_id]
+            outputs = computation(*inputs)
+
+            # individual results q makes it easy for caller to find results
+            self.results_qs[comp_id].put(outputs)
 
 
 class HetrComputation(Computation):
@@ -203,6 +307,8 @@ class HetrComputation(Computation):
         self.transformer = hetr
         self.send_nodes = hetr.send_nodes
         self.computation_op = computation_op
+        self.stager = None
+        self.pending = collections.deque()
 
         # self.returns could be replaced by comp_op.returns if it were expressed as a set
         self.returns = OrderedSet()
@@ -231,6 +337,10 @@ class HetrComputation(Computation):
             pass_ops = pass_ops | OrderedSet(hetr.send_nodes)
             graph_pass.do_pass(ops=pass_ops)
 
+        # the transformer keeps the send nodes of all its computations, only the ones
+        # the results of this computation depend on are run by its child computations
+        self.send_nodes = find_sends(new_returns, hetr.send_nodes)
+
         # hack around new TensorValueOp that wraps AssignableTensorOp
         # autogenerated by creating a ComputationOp:
         for p in self.computation_op.parameters:
@@ -266,13 +376,56 @@ class HetrComputation(Computation):
 
         :return: tuple of return values, one per return specified in __init__ returns list.
         """
-        args = self.unpack_args_or_feed_dict(args, kwargs)
-        for child in itervalues(self.child_computations):
-            child.feed_input([args[i] for i in child.param_idx])
+        return self.submit(*args, **kwargs).get()
 
-        return_vals = dict()
-        for child in itervalues(self.child_computations):
-            return_vals.update(child.get_results())
+    def submit(self, *args, **kwargs):
+        """
+        Feeds a step to the child computations without waiting for its results, so that
+        the next step can be fed while this one runs.
+
+        :arg args: list of values to the placeholders specified in __init__ *args
+
+        :return: a HetrStep whose get method returns what __call__ would return.
+        """
+        staged = args[0] if len(args) == 1 and isinstance(args[0], StagedInputs) else None
+        args = self.unpack_args_or_feed_dict(args, kwargs)
+        self.transformer.compile_replicas()
+        if self.pending and not all(getattr(child, 'pipelined', False)
+                                    for child in itervalues(self.child_computations)):
+            # Children that can only hold one step need the previous results collected
+            self.pending[-1].get()
+        step = HetrStep(self, staged)
+        self.pending.append(step)
+        try:
+            for child in itervalues(self.child_computations):
+                child.feed_input([args[i] for i in child.param_idx])
+        except Exception:
+            self.pending.remove(step)
+            if staged is not None:
+                staged.release()
+            raise
+        return step
+
+    def collect(self, step):
+        """
+        Collects the results of the steps fed up to step, in order.
+        """
+        while not step.done:
+            oldest = self.pending.popleft()
+            oldest.done = True
+            try:
+                return_vals = dict()
+                for child in itervalues(self.child_computations):
+                    return_vals.update(child.get_results())
+            finally:
+                # The inputs are sent to the children asynchronously, so staging buffers
+                # can only be reused once the results are back.
+                if oldest.staged is not None:
+                    oldest.staged.release()
+            oldest.results = self.unpack_results(return_vals)
+        return step.results
+
+    def unpack_results(self, return_vals):
         if isinstance(self.computation_op.returns, Op):
             return return_vals[self.computation_op.returns]
         elif isinstance(self.computation_op.returns, collections.Set):
@@ -283,6 +436,215 @@ class HetrComputation(Computation):
             return None
 
 
+class HetrStep(object):
+    """
+    A step fed to the child computations of a HetrComputation.
+
+    Arguments:
+        computation: The HetrComputation.
+        staged: The StagedInputs of the step, if any.
+    """
+    def __init__(self, computation, staged=None):
+        self.computation = computation
+        self.staged = staged
+        self.done = False
+        self.results = None
+
+    def get(self):
+        """
+        Waits for the step to finish.
+
+        Returns:
+            The results of the step, as returned by calling the computation.
+        """
+        return self.computation.collect(self)
+
+
+class PipelineComputation(object):
+    """
+    Runs each step as micro-batches pipelined across the devices of a HetrTransformer,
+    like GPipe.
+
+    The graph is built for one micro-batch. A step splits the arguments along the batch
+    axis and feeds all the micro-batches to the child transformers without waiting for
+    results, so a device that is done with its part of one micro-batch goes on with the
+    next one while the devices after it work on the earlier ones. Each device runs its
+    part of the micro-batches in order. Once all micro-batches are done, update runs once,
+    e.g. an update with the gradients summed by a GradientAccumulator.
+
+    Arguments:
+        transformer: The HetrTransformer.
+        batch_axis: The batch axis of the graph, which has the length of a micro-batch.
+        results: The results of each micro-batch, an Op or a sequence of Ops.
+        parameters: The placeholders, fed with whole batches on each call.
+        update: An Op or a sequence of Ops computed once per step after the micro-batches,
+            or None.
+
+    Returns:
+        For each result, the results of the micro-batches concatenated along the batch
+        axis, or summed if the result does not have the batch axis.
+    """
+    def __init__(self, transformer, batch_axis, results, parameters, update=None):
+        self.batch_axis = batch_axis
+        self.results = results
+        self.micro_batch = transformer.computation(results, *parameters)
+        self.update = None
+        if update is not None:
+            self.update = transformer.computation(update)
+        self.positions = [param.axes.index(batch_axis) if batch_axis in param.axes else None
+                          for param in parameters]
+
+    def micro_batch_args(self, args):
+        lengths = set(np.shape(arg)[pos] for arg, pos in zip(args, self.positions)
+                      if pos is not None)
+        if len(lengths) != 1:
+            raise ValueError("The arguments must have one batch length, found {}"
+                             .format(sorted(lengths)))
+        length = lengths.pop()
+        if length % self.batch_axis.length != 0:
+            raise ValueError("The batch length {} is not a multiple of the length {} of {}"
+                             .format(length, self.batch_axis.length, self.batch_axis))
+        for start in range(0, length, self.batch_axis.length):
+            batch = slice(start, start + self.batch_axis.length)
+            yield [arg if pos is None else np.asarray(arg)[(slice(None),) * pos + (batch,)]
+                   for arg, pos in zip(args, self.positions)]
+
+    def combine(self, result, values):
+        if not isinstance(result, Op) or not result.is_tensor_op:
+            return None
+        if self.batch_axis in result.axes:
+            return np.concatenate(values, axis=result.axes.index(self.batch_axis))
+        return sum(values[1:], values[0])
+
+    def __call__(self, *args):
+        steps = [self.micro_batch.submit(*micro_batch)
+                 for micro_batch in self.micro_batch_args(args)]
+        outputs = [step.get() for step in steps]
+        if self.update is not None:
+            self.update()
+
+        if isinstance(self.results, Op):
+            return self.combine(self.results, outputs)
+        return tuple(self.combine(result, [output[i] for output in outputs])
+                     for i, result in enumerate(self.results))
+
+
+class HetrWorkerPool(object):
+    """
+    Warm hetr workers that HetrTransformers lease instead of launching their own.
+
+    Workers are keyed by the name of their child transformer, e.g. 'cpu0' or 'gpu1',
+    which gives the device type and id, and can only be leased by one HetrTransformer
+    at a time.
+
+    CPU workers are AsyncTransformers whose process is started on their first lease and
+    kept until the pool is closed. Their computations are pickled to them, with the
+    queues of the CPU communication ops replaced by queues of the Manager of the pool,
+    and releasing a worker resets it to a new transformer.
+
+    GPU workers run on hetr servers, which are launched with mpirun on the first lease
+    of a GPU worker and stay up until the pool is closed; each lease builds a new
+    transformer on its server, which closes the one of the previous lease.
+    """
+    def __init__(self):
+        self.my_pid = os.getpid()
+        self.manager = None
+        self.shared_queues = weakref.WeakKeyDictionary()
+        self.workers = dict()
+        self.rpc_ports = None
+        self.mpilauncher = None
+        self.server_ports = dict()
+        self.leased = set()
+
+    def lease(self, tname):
+        """
+        Returns:
+            A child transformer for tname, reset to a new transformer.
+        """
+        if tname in self.leased:
+            raise RuntimeError("Hetr worker {} is already leased".format(tname))
+        if device_type(tname) == 'cpu':
+            worker = self.workers.get(tname)
+            if worker is None or not worker.is_alive():
+                if self.manager is None:
+                    self.manager = Manager()
+                worker = AsyncTransformer(tname, manager=self.manager,
+                                          shared_queue=self.shared_queue)
+                worker.start()
+                worker.started = True
+                self.workers[tname] = worker
+        elif device_type(tname) == 'gpu':
+            from ngraph.transformers.hetr.rpc_client import RPCTransformerClient
+            worker = RPCTransformerClient(tname, self.server_port(tname))
+        else:
+            raise ValueError("Unknown hetr device {}".format(tname))
+        self.leased.add(tname)
+        return worker
+
+    def release(self, tname, worker):
+        """
+        Resets or closes a worker returned by lease, keeping what can be reused.
+        """
+        if isinstance(worker, AsyncTransformer):
+            worker.reset()
+        else:
+            worker.close()
+        self.leased.discard(tname)
+
+    def shared_queue(self, queue):
+        """
+        Returns:
+            The queue of the Manager that replaces queue in the computations pickled to
+            the CPU workers.
+        """
+        shared = self.shared_queues.get(queue)
+        if shared is None:
+            shared = self.shared_queues[queue] = self.manager.Queue()
+        return shared
+
+    def server_port(self, tname):
+        if self.mpilauncher is None:
+            self.rpc_ports = get_available_ports()
+            self.mpilauncher = Launcher(self.rpc_ports)
+            self.mpilauncher.launch()
+        if tname not in self.server_ports:
+            if len(self.server_ports) == len(self.rpc_ports):
+                raise RuntimeError("No hetr server left for {}".format(tname))
+            self.server_ports[tname] = self.rpc_ports[len(self.server_ports)]
+        return self.server_ports[tname]
+
+    def close(self):
+        if self.my_pid != os.getpid():
+            return
+        for worker in itervalues(self.workers):
+            worker.close()
+        self.workers.clear()
+        self.leased.clear()
+        if self.mpilauncher is not None:
+            self.mpilauncher.close()
+            self.mpilauncher = None
+            self.server_ports.clear()
+        if self.manager is not None:
+            self.shared_queues.clear()
+            self.manager.shutdown()
+            self.manager = None
+
+
+_worker_pool = None
+
+
+def worker_pool():
+    """
+    Returns:
+        The HetrWorkerPool of this process, closed when the process exits.
+    """
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = HetrWorkerPool()
+        atexit.register(_worker_pool.close)
+    return _worker_pool
+
+
 class HetrTransformer(ComputationGraphTransformer):
     """
     Transformer for executing graphs on a CPU, backed by numpy.
@@ -290,6 +652,18 @@ class HetrTransformer(ComputationGraphTransformer):
     Given a list of ops you want to compute the results of, this transformer
     will compile the graph required to compute those results and exposes an
     evaluate method to execute the compiled graph.
+
+    Arguments:
+        device: The default device of ops without a device.
+        worker_pool: A HetrWorkerPool to lease the child transformers from, e.g.
+            worker_pool(). If None, the transformer launches its own workers.
+        share_replicas (bool): Compile the computations of CPU data parallel replicas once,
+            see compile_replicas.
+        placement_devices: The device ids to place the ops without a device_id on, with the
+            cost model of hetr.placement. If None, they go to device_id 0.
+        memory_cap: The bytes each of placement_devices can hold, or None if unlimited.
+        cost_model: The hetr.placement.CostModel of placement_devices, or None for the
+            default one.
     """
 
     transformer_name = "hetr"
@@ -297,7 +671,8 @@ class HetrTransformer(ComputationGraphTransformer):
     default_rtol = 1e-05
     default_atol = 1e-08
 
-    def __init__(self, device='cpu', **kwargs):
+    def __init__(self, device='cpu', worker_pool=None, share_replicas=True,
+                 placement_devices=None, memory_cap=None, cost_model=None, **kwargs):
         super(HetrTransformer, self).__init__(**kwargs)
 
         self.my_pid = os.getpid()
@@ -309,20 +684,37 @@ class HetrTransformer(ComputationGraphTransformer):
                                               default_device_id=0),
                              CommunicationPass(self.send_nodes),
                              DistributedPass(self.send_nodes)]
-
-        self.rpc_ports = get_available_ports()
-        self.rpc_port_idx = 0
-        self.mpilauncher = Launcher(self.rpc_ports)
-        self.mpilauncher.launch()
+        if placement_devices is not None:
+            self.graph_passes.insert(0, AutoPlacementPass(placement_devices,
+                                                          cost_model=cost_model,
+                                                          memory_cap=memory_cap))
+
+        self.share_replicas = share_replicas
+        self.replicas_compiled = False
+        self.replica_transformers = []
+
+        self.worker_pool = worker_pool
+        self.mpilauncher = None
+        if worker_pool is None:
+            self.rpc_ports = get_available_ports()
+            self.rpc_port_idx = 0
+            self.mpilauncher = Launcher(self.rpc_ports)
+            self.mpilauncher.launch()
 
     def close(self):
-        self.mpilauncher.close()
+        if self.mpilauncher is not None:
+            self.mpilauncher.close()
         if self.is_closed:
             return
         if self.my_pid != os.getpid():
             # Only close once, and don't close if this is a copy in a child process
             return
-        for t in self.child_transformers.values():
+        for tname, t in self.child_transformers.items():
+            if self.worker_pool is not None:
+                self.worker_pool.release(tname, t)
+            else:
+                t.close()
+        for t in self.replica_transformers:
             t.close()
         super(HetrTransformer, self).close()
         self.is_closed = True
@@ -330,7 +722,9 @@ class HetrTransformer(ComputationGraphTransformer):
     def register_transformer(self, tname):
         # TODO: Issue #1866 change from using tname string to using (ttype, dev_id, host) tuple
         if tname not in self.child_transformers:
-            if 'cpu' in tname:
+            if self.worker_pool is not None:
+                trans_client = self.worker_pool.lease(tname)
+            elif device_type(tname) == 'cpu':
                 # trans_client = RPCTransformerClient(tname)
                 trans_client = AsyncTransformer(tname)  # TODO replace with RPC when ready
             else:
@@ -340,6 +734,68 @@ class HetrTransformer(ComputationGraphTransformer):
                 self.rpc_port_idx += 1
             self.child_transformers[tname] = trans_client
 
+    def pipeline_computation(self, batch_axis, results, *parameters, **kwargs):
+        """
+        Adds a computation that runs each step as pipelined micro-batches.
+
+        Arguments:
+            batch_axis: The batch axis of the graph, with the length of a micro-batch.
+            results: The results of each micro-batch.
+            *parameters: The placeholders, fed with whole batches.
+            update: Ops computed once per step after the micro-batches.
+
+        Returns:
+            A PipelineComputation.
+        """
+        return PipelineComputation(self, batch_axis, results, parameters, **kwargs)
+
+    def compile_replicas(self):
+        """
+        Compiles the computations of data parallel replicas once, before the child
+        transformers start running them.
+
+        CPU child transformers whose computations are structurally identical, such as the
+        replicas made for ops with several device_ids, are given one transformer compiled
+        in this process with the computations of the first of them. The processes of the
+        child transformers are forked from this process, so each gets its own copy of the
+        compiled computations, which the other replicas switch over to their own
+        communication ops.
+        """
+        if self.replicas_compiled:
+            return
+        self.replicas_compiled = True
+        if not self.share_replicas:
+            return
+
+        groups = collections.OrderedDict()
+        for t in itervalues(self.child_transformers):
+            if not isinstance(t, AsyncTransformer) or t.started or not t.computation_builds:
+                continue
+            signatures = []
+            ordered_ops = []
+            for comp_id in sorted(t.computation_builds):
+                returns, placeholders = t.computation_builds[comp_id]
+                signature, ops = replica_signature(list(returns) + list(placeholders))
+                signatures.append((len(returns), signature))
+                ordered_ops.extend(ops)
+            key = (device_type(t.transformer_type), tuple(signatures))
+            groups.setdefault(key, []).append((t, ordered_ops))
+
+        for replicas in itervalues(groups):
+            if len(replicas) < 2:
+                continue
+            leader, leader_ops = replicas[0]
+            transformer = build_transformer(leader.transformer_type)
+            self.replica_transformers.append(transformer)
+            computations = []
+            for comp_id in sorted(leader.computation_builds):
+                returns, placeholders = leader.computation_builds[comp_id]
+                computations.append(transformer.computation(returns, *placeholders))
+            for t, ops in replicas:
+                t.adopt(transformer,
+                        dict(zip(sorted(t.computation_builds), computations)),
+                        dict(zip(leader_ops, ops)) if t is not leader else None)
+
     def transformer(self, tname):
         assert tname in self.child_transformers, "register transformer {} before use".format(tname)
         return self.child_transformers[tname]
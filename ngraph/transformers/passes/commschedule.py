@@ -0,0 +1,136 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+
+from ngraph.transformers.exop import ExOpBlock
+from ngraph.transformers.passes.passes import GraphPass
+from ngraph.op_graph.op_graph import ReturnOp
+from ngraph.op_graph.comm_nodes import CommunicationOp, SendOp, RecvOp, AllReduceOp
+
+
+def reads(exop):
+    return set(input_decl.tensor_decl for input_decl in exop.input_decls)
+
+
+def writes(exop):
+    return set(output_decl.tensor_decl for output_decl in exop.output_decls) | \
+        set(write_arg.tensor_decl for write_arg in exop.write_args)
+
+
+def is_blocking(exop):
+    return isinstance(exop.op, (RecvOp, AllReduceOp))
+
+
+def exop_dependencies(exops):
+    """
+    Returns:
+        A dict of the exops each exop must stay after: the last writer of each tensor it
+        reads or writes, the readers of each tensor it writes since that write, and the
+        previous send or previous receive or allreduce if it is one.
+    """
+    dependencies = dict()
+    last_writer = dict()
+    last_readers = dict()
+    last_comm = dict()
+    for exop in exops:
+        exop_reads = reads(exop)
+        exop_writes = writes(exop)
+        deps = set()
+        for tensor_decl in exop_reads | exop_writes:
+            if tensor_decl in last_writer:
+                deps.add(last_writer[tensor_decl])
+        for tensor_decl in exop_writes:
+            deps.update(last_readers.pop(tensor_decl, ()))
+            last_writer[tensor_decl] = exop
+        for tensor_decl in exop_reads - exop_writes:
+            last_readers.setdefault(tensor_decl, []).append(exop)
+
+        kind = SendOp if isinstance(exop.op, SendOp) else \
+            RecvOp if is_blocking(exop) else None
+        if kind is not None:
+            if kind in last_comm:
+                deps.add(last_comm[kind])
+            last_comm[kind] = exop
+
+        deps.discard(exop)
+        dependencies[exop] = deps
+    return dependencies
+
+
+class CommSchedulePass(GraphPass):
+    """
+    Overlaps the communication of a hetr device with its compute.
+
+    Sends only queue their value, so each send and the exops it depends on are moved
+    ahead of the exops it does not depend on. Receives and allreduces wait for the other
+    devices, so each of them is then moved down to just before the first exop that
+    depends on it, leaving the compute that does not need it to run while the other
+    devices catch up.
+
+    Sends keep their order, as do the blocking receives and allreduces, and a send only
+    ever runs earlier and a wait later relative to each other, so this can not add a
+    deadlock.
+    """
+    def do_pass(self, computation_decl, **kwargs):
+        self.computation_decl = computation_decl
+
+        assert isinstance(computation_decl.exop_block, ExOpBlock)
+
+        exops = list(computation_decl.exop_block)
+        if not any(isinstance(exop.op, CommunicationOp) for exop in exops):
+            return
+
+        self.hoist_sends(exops)
+
+        waits = [exop for exop in computation_decl.exop_block if is_blocking(exop)]
+        for exop in reversed(waits):
+            self.sink(exop)
+
+    def hoist_sends(self, exops):
+        dependencies = exop_dependencies(exops)
+        position = {exop: i for i, exop in enumerate(exops)}
+        scheduled = set()
+        order = []
+        for send in [exop for exop in exops if isinstance(exop.op, SendOp)]:
+            cone = set()
+            visit = [send]
+            while visit:
+                exop = visit.pop()
+                if exop in cone or exop in scheduled:
+                    continue
+                cone.add(exop)
+                visit.extend(dependencies[exop])
+            order.extend(sorted(cone, key=position.get))
+            scheduled |= cone
+        order.extend(exop for exop in exops if exop not in scheduled)
+
+        exop_block = self.computation_decl.exop_block
+        prev = exop_block
+        for exop in order:
+            if exop.prev_exop is not prev:
+                exop_block.move_exop_to_after_exop(exop, prev)
+            prev = exop
+
+    def sink(self, exop):
+        next = exop.next_exop
+        exop_reads = reads(exop)
+        exop_writes = writes(exop)
+        while next.is_exop_end_of_list is False:
+            next_writes = writes(next)
+            if is_blocking(next) or isinstance(next.op, ReturnOp) or \
+                    exop_writes & (reads(next) | next_writes) or next_writes & exop_reads:
+                break
+            next = next.next_exop
+        if next.prev_exop is not exop:
+            self.computation_decl.exop_block.move_exop_to_after_exop(exop, next.prev_exop)
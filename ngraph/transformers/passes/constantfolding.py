@@ -0,0 +1,276 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import numpy as np
+
+from ngraph.op_graph.op_graph import Op, constant, \
+    UnaryElementWiseOp, BinaryElementWiseOp, StopGradient, NegativeOp, AbsoluteOp, \
+    SinOp, CosOp, TanhOp, ExpOp, LogOp, ReciprocalOp, SignOp, SquareOp, SqrtOp, \
+    SigmoidAtomicOp, Add, Subtract, Multiply, Divide, FloorDivide, Mod, Maximum, Minimum, \
+    Power, Equal, NotEqual, Greater, Less, GreaterEqual, LessEqual, \
+    IndexOp, Transpose, AxesCastOp, Flatten, \
+    Unflatten, TensorSliceOp, ContiguousOp, DotOp, ReductionOp, Max, Min, Sum, Prod
+from ngraph.transformers.passes.passes import GraphBuildingPass
+from ngraph.util.generics import generic_function
+
+
+unary_functions = {
+    StopGradient: lambda x: x,
+    NegativeOp: np.negative,
+    AbsoluteOp: np.abs,
+    SinOp: np.sin,
+    CosOp: np.cos,
+    TanhOp: np.tanh,
+    ExpOp: np.exp,
+    LogOp: np.log,
+    ReciprocalOp: np.reciprocal,
+    SignOp: np.sign,
+    SquareOp: np.square,
+    SqrtOp: np.sqrt,
+    SigmoidAtomicOp: lambda x: 1.0 / (1.0 + np.exp(-x)),
+}
+
+binary_functions = {
+    Add: np.add,
+    Subtract: np.subtract,
+    Multiply: np.multiply,
+    Divide: np.divide,
+    FloorDivide: np.floor_divide,
+    Mod: np.mod,
+    Maximum: np.maximum,
+    Minimum: np.minimum,
+    Power: np.power,
+    Equal: np.equal,
+    NotEqual: np.not_equal,
+    Greater: np.greater,
+    Less: np.less,
+    GreaterEqual: np.greater_equal,
+    LessEqual: np.less_equal,
+}
+
+reduction_functions = {
+    Max: np.max,
+    Min: np.min,
+    Sum: np.sum,
+    Prod: np.prod,
+}
+
+
+def value_with_axes(value, axes, new_axes):
+    """
+    Transposes and broadcasts the value of a tensor to new axes.
+
+    Arguments:
+        value: A NumPy array whose dimensions are axes.
+        axes: The axes of value.
+        new_axes: The axes of the result. Must include all of axes.
+
+    Returns:
+        A NumPy array whose dimensions are new_axes, or None if axes are not in new_axes.
+    """
+    if value.shape != axes.lengths or any(axis not in new_axes for axis in axes):
+        return None
+    value = np.transpose(value, [axes.index(axis) for axis in new_axes if axis in axes])
+    value = value.reshape([axis.length if axis in axes else 1 for axis in new_axes])
+    return np.broadcast_to(value, new_axes.lengths)
+
+
+@generic_function(dispatch_base_type=Op)
+def fold_value(op, args, *values):
+    """
+    Computes the value of an op from the values of its arguments.
+
+    Arguments:
+        op: The op.
+        args: The arguments of op.
+        values: NumPy arrays with the values of args.
+
+    Returns:
+        The value of op, or None if op can not be evaluated at compile time.
+    """
+    return None
+
+
+@fold_value.on_type(UnaryElementWiseOp)
+def fold_value(op, args, x):
+    f = unary_functions.get(type(op), None)
+    x = value_with_axes(x, args[0].axes, op.axes)
+    if f is None or x is None:
+        return None
+    return f(x)
+
+
+@fold_value.on_type(BinaryElementWiseOp)
+def fold_value(op, args, x, y):
+    f = binary_functions.get(type(op), None)
+    if f is None:
+        return None
+    x = value_with_axes(x, args[0].axes, op.axes)
+    y = value_with_axes(y, args[1].axes, op.axes)
+    if x is None or y is None:
+        return None
+    return f(x, y)
+
+
+@fold_value.on_type(IndexOp)
+def fold_value(op, args, x):
+    # BroadcastOp, ExpandDims and ReorderAxes
+    return value_with_axes(x, args[0].axes, op.axes)
+
+
+@fold_value.on_type(Transpose)
+def fold_value(op, args, x):
+    return np.transpose(x)
+
+
+@fold_value.on_type(AxesCastOp)
+def fold_value(op, args, x):
+    return x.reshape(op.axes.lengths)
+
+
+@fold_value.on_type(Flatten)
+def fold_value(op, args, x):
+    return x.reshape(op.axes.lengths)
+
+
+@fold_value.on_type(Unflatten)
+def fold_value(op, args, x):
+    return x.reshape(op.axes.lengths)
+
+
+@fold_value.on_type(TensorSliceOp)
+def fold_value(op, args, x):
+    return x[op.slices]
+
+
+@fold_value.on_type(ContiguousOp)
+def fold_value(op, args, x):
+    return x
+
+
+@fold_value.on_type(DotOp)
+def fold_value(op, args, x, y):
+    x_axes = args[0].axes
+    y_axes = args[1].axes
+    value = np.tensordot(x, y, axes=([x_axes.index(axis) for axis in op.reduction_axes],
+                                     [y_axes.index(axis) for axis in op.reduction_axes]))
+    return value_with_axes(value, op.x_out_axes + op.y_out_axes, op.axes)
+
+
+@fold_value.on_type(ReductionOp)
+def fold_value(op, args, x):
+    f = reduction_functions.get(type(op), None)
+    if f is None:
+        return None
+    x_axes = args[0].axes
+    value = f(x, axis=tuple(x_axes.index(axis) for axis in op.reduction_axes))
+    return value_with_axes(np.asarray(value), x_axes - op.reduction_axes, op.axes)
+
+
+class ConstantFolding(GraphBuildingPass):
+    """
+    Replaces subgraphs whose inputs are all constants with a constant computed with NumPy.
+
+    Only ops without side effects that fold_value can evaluate are folded. An op is only
+    replaced when its value is needed by an op that is not folded, so intermediate values
+    are not kept. Views such as broadcasts are never materialized; the value they view is
+    replaced instead.
+
+    Arguments:
+        max_bytes: Values larger than this are not materialized, so that large broadcasts
+            of small constants stay broadcasts.
+
+    Attributes:
+        folded_ops: The number of ops folded in the last run.
+        folded_bytes: The number of bytes of the constants added in the last run.
+    """
+    def __init__(self, max_bytes=1 << 20, **kwargs):
+        super(ConstantFolding, self).__init__(**kwargs)
+        self.max_bytes = max_bytes
+        self.folded_ops = 0
+        self.folded_bytes = 0
+
+    def do_pass(self, **kwargs):
+        self.values = dict()
+        self.computes = set()
+        self.folded = []
+        self.users = set()
+        self.unfolded_users = set()
+        self.run_pass(self.process_op, **kwargs)
+
+        # Walk back from the folded values used by unfolded ops, keeping views and
+        # materializing the values they view instead.
+        needed = set(op for op in self.folded
+                     if op in self.unfolded_users or op not in self.users)
+        replaced = []
+        for op in reversed(self.folded):
+            if op not in needed or op not in self.computes:
+                continue
+            if isinstance(op, IndexOp):
+                needed.update(self.op_args(op))
+            else:
+                replaced.append(op)
+        self.folded_ops = len(self.computes)
+        self.folded_bytes = sum(self.values[op].nbytes for op in replaced)
+        self.constants = {op: constant(self.values[op], axes=op.axes, dtype=op.dtype)
+                          for op in replaced}
+        self.run_pass(self.replace_folded_op, **kwargs)
+        self.values = None
+
+    def process_op(self, op):
+        args = self.op_args(op)
+        self.users.update(args)
+        value = self.fold(op, args)
+        if value is None:
+            self.unfolded_users.update(args)
+            return
+        self.values[op] = value
+        if not op.is_constant:
+            self.folded.append(op)
+            if not isinstance(op, IndexOp) or any(arg in self.computes for arg in args):
+                self.computes.add(op)
+
+    def fold(self, op, args):
+        """
+        Returns:
+            The value of op as a NumPy array if it is constant, otherwise None.
+        """
+        if op.is_constant:
+            const = op.const
+            if const is None or np.size(const) != op.axes.size:
+                return None
+            return np.asarray(const).reshape(op.axes.lengths)
+        if not op.is_tensor_op or op.is_state_op or len(op.control_deps) > 0 or \
+                not isinstance(op.dtype, np.dtype) or \
+                not all(arg in self.values for arg in args):
+            return None
+        if op.axes.size * op.dtype.itemsize > self.max_bytes:
+            return None
+        try:
+            with np.errstate(all='ignore'):
+                value = fold_value(op, args, *(self.values[arg] for arg in args))
+        except (ValueError, IndexError):
+            # Axes that can not be matched up, leave it to the transformer
+            return None
+        if value is None or value.shape != op.axes.lengths:
+            return None
+        return np.array(value, dtype=op.dtype)
+
+    def replace_folded_op(self, op):
+        replacement = self.constants.pop(op, None)
+        if replacement is not None:
+            self.replace_op(op, replacement)
+
+    def pass_report(self):
+        return {'folded_ops': self.folded_ops, 'folded_bytes': self.folded_bytes}
@@ -0,0 +1,115 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import numpy as np
+
+from ngraph.op_graph.axes import make_axes
+from ngraph.op_graph.op_graph import Op, DotOp, ReorderAxes, constant, axes_with_order, \
+    flatten_at, unflatten
+from ngraph.op_graph.convolution import ConvolutionOp
+from ngraph.transformers.cpu.quantization import QuantizedDotOp, QuantizedConvolutionOp, \
+    quantize_per_channel
+from ngraph.transformers.passes.passes import PeepholeGraphPass
+from ngraph.util.generics import generic_method
+
+
+class CPUQuantization(PeepholeGraphPass):
+    """
+    Replaces the ops of an Int8Calibration with ops that run on int8 weights and
+    activations.
+
+    The weights are quantized with one scale per output channel and become int8
+    constants, so the float weights are not needed by the quantized computations.
+
+    Arguments:
+        calibration: The Int8Calibration with the ops to quantize.
+
+    Attributes:
+        quantized_ops: The number of ops quantized in the last run.
+        weight_bytes: The number of bytes of the int8 weights.
+        scale_bytes: The number of bytes of the scales of the int8 weights.
+        float_weight_bytes: The number of bytes of the float weights they replace.
+    """
+    def __init__(self, calibration, **kwargs):
+        super(CPUQuantization, self).__init__(**kwargs)
+        self.calibration = calibration
+        self.quantized_ops = 0
+        self.weight_bytes = 0
+        self.scale_bytes = 0
+        self.float_weight_bytes = 0
+
+    def do_pass(self, **kwargs):
+        self.quantized_ops = 0
+        self.weight_bytes = 0
+        self.scale_bytes = 0
+        self.float_weight_bytes = 0
+        super(CPUQuantization, self).do_pass(**kwargs)
+
+    def quantized_weights(self, value, axis):
+        """
+        Returns:
+            Constants with value quantized to int8 and the scale of each index of axis.
+        """
+        quantized, scale = quantize_per_channel(value, axis)
+        self.quantized_ops += 1
+        self.weight_bytes += quantized.nbytes
+        self.scale_bytes += scale.nbytes
+        self.float_weight_bytes += value.nbytes
+        return constant(quantized, dtype=np.dtype(np.int8)), \
+            constant(scale, dtype=np.dtype(np.float32))
+
+    @generic_method(dispatch_base_type=Op)
+    def visit(self, op, *args):
+        pass
+
+    @visit.on_type(DotOp)
+    def visit(self, op, x, y):
+        if op not in self.calibration:
+            return
+        index, value = self.calibration.weights[op]
+        w, a = (x, y) if index == 0 else (y, x)
+        reduction_axes = op.reduction_axes
+        w_out_axes = w.axes - reduction_axes
+        a_out_axes = a.axes - reduction_axes
+        if len(reduction_axes) == 0 or len(w_out_axes) == 0 or len(a_out_axes) == 0:
+            return
+
+        # Weights as a (out, reduction) matrix and activation as a (reduction, out) matrix
+        value = np.transpose(value, [w.axes.index(axis)
+                                     for axis in w_out_axes + reduction_axes])
+        value = value.reshape(w_out_axes.size, reduction_axes.size)
+        weights, weight_scale = self.quantized_weights(value, 0)
+        a = flatten_at(axes_with_order(a, reduction_axes + a_out_axes), len(reduction_axes))
+
+        out = QuantizedDotOp(a, weights, weight_scale, self.calibration.activation_scale(op),
+                             axes=make_axes([w_out_axes.flatten(True),
+                                             a_out_axes.flatten(True)]))
+        self.replace_op(op, ReorderAxes(unflatten(out), op.axes))
+
+    @visit.on_type(ConvolutionOp)
+    def visit(self, op, inputs, filters, bias=None):
+        if op not in self.calibration or bias is not None:
+            return
+        _, value = self.calibration.weights[op]
+        # Filters are (C, T, R, S, K), with a scale for each output channel K
+        quantized, scale = self.quantized_weights(value, len(filters.axes) - 1)
+        out = QuantizedConvolutionOp(op.conv_params, inputs, quantized, scale,
+                                     self.calibration.activation_scale(op), axes=op.axes)
+        self.replace_op(op, out)
+
+    def pass_report(self):
+        return {'quantized_ops': self.quantized_ops,
+                'weight_bytes': self.weight_bytes,
+                'scale_bytes': self.scale_bytes,
+                'float_weight_bytes': self.float_weight_bytes}
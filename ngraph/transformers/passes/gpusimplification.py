@@ -15,7 +15,8 @@
 
 from ngraph.transformers.passes.passes import PeepholeGraphPass
 from ngraph.util.generics import generic_method
-from ngraph.op_graph.op_graph import Op, Fill, AssignOp
+from ngraph.op_graph.op_graph import Op, Fill, AssignOp, axes_with_order, \
+    SoftmaxCrossEntropyOp, SoftmaxCrossEntropyBpropOp
 
 
 class CPUAssignOp(AssignOp):
@@ -40,3 +41,12 @@ class GPUSubstitution(PeepholeGraphPass):
         # Fill op must operate on contiguous tensor
         if not tensor.tensor_description().c_contiguous:
             self.replace_op(op, AssignOp(tensor, op.scalar))
+
+    @visit.on_type(SoftmaxCrossEntropyOp)
+    def visit(self, op, x, t):
+        # No fused kernel
+        self.replace_op(op, axes_with_order(op.as_primitive_ops((x, t)), op.axes))
+
+    @visit.on_type(SoftmaxCrossEntropyBpropOp)
+    def visit(self, op, x, t, delta):
+        self.replace_op(op, axes_with_order(op.as_primitive_ops((x, t, delta)), op.axes))
@@ -19,7 +19,32 @@ from orderedset import OrderedSet
 from ngraph.factory.comm_node_factory import get_comm_pattern, CommNodePair
 from ngraph.op_graph.op_graph import Op, TensorValueOp
 from ngraph.transformers.hetr.hetr_utils import clone_graph
-from ngraph.transformers.passes.passes import GraphBuildingPass
+from ngraph.transformers.hetr.placement import place
+from ngraph.transformers.passes.passes import GraphPass, GraphBuildingPass
+
+
+class AutoPlacementPass(GraphPass):
+    """
+    Places the ops without a device_id on device_ids with a cost model, see
+    ngraph.transformers.hetr.placement.place. Runs before DeviceAssignPass, which then
+    handles the ops as if they had been placed by hand, so CommunicationPass adds the
+    send and recv ops between the devices.
+
+    Ops placed for an earlier computation keep their device.
+    """
+
+    def __init__(self, device_ids, cost_model=None, memory_cap=None, **kwargs):
+        super(AutoPlacementPass, self).__init__(**kwargs)
+        self.device_ids = device_ids
+        self.cost_model = cost_model
+        self.memory_cap = memory_cap
+        self.placement = dict()
+
+    def do_pass(self, ops, **kwargs):
+        self.placement = place(ops, self.device_ids, cost_model=self.cost_model,
+                               memory_cap=self.memory_cap)
+        for op, device_id in self.placement.items():
+            op.metadata['device_id'] = device_id
 
 
 class DeviceAssignPass(GraphBuildingPass):
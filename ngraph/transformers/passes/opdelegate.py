@@ -29,6 +29,7 @@ class OpAccessor(with_metaclass(abc.ABCMeta, object)):
     def __init__(self, **kwargs):
         self.replacement_list = []
         self.replacements = dict()
+        self.replacement_count = 0
 
     @abc.abstractmethod
     def op_arg(self, op, n):
@@ -122,6 +123,7 @@ class OpAccessor(with_metaclass(abc.ABCMeta, object)):
         for op, replacement in self.replacement_list:
             self.perform_replace_op(op, replacement)
             self.replacements[op] = replacement
+        self.replacement_count += len(self.replacement_list)
         return len(self.replacement_list) > 0
 
     def get_replacement(self, op):
@@ -307,6 +309,10 @@ class DelegateOpAccessor(OpAccessor):
     def get_replacement(self, op):
         return self.op_accessor.get_replacement(op)
 
+    @property
+    def replacement_count(self):
+        return self.op_accessor.replacement_count
+
 
 class OpDelegate(with_metaclass(abc.ABCMeta, object)):
     def op_arg(self, op, n):
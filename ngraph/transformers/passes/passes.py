@@ -16,6 +16,7 @@ import abc
 import itertools
 
 from future.utils import with_metaclass
+from monotonic import monotonic
 
 from ngraph.op_graph.axes import make_axis
 from ngraph.op_graph.op_graph import BroadcastOp, broadcast, DotOp, make_axes, \
@@ -29,11 +30,66 @@ from ngraph.transformers.passes.opdelegate import DelegateOpAccessor
 from ngraph.util.generics import generic_method
 
 
+def graph_size(ops=None, computation_decl=None, **kwargs):
+    """
+    Counts the ops of the graph a pass is run on.
+
+    Arguments:
+        ops: The roots of an op-graph.
+        computation_decl: The ComputationDecl of an exop-graph.
+
+    Returns:
+        A (key, count) pair where key is 'exops' for an exop-graph and 'ops' for an op-graph.
+    """
+    if computation_decl is not None:
+        return 'exops', sum(1 for _ in computation_decl.exop_block)
+    if ops is not None:
+        return 'ops', len(Op.ordered_ops(op.forwarded for op in ops))
+    return 'ops', None
+
+
 class GraphPass(with_metaclass(abc.ABCMeta, DelegateOpAccessor)):
-    def wrapped_do_pass(self, **kwargs):
+    def wrapped_do_pass(self, report=False, **kwargs):
+        """
+        Runs the pass and optionally reports what it did.
+
+        Arguments:
+            report: If True, return a report of the pass. Counting the graph before and
+                after the pass traverses it, so only ask for a report when it is used.
+
+        Returns:
+            If report, a dict with the name of the pass, its duration in seconds, the
+            number of ops replaced and the number of ops (or exops) before and after the
+            pass, otherwise None.
+        """
+        if report:
+            key, size_before = graph_size(**kwargs)
+        start = monotonic()
         self.begin_pass(**kwargs)
+        replacements_before = self.replacement_count
         self.do_pass(**kwargs)
         self.end_pass(**kwargs)
+        if not report:
+            return None
+        duration = monotonic() - start
+        replacements = self.replacement_count - replacements_before
+        _, size_after = graph_size(**kwargs)
+        pass_report = {
+            'name': type(self).__name__,
+            'duration': duration,
+            'replacements': replacements,
+            key + '_before': size_before,
+            key + '_after': size_after,
+        }
+        pass_report.update(self.pass_report())
+        return pass_report
+
+    def pass_report(self):
+        """
+        Returns:
+            A dict of pass-specific statistics to add to the report of wrapped_do_pass.
+        """
+        return dict()
 
     @abc.abstractmethod
     def do_pass(self, **kwargs):
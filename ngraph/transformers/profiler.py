@@ -0,0 +1,367 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+from __future__ import division
+
+import math
+from collections import OrderedDict
+
+from ngraph.op_graph.op_graph import Op, DotOp, DotLowDimension, ElementWiseOp, ReductionOp
+from ngraph.op_graph.convolution import ConvolutionOp, bprop_conv, update_conv
+from ngraph.op_graph.pooling import PoolingOp, BpropPoolOp
+from ngraph.util.generics import generic_function
+from ngraph.util.trace_events import TraceEventTracker
+
+
+def decl_elements(decl):
+    """
+    Returns:
+        The number of elements in the tensor view of an input or output decl.
+    """
+    return decl.tensor_description.axes.size
+
+
+def decl_bytes(decl):
+    """
+    Returns:
+        The number of bytes in the tensor view of an input or output decl.
+    """
+    return decl_elements(decl) * decl.tensor_description.dtype.itemsize
+
+
+@generic_function(dispatch_base_type=Op)
+def exop_flops(op, exop):
+    """
+    Estimates the floating point operations performed by one execution of exop.
+
+    The default is zero, for ops that only move data.
+
+    Arguments:
+        op: The op of the exop.
+        exop: The exop.
+
+    Returns:
+        The estimated number of floating point operations.
+    """
+    return 0
+
+
+@exop_flops.on_type(ElementWiseOp)
+def exop_flops(op, exop):
+    return sum(decl_elements(output_decl) for output_decl in exop.output_decls)
+
+
+@exop_flops.on_type(ReductionOp)
+def exop_flops(op, exop):
+    return sum(decl_elements(input_decl) for input_decl in exop.input_decls)
+
+
+@exop_flops.on_type(PoolingOp)
+def exop_flops(op, exop):
+    return decl_elements(exop.input_decls[0])
+
+
+@exop_flops.on_type(BpropPoolOp)
+def exop_flops(op, exop):
+    return decl_elements(exop.output_decls[0])
+
+
+def dot_flops(exop):
+    # For x[free_x, K] . y[K, free_y] the output has free_x * free_y elements, so
+    # x * y / output = K * K.
+    x, y = (decl_elements(input_decl) for input_decl in exop.input_decls[:2])
+    output = decl_elements(exop.output_decls[0])
+    if output == 0:
+        return 0
+    return int(2 * output * math.sqrt(x * y / output))
+
+
+@exop_flops.on_type(DotOp)
+def exop_flops(op, exop):
+    return dot_flops(exop)
+
+
+@exop_flops.on_type(DotLowDimension)
+def exop_flops(op, exop):
+    return dot_flops(exop)
+
+
+@exop_flops.on_type(ConvolutionOp)
+def exop_flops(op, exop):
+    filters = exop.input_decls[1]
+    filters_per_output = decl_elements(filters) // filters.tensor_description.axes[-1].length
+    return 2 * decl_elements(exop.output_decls[0]) * filters_per_output
+
+
+@exop_flops.on_type(bprop_conv)
+def exop_flops(op, exop):
+    delta, filters = exop.input_decls[:2]
+    filters_per_output = decl_elements(filters) // filters.tensor_description.axes[-1].length
+    return 2 * decl_elements(delta) * filters_per_output
+
+
+@exop_flops.on_type(update_conv)
+def exop_flops(op, exop):
+    filters = exop.output_decls[0]
+    filters_per_output = decl_elements(filters) // filters.tensor_description.axes[-1].length
+    return 2 * decl_elements(exop.input_decls[0]) * filters_per_output
+
+
+def exop_bytes(exop):
+    """
+    Estimates the bytes moved by one execution of exop.
+
+    Arguments:
+        exop: The exop.
+
+    Returns:
+        The number of bytes read from the inputs plus the bytes written to the outputs.
+    """
+    return sum(decl_bytes(input_decl) for input_decl in exop.input_decls) + \
+        sum(decl_bytes(output_decl) for output_decl in exop.output_decls)
+
+
+class Histogram(object):
+    """
+    A histogram of durations with a fixed number of logarithmically spaced buckets.
+
+    Arguments:
+        num_buckets: The number of buckets. Bucket 0 counts durations below one
+            microsecond, bucket i counts durations below 2**i microseconds and the
+            last bucket counts everything longer.
+
+    Attributes:
+        counts: The number of durations in each bucket.
+        count: The number of durations added.
+        total: The sum of the durations added, in seconds.
+        min: The shortest duration added, in seconds.
+        max: The longest duration added, in seconds.
+    """
+    def __init__(self, num_buckets=32):
+        self.counts = [0] * num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def add(self, duration):
+        """
+        Adds a duration, in seconds, to the histogram.
+        """
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        us = duration * 1e6
+        bucket = 0 if us < 1 else int(math.log(us, 2)) + 1
+        self.counts[min(bucket, len(self.counts) - 1)] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def percentile(self, q):
+        """
+        Estimates a percentile of the durations.
+
+        Arguments:
+            q: The percentile, between 0 and 100.
+
+        Returns:
+            The upper bound, in seconds, of the bucket holding the percentile.
+        """
+        if self.count == 0:
+            return 0.0
+        target = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count > 0 and seen >= target:
+                if bucket == len(self.counts) - 1:
+                    return self.max
+                return max(min(2 ** bucket * 1e-6, self.max), self.min)
+        return self.max
+
+
+class OpStats(object):
+    """
+    Aggregated timing and cost of an exop, or of all exops of an op type.
+
+    Arguments:
+        name: The name of the exop or op type.
+        num_buckets: The number of buckets of the duration histogram.
+
+    Attributes:
+        histogram: The histogram of the durations of each execution.
+        flops: Estimated floating point operations summed over all executions.
+        bytes: Estimated bytes moved summed over all executions.
+    """
+    def __init__(self, name, num_buckets=32):
+        self.name = name
+        self.histogram = Histogram(num_buckets)
+        self.flops = 0
+        self.bytes = 0
+
+    def add(self, duration, flops, bytes):
+        self.histogram.add(duration)
+        self.flops += flops
+        self.bytes += bytes
+
+    @property
+    def calls(self):
+        return self.histogram.count
+
+    @property
+    def total_time(self):
+        return self.histogram.total
+
+    @property
+    def gflops(self):
+        """
+        Returns:
+            Achieved GFLOP/s.
+        """
+        return self.flops / self.total_time * 1e-9 if self.total_time > 0 else 0.0
+
+    @property
+    def gbytes(self):
+        """
+        Returns:
+            Achieved GB/s.
+        """
+        return self.bytes / self.total_time * 1e-9 if self.total_time > 0 else 0.0
+
+
+class Profiler(object):
+    """
+    Aggregates the per-exop wall time of computation calls.
+
+    Computations are compiled with cheap timestamp hooks, so profiling can be turned on
+    and off at any time without recompiling. While enabled, every call records the
+    duration of each exop, which is aggregated per exop and per op type together with
+    the estimated FLOPs and bytes moved by the exop.
+
+    Arguments:
+        num_buckets: The number of buckets of each duration histogram.
+
+    Attributes:
+        enabled: True if computation calls are being profiled.
+        exop_stats: OpStats for each (computation name, exop name).
+        op_type_stats: OpStats for each op type.
+    """
+    def __init__(self, num_buckets=32):
+        self.enabled = False
+        self.num_buckets = num_buckets
+        self.exop_costs = dict()
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """
+        Discards all of the recorded statistics.
+        """
+        self.exop_stats = OrderedDict()
+        self.op_type_stats = OrderedDict()
+        self.timelines = OrderedDict()
+
+    def exop_cost(self, exop):
+        """
+        Returns:
+            The estimated (flops, bytes) of one execution of exop.
+        """
+        cost = self.exop_costs.get(exop, None)
+        if cost is None:
+            cost = (exop_flops(exop.op, exop), exop_bytes(exop))
+            self.exop_costs[exop] = cost
+        return cost
+
+    def record(self, computation_decl, timestamps):
+        """
+        Records one call of a computation.
+
+        Arguments:
+            computation_decl: The ComputationDecl of the computation.
+            timestamps: The time before the first exop followed by the time after each exop.
+        """
+        computation_name = computation_decl.computation_op.name
+        self.timelines[computation_name] = (computation_decl, timestamps)
+        for exop, start, stop in zip(computation_decl.exop_block, timestamps, timestamps[1:]):
+            flops, bytes = self.exop_cost(exop)
+            duration = stop - start
+
+            key = (computation_name, exop.name)
+            stats = self.exop_stats.get(key, None)
+            if stats is None:
+                stats = OpStats(exop.name, self.num_buckets)
+                self.exop_stats[key] = stats
+            stats.add(duration, flops, bytes)
+
+            op_type = exop.op.short_name
+            stats = self.op_type_stats.get(op_type, None)
+            if stats is None:
+                stats = OpStats(op_type, self.num_buckets)
+                self.op_type_stats[op_type] = stats
+            stats.add(duration, flops, bytes)
+
+    def table(self, by_exop=False):
+        """
+        Formats the statistics as a table, ordered by total time.
+
+        Arguments:
+            by_exop: If True, list each exop, otherwise list each op type.
+
+        Returns:
+            The table as a string.
+        """
+        stats = self.exop_stats if by_exop else self.op_type_stats
+        rows = sorted(stats.values(), key=lambda op_stats: op_stats.total_time, reverse=True)
+        name_width = max([len('name')] + [len(op_stats.name) for op_stats in rows])
+        header = '{:<{w}} {:>8} {:>12} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+            'name', 'calls', 'total ms', 'mean us', 'p50 us', 'p99 us', 'GFLOP/s', 'GB/s',
+            w=name_width)
+        lines = [header, '-' * len(header)]
+        for op_stats in rows:
+            histogram = op_stats.histogram
+            lines.append(
+                '{:<{w}} {:>8} {:>12.3f} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.3f} {:>10.3f}'.format(
+                    op_stats.name, op_stats.calls, op_stats.total_time * 1e3,
+                    histogram.mean * 1e6, histogram.percentile(50) * 1e6,
+                    histogram.percentile(99) * 1e6, op_stats.gflops, op_stats.gbytes,
+                    w=name_width))
+        return '\n'.join(lines)
+
+    def trace(self, tracker_name='profile'):
+        """
+        Makes a trace of the most recent call of each profiled computation.
+
+        Arguments:
+            tracker_name: Name of the trace, used as the file name when serialized.
+
+        Returns:
+            A TraceEventTracker with an event for each exop.
+        """
+        tracker = TraceEventTracker(tracker_name)
+        for tid, (computation_decl, timestamps) in enumerate(self.timelines.values()):
+            for exop, start, stop in zip(computation_decl.exop_block,
+                                         timestamps, timestamps[1:]):
+                flops, bytes = self.exop_cost(exop)
+                args = {'name': exop.name, 'flops': flops, 'bytes': bytes}
+                tracker.add_operation("ExOp", exop.op.short_name, 0, tid,
+                                      start * 1e6, (stop - start) * 1e6, args)
+        return tracker
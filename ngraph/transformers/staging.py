@@ -0,0 +1,133 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import sys
+import threading
+
+import numpy as np
+import six
+from six.moves import queue
+
+
+class StagedInputs(object):
+    """
+    The arguments of a computation call, prepared on the staging thread.
+
+    Pass it as the only argument of the computation call. Every StagedInputs must be
+    used in a call, since its buffers are only reused after that call.
+
+    Attributes:
+        buffers: The staging buffer of each parameter.
+    """
+    def __init__(self, buffers):
+        self.buffers = buffers
+        self.error = None
+        self.ready = threading.Event()
+        self.released = threading.Event()
+
+    def wait(self):
+        """
+        Waits for the arguments to be staged.
+
+        Returns:
+            The staging buffer of each parameter.
+        """
+        self.ready.wait()
+        if self.error is not None:
+            self.release()
+            six.reraise(*self.error)
+        return self.buffers
+
+    def release(self):
+        """
+        Called once the buffers have been consumed, so that they can be reused.
+        """
+        self.released.set()
+
+
+class InputStager(object):
+    """
+    Prepares the arguments of upcoming calls of a computation on a background thread,
+    while the current call runs.
+
+    Each parameter has num_buffers staging buffers with the shape and dtype of its
+    tensor. Staging an argument casts it and copies it into a buffer, so the call only
+    has to copy a contiguous buffer of the right type into the device tensor.
+
+    Arguments:
+        parameters: The parameters of the computation.
+        num_buffers: The number of calls that can be staged at once.
+    """
+    def __init__(self, parameters, num_buffers=2):
+        self.ring = [[np.empty(parameter.axes.lengths, dtype=parameter.dtype)
+                      for parameter in parameters]
+                     for _ in range(num_buffers)]
+        self.staged = [None] * num_buffers
+        self.next_slot = 0
+        self.jobs = queue.Queue()
+        self.thread = None
+
+    def stage(self, args):
+        """
+        Starts staging args.
+
+        Arguments:
+            args: A value for each parameter.
+
+        Returns:
+            A StagedInputs for the args.
+
+        Raises:
+            RuntimeError: If the buffers are all in use, i.e. the StagedInputs staged
+                num_buffers stages ago has not been used in a call yet. Buffers are only
+                released by the calls, so waiting for one here would never return.
+        """
+        slot = self.next_slot
+        previous = self.staged[slot]
+        if previous is not None and not previous.released.is_set():
+            raise RuntimeError("All {} staging buffers are in use, call the computation "
+                               "with the staged inputs before staging more"
+                               .format(len(self.ring)))
+        self.next_slot = (slot + 1) % len(self.ring)
+        staged = StagedInputs(self.ring[slot])
+        self.staged[slot] = staged
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.worker)
+            self.thread.daemon = True
+            self.thread.start()
+        self.jobs.put((staged, args))
+        return staged
+
+    def worker(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            staged, args = job
+            try:
+                for buffer, arg in zip(staged.buffers, args):
+                    np.copyto(buffer, arg, casting='unsafe')
+            except Exception:
+                staged.error = sys.exc_info()
+            staged.ready.set()
+
+    def close(self):
+        """
+        Stops the staging thread.
+        """
+        if self.thread is not None:
+            self.jobs.put(None)
+            self.thread.join()
+            self.thread = None
@@ -19,6 +19,12 @@ from contextlib import contextmanager
 from ngraph.util.threadstate import get_thread_state
 
 
+class _PendingName(str):
+    """
+    A requested name that has not been made unique yet.
+    """
+
+
 class NameableValue(object):
     """
     An object that can be named.
@@ -29,9 +35,11 @@ class NameableValue(object):
         name (str): The name of the object.
         **kwargs: Parameters for related classes.
 
+    Names are made unique lazily, the first time they are read, so that constructing
+    large graphs does not pay for the uniqueness check of names that are never used.
+
     Attributes:
         graph_label_type: A label that should be used when drawing the graph.
-        id: Unique id for this object.
     """
     __counter = 0
     __all_names = WeakValueDictionary()
@@ -46,7 +54,7 @@ class NameableValue(object):
         self.name = name
 
         if graph_label_type is None:
-            graph_label_type = self.name
+            graph_label_type = name
         self.graph_label_type = graph_label_type
         self.__doc__ = docstring
 
@@ -55,6 +63,9 @@ class NameableValue(object):
         """
         Returns the object with the given name, if it hasn't been garbage collected.
 
+        Only objects whose name has already been read, and therefore made unique, can be
+        found.
+
         Arguments:
             name (str): Unique object name
 
@@ -72,17 +83,26 @@ class NameableValue(object):
     @property
     def name(self):
         """The name."""
-        return self.__name
+        name = self.__name
+        if type(name) is _PendingName:
+            name = self.__unique_name(str(name))
+            NameableValue.__all_names[name] = self
+            self.__name = name
+        return name
 
     @name.setter
     def name(self, name):
         """
         Sets the object name to a unique name based on name.
 
+        The name is made unique when it is first read.
+
         Arguments:
             name: Prefix for the name
         """
+        self.__name = _PendingName(name)
 
+    def __unique_name(self, name):
         if name in NameableValue.__all_names:
             while True:
                 c_name = "{}_{}".format(name, type(self).__counter)
@@ -90,8 +110,7 @@ class NameableValue(object):
                     name = c_name
                     break
                 type(self).__counter += 1
-        NameableValue.__all_names[name] = self
-        self.__name = name
+        return name
 
     @property
     def short_name(self):
@@ -204,6 +223,8 @@ class NameScope(NameableValue):
 
     def __init__(self, name=None, **kwargs):
         super(NameScope, self).__init__(name=name, **kwargs)
+        # Scopes are looked up by name, so make the name unique right away.
+        self.name
 
     @classmethod
     def get_or_create_scope(cls, name):
@@ -13,9 +13,13 @@
 # limitations under the License.
 # ----------------------------------------------------------------------------
 from __future__ import print_function
+import hashlib
+import numpy as np
 import os
 import posixpath
+import shutil
 import sys
+import tempfile
 import requests
 from tqdm import tqdm
 
@@ -52,6 +56,63 @@ def get_data_cache_or_nothing(subdir=''):
     return '' if cache_root == '' else ensure_dirs_exist(os.path.join(cache_root, subdir))
 
 
+def cache_name(name, path, *args):
+    """
+    Makes a name for load_cached_arrays that is different for each source directory of
+    a dataset and each set of arguments its arrays are made with.
+
+    Arguments:
+        name (str): Name of the dataset.
+        path (str): Directory the dataset is loaded from.
+        *args: Other arguments the arrays depend on.
+
+    Returns:
+        str: name followed by a hash of the absolute path and args.
+    """
+    source = repr((os.path.abspath(os.path.expanduser(path)),) + args)
+    return '{}-{}'.format(name, hashlib.sha1(source.encode('utf-8')).hexdigest()[:16])
+
+
+def load_cached_arrays(name, make_arrays):
+    """
+    Loads named arrays from the data cache, making and caching them on the first load.
+
+    The arrays are stored as .npy files in the directory name of the data cache set by
+    NGRAPH_DATA_CACHE_DIR, and returned as copy-on-write memory maps. Every process
+    loading them shares their pages through the OS page cache and loading does not
+    read the data. Writes to the returned arrays are private to the process.
+
+    Arguments:
+        name (str): Directory of the arrays in the data cache. Must be different for
+                    each set of arguments that make_arrays depends on, see cache_name.
+        make_arrays: Function returning a dict of arrays keyed by valid file names.
+
+    Returns:
+        dict: The arrays. Without a data cache, the result of make_arrays.
+    """
+    cache_root = get_data_cache_or_nothing()
+    if cache_root == '':
+        return make_arrays()
+
+    cache_dir = os.path.join(cache_root, name)
+    if not os.path.isdir(cache_dir):
+        arrays = make_arrays()
+        # Write to a temporary directory and rename it, so that concurrent loaders
+        # never see a partially written cache.
+        ensure_dirs_exist(cache_dir)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(cache_dir))
+        for key, array in arrays.items():
+            np.save(os.path.join(tmp_dir, key + '.npy'), np.ascontiguousarray(array))
+        try:
+            os.rename(tmp_dir, cache_dir)
+        except OSError:
+            # Another process cached the same arrays first
+            shutil.rmtree(tmp_dir)
+
+    return {filename[:-len('.npy')]: np.load(os.path.join(cache_dir, filename), mmap_mode='c')
+            for filename in os.listdir(cache_dir) if filename.endswith('.npy')}
+
+
 def valid_path_append(path, *args):
     """
     Helper to validate passed path directory and append any subsequent
@@ -21,7 +21,10 @@ from test_hetr_passes import check_device_assign_pass, check_communication_pass
 import ngraph as ng
 import ngraph.transformers as ngt
 from ngraph.op_graph.comm_nodes import CPUQueueAllReduceOp
-from ngraph.transformers.hetr.mpilauncher import Launcher
+from ngraph.transformers.hetr.mpilauncher import Launcher, wait_for_servers
+from ngraph.transformers.hetrtransform import HetrWorkerPool
+from ngraph.transformers.hetr.pipeline import GradientAccumulator
+from ngraph.transformers.hetr.placement import CostModel
 from multiprocessing import active_children
 import threading
 import time
@@ -79,6 +82,222 @@ def test_distributed_graph_plus_two(transformer_factory):
         np.testing.assert_array_equal(res, np_x + 2)
 
 
+def test_pipelined_steps(transformer_factory):
+    """
+    Several steps can be fed before collecting their results, in any order.
+    """
+    if transformer_factory.name != 'hetr':
+        pytest.skip("Only hetr computations can be submitted")
+    H = ng.make_axis(length=4, name='height')
+    W = ng.make_axis(length=6, name='width')
+    x = ng.placeholder(axes=[H, W])
+    with ng.metadata(device_id=('1', '2'), parallel=W):
+        x_plus_one = x + 1
+    x_plus_two = x_plus_one + 1
+
+    np_xs = [np.random.randint(100, size=[H.length, W.length]) for _ in range(4)]
+    with ExecutorFactory() as ex:
+        computation = ex.executor(x_plus_two, x)
+        steps = [computation.submit(np_x) for np_x in np_xs]
+        np.testing.assert_array_equal(steps[2].get(), np_xs[2] + 2)
+        for step, np_x in zip(steps, np_xs):
+            np.testing.assert_array_equal(step.get(), np_x + 2)
+        np.testing.assert_array_equal(computation(np_xs[0]), np_xs[0] + 2)
+
+
+def test_worker_pool(transformer_factory):
+    H = ng.make_axis(length=4, name='height')
+    W = ng.make_axis(length=6, name='width')
+    np_x = np.random.randint(100, size=[H.length, W.length])
+    pool = HetrWorkerPool()
+    pids = []
+    try:
+        for _ in range(2):
+            # the hetr passes modify the graph, so each transformer needs its own
+            x = ng.placeholder(axes=[H, W])
+            with ng.metadata(device_id=('1', '2'), parallel=W):
+                x_plus_one = x + 1
+
+            with closing(ngt.make_transformer_factory('hetr', worker_pool=pool)()) as transformer:
+                computation = transformer.computation(x_plus_one, x)
+                np.testing.assert_array_equal(computation(np_x), np_x + 1)
+                pids.append([pool.workers[t].pid for t in ('cpu1', 'cpu2')])
+                with pytest.raises(RuntimeError):
+                    pool.lease('cpu1')
+            assert not pool.leased
+        # the CPU workers are kept warm for the next transformer
+        assert pids[0] == pids[1]
+        with pytest.raises(ValueError):
+            pool.lease('tpu0')
+    finally:
+        pool.close()
+    assert len(active_children()) == 0
+
+
+def test_worker_pool_servers(monkeypatch):
+    launchers = []
+
+    class StubLauncher(object):
+        def __init__(self, ports):
+            self.launches = 0
+            self.closed = False
+            launchers.append(self)
+
+        def launch(self):
+            self.launches += 1
+
+        def close(self):
+            self.closed = True
+
+    class StubClient(object):
+        def __init__(self, tname, port):
+            self.port = port
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr('ngraph.transformers.hetrtransform.Launcher', StubLauncher)
+    monkeypatch.setattr('ngraph.transformers.hetr.rpc_client.RPCTransformerClient', StubClient)
+
+    pool = HetrWorkerPool()
+    ports = []
+    for _ in range(2):
+        factory = ngt.make_transformer_factory('hetr', device='gpu', worker_pool=pool)
+        with closing(factory()) as transformer:
+            transformer.register_transformer('gpu0')
+            client = transformer.child_transformers['gpu0']
+            ports.append(client.port)
+            with pytest.raises(RuntimeError):
+                pool.lease('gpu0')
+        assert client.closed
+        assert not pool.leased
+    # the servers are launched once and the next transformer gets the same server
+    assert ports[0] == ports[1]
+    assert len(launchers) == 1
+    assert launchers[0].launches == 1
+
+    pool.close()
+    assert launchers[0].closed
+    assert pool.mpilauncher is None
+
+
+def test_server_build_transformer(monkeypatch):
+    pytest.importorskip('mpi4py')
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(ngt.__file__), 'hetr'))
+    import hetr_pb2
+    from ngraph.transformers.hetr import hetr_server
+
+    class StubTransformer(object):
+        def __init__(self):
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    transformers = []
+
+    def build_transformer(name, comm=None):
+        transformers.append(StubTransformer())
+        return transformers[-1]
+
+    monkeypatch.setattr(hetr_server, 'build_transformer', build_transformer)
+    server = hetr_server.HetrServer(comm=None, server=None)
+    request = hetr_pb2.BuildRequest(transformer_type='cpu0')
+    assert server.BuildTransformer(request, None).status
+    server.computations[0] = object()
+    server.results[0] = object()
+
+    # a new client resets the server
+    assert server.BuildTransformer(request, None).status
+    assert len(transformers) == 2
+    assert transformers[0].closed
+    assert not transformers[1].closed
+    assert server.transformer is transformers[1]
+    assert not server.computations
+    assert not server.results
+
+
+@pytest.mark.parametrize('share_replicas', [True, False])
+def test_share_replicas(transformer_factory, share_replicas):
+    H = ng.make_axis(length=4, name='height')
+    W = ng.make_axis(length=6, name='width')
+    x = ng.placeholder(axes=[H, W])
+    w = ng.variable(axes=[H, W], initial_value=np.arange(24).reshape(4, 6))
+    with ng.metadata(device_id=('1', '2'), parallel=W):
+        y = x * w + 1
+
+    np_x = np.random.randint(100, size=[H.length, W.length])
+    factory = ngt.make_transformer_factory('hetr', share_replicas=share_replicas)
+    with closing(factory()) as transformer:
+        computation = transformer.computation(y, x)
+        for _ in range(2):
+            np.testing.assert_array_equal(computation(np_x), np_x * w.initial_value + 1)
+        replicas = [transformer.child_transformers[t] for t in ('cpu1', 'cpu2')]
+        if share_replicas:
+            assert len(transformer.replica_transformers) == 1
+            assert all(t.transformer is transformer.replica_transformers[0] for t in replicas)
+        else:
+            assert all(t.transformer is None for t in replicas)
+
+
+def test_pipeline_computation(transformer_factory):
+    F = ng.make_axis(length=3, name='F')
+    H = ng.make_axis(length=5, name='H')
+    N = ng.make_axis(length=2, name='N')
+    np_w1 = np.random.randn(H.length, F.length)
+    np_w2 = np.random.randn(H.length)
+    x = ng.placeholder([F, N])
+    t = ng.placeholder([N])
+    with ng.metadata(device_id='1'):
+        h = ng.tanh(ng.dot(ng.constant(np_w1, axes=[H, F]), x))
+    with ng.metadata(device_id='2'):
+        w2 = ng.variable([H], initial_value=np_w2)
+        y = ng.dot(w2, h)
+        cost = ng.sum(ng.square(y - t), out_axes=())
+    accumulator = GradientAccumulator(cost)
+    updates = accumulator.update(lambda variable, grad: ng.assign(variable,
+                                                                  variable - 0.1 * grad))
+
+    with closing(ngt.make_transformer_factory('hetr')()) as transformer:
+        train = transformer.pipeline_computation(N, [cost, y] + accumulator.accumulate,
+                                                 x, t, update=updates)
+        read_w2 = transformer.computation(w2)
+        for _ in range(2):
+            np_x = np.random.randn(F.length, 4 * N.length)
+            np_t = np.random.randn(4 * N.length)
+            np_h = np.tanh(np_w1.dot(np_x))
+            np_y = np_w2.dot(np_h)
+            outputs = train(np_x, np_t)
+            np.testing.assert_allclose(outputs[0], np.sum((np_y - np_t) ** 2), rtol=1e-5)
+            np.testing.assert_allclose(outputs[1], np_y, rtol=1e-5, atol=1e-6)
+            np_w2 = np_w2 - 0.1 * (2 * (np_y - np_t)).dot(np_h.T)
+
+        with pytest.raises(ValueError):
+            train(np.random.randn(F.length, 3), np.random.randn(3))
+        np.testing.assert_allclose(read_w2(), np_w2, rtol=1e-5)
+
+
+def test_auto_placement(transformer_factory):
+    H = ng.make_axis(length=8, name='H')
+    W = ng.make_axis(length=6, name='W')
+    K = ng.make_axis(length=4, name='K')
+    x = ng.placeholder([H, W])
+    a = ng.variable([W, K], initial_value=np.random.randn(W.length, K.length))
+    b = ng.variable([W, K], initial_value=np.random.randn(W.length, K.length))
+    result = ng.tanh(ng.dot(x, a)) + ng.exp(ng.dot(x, b))
+
+    np_x = np.random.randn(H.length, W.length)
+    factory = ngt.make_transformer_factory('hetr', placement_devices=['0', '1'],
+                                           cost_model=CostModel(flops=1e3))
+    with closing(factory()) as transformer:
+        computation = transformer.computation(result, x)
+        np.testing.assert_allclose(computation(np_x),
+                                   np.tanh(np_x.dot(a.initial_value)) +
+                                   np.exp(np_x.dot(b.initial_value)), rtol=1e-5)
+        assert sorted(transformer.child_transformers) == ['cpu0', 'cpu1']
+
+
 def test_singleton_device_id(transformer_factory):
     with ng.metadata(device_id=(['1'])):
         x = ng.placeholder(())
@@ -502,7 +721,7 @@ class ClosingHetrServers():
                 self.processes.append(proc)
             except Exception as e:
                 print(e)
-            time.sleep(STARTUP_TIME)
+        wait_for_servers(ports, STARTUP_TIME)
 
     def close(self):
         for p in self.processes:
@@ -526,10 +745,10 @@ def test_rpc_transformer():
             np.testing.assert_equal(rpc_client_list[p].initialized, True)
 
 
-def test_mpilauncher():
+def test_mpilauncher(monkeypatch):
     port_list = ['51111', '51112']
     num_procs = len(port_list)
-    os.environ["HETR_SERVER_GPU_NUM"] = str(num_procs)
+    monkeypatch.setenv("HETR_SERVER_GPU_NUM", str(num_procs))
 
     mpilauncher = Launcher(port_list)
     mpilauncher.launch()
@@ -541,3 +760,10 @@ def test_mpilauncher():
 
     # Check if process has completed
     assert mpilauncher.mpirun_proc.poll() is not None
+
+
+def test_wait_for_servers_timeout():
+    start = time.time()
+    with pytest.raises(RuntimeError):
+        wait_for_servers(['51113'], timeout=0.5)
+    assert time.time() - start < STARTUP_TIME
@@ -12,10 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
+import numpy as np
 import pytest
+from contextlib import closing
 from ngraph.testing import ExecutorFactory
 from orderedset import OrderedSet
 import ngraph as ng
+from ngraph.op_graph.comm_nodes import CPUQueueSendOp, CPUQueueRecvOp
+from ngraph.transformers.cputransform import CPUTransformer
+from ngraph.transformers.hetr.placement import CostModel, place
 from ngraph.transformers.passes.hetrpasses import DeviceAssignPass, \
     CommunicationPass
 
@@ -126,3 +131,71 @@ def test_hetr_graph_passes(transformer_factory):
     check_device_assign_pass("cpu", "0", graph_op_metadata, graph_ops)
     check_communication_pass(ops_to_transform=graph_ops,
                              expected_recv_nodes=[x_plus_y])
+
+
+def test_comm_schedule_pass(transformer_factory):
+    """
+    A send to the same device and its receive, where the send is only scheduled before
+    the receive if the pass hoists it ahead of the compute it does not depend on.
+    """
+    N = ng.make_axis(length=4, name='N')
+    x = ng.placeholder([N])
+    to_send = x + 1
+    independent = ng.exp(x) * 3
+    for op in (x, to_send, independent):
+        op.metadata.update(device='cpu', device_id='0', transformer='cpu0',
+                           host_transformer=None)
+    send = CPUQueueSendOp(to_send)
+    recv = CPUQueueRecvOp(independent, send)
+    result = recv * independent
+
+    with closing(CPUTransformer()) as transformer:
+        computation = transformer.computation([independent + 2, result, send], x)
+        transformer.initialize()
+        exops = list(computation.computation_decl.exop_block)
+        ops = [exop.op for exop in exops]
+        assert ops.index(send) < ops.index(independent)
+        # the receive waits just before its first user
+        assert exops[ops.index(recv) + 1].op is result
+
+        np_x = np.arange(N.length, dtype=np.float32)
+        outputs = computation(np_x)
+        np.testing.assert_allclose(outputs[1], (np_x + 1) * np.exp(np_x) * 3, rtol=1e-5)
+
+
+def two_branch_graph():
+    H = ng.make_axis(length=8, name='H')
+    W = ng.make_axis(length=6, name='W')
+    K = ng.make_axis(length=4, name='K')
+    x = ng.placeholder([H, W])
+    a = ng.variable([W, K], initial_value=np.random.randn(W.length, K.length))
+    b = ng.variable([W, K], initial_value=np.random.randn(W.length, K.length))
+    dot_a = ng.dot(x, a)
+    dot_b = ng.dot(x, b)
+    return x, a, b, dot_a, dot_b, ng.tanh(dot_a) + ng.exp(dot_b)
+
+
+def test_auto_placement(transformer_factory):
+    x, a, b, dot_a, dot_b, result = two_branch_graph()
+
+    # communication is cheap compared to the dots, which go to different devices
+    placement = place([result], ['0', '1'], cost_model=CostModel(flops=1e3))
+    assert placement[dot_a] != placement[dot_b]
+    # a state is on the device of the ops reading it
+    reads = [op for op in placement if op.states_read == OrderedSet([a])]
+    assert reads and all(placement[op] == placement[a] for op in reads)
+
+    # communication is expensive compared to the dots, which stay together
+    placement = place([result], ['0', '1'], cost_model=CostModel(flops=1e12))
+    assert set(placement.values()) == {'0'}
+
+
+def test_auto_placement_pinned_and_memory_cap(transformer_factory):
+    x, a, b, dot_a, dot_b, result = two_branch_graph()
+    dot_b.metadata['device_id'] = '1'
+    placement = place([result], ['0', '1'])
+    assert dot_b not in placement
+    assert placement[dot_a] == '0'
+
+    with pytest.raises(ValueError):
+        place([result], ['0', '1'], memory_cap=64)
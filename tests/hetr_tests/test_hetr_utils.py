@@ -18,7 +18,8 @@ import ngraph as ng
 from ngraph.op_graph.comm_nodes import RecvOp, ScatterRecvOp, GatherRecvOp
 from ngraph.op_graph.comm_nodes import SendOp, ScatterSendOp, GatherSendOp
 from ngraph.testing.hetr_utils import create_send_recv_graph, create_scatter_gather_graph
-from ngraph.transformers.hetr.hetr_utils import comm_path_exists, update_comm_deps, find_recvs
+from ngraph.transformers.hetr.hetr_utils import comm_path_exists, update_comm_deps, find_recvs, \
+    replica_signature
 
 pytestmark = pytest.mark.hetr_only
 
@@ -120,6 +121,23 @@ def test_update_comm_deps_scatter_gather():
         set(gather_recv_x_plus_one_a.all_deps)
 
 
+def test_replica_signature():
+    ax = ng.make_axis(length=4, name='A')
+
+    def replica(device_id, add=False):
+        with ng.metadata(device='cpu', device_id=device_id, transformer='cpu' + device_id):
+            x = ng.placeholder([ax])
+            y = ng.placeholder([ax])
+            z = x + y if add else x * y
+        return [z, x, y]
+
+    first = replica('1')
+    signature, ops = replica_signature(first)
+    assert set(first) <= set(ops)
+    assert replica_signature(replica('2'))[0] == signature
+    assert replica_signature(replica('2', add=True))[0] != signature
+
+
 def assert_axes_eq_len(expected_axes, actual_axes):
     for exp, act in zip(expected_axes, actual_axes):
         assert exp.length == act.length
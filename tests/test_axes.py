@@ -377,3 +377,34 @@ def test_axes_map_init_from_axes():
     axes_map = AxesMap({ng.make_axis(1, name='aaa'): ng.make_axis(1, name='zzz')})
 
     assert axes_map['aaa'] == 'zzz'
+
+
+def test_axes_interned():
+    a = ng.make_axis(2, name='aaa')
+    b = ng.make_axis(3, name='bbb')
+    axes = ng.make_axes([a, b])
+    assert ng.make_axes([a, b]) is axes
+    assert ng.make_axes(axes) is axes
+    assert (axes - b) + b is axes
+    assert ng.make_axes([b, a]) is not axes
+    assert ng.make_axis(2, name='aaa') not in ng.make_axes([b])
+    assert ng.make_axis(2, name='aaa') in axes
+
+
+def test_axes_cached_properties_follow_axis_changes():
+    a = ng.make_axis(2, name='aaa')
+    b = ng.make_axis(3, name='bbb')
+    axes = ng.make_axes([a, b])
+    flat = ng.make_axes([ng.make_axes([a, b]).flatten()])
+    assert axes.lengths == (2, 3)
+    assert flat.full_lengths == ((2, 3),)
+    assert axes.size == 6
+
+    b.length = 4
+    assert axes.lengths == (2, 4)
+    assert flat.full_lengths == ((2, 4),)
+    assert axes.size == 8
+
+    b.named('N')
+    assert axes.names == ('aaa', 'N')
+    assert axes.batch_axis() is b
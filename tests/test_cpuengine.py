@@ -0,0 +1,90 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+"""
+The numpy code paths of the CPU engine, used for ops without an MKL-DNN kernel.
+"""
+import numpy as np
+import pytest
+
+from ngraph.transformers.cpu.cpuengine import Mkldnn
+
+
+@pytest.fixture
+def engine():
+    return Mkldnn('no_mkldnn_engine.so')
+
+
+def batchnorm_args(C=3, N=8):
+    np.random.seed(0)
+    inputs = np.random.randn(C, N).astype(np.float32)
+    gamma = np.random.randn(C, 1).astype(np.float32)
+    bias = np.random.randn(C, 1).astype(np.float32)
+    mean = inputs.mean(axis=1, keepdims=True)
+    variance = inputs.var(axis=1)
+    return inputs, gamma, bias, mean, variance, 1e-3
+
+
+def test_batchnorm(engine):
+    inputs, gamma, bias, mean, variance, epsilon = batchnorm_args()
+    delta = np.random.randn(*inputs.shape).astype(np.float32)
+    outputs = np.empty_like(inputs)
+    deltas = np.empty_like(inputs)
+
+    engine.fprop_batchnorm('bn', inputs, outputs, gamma, bias, mean, variance, epsilon)
+    xhat = (inputs - mean) / np.sqrt(variance + epsilon)[:, None]
+    np.testing.assert_allclose(outputs, gamma * xhat + bias, rtol=1e-5, atol=1e-6)
+
+    state = engine.batchnorm_states['bn']
+    engine.bprop_batchnorm('bn_bprop', deltas, delta, inputs, gamma, bias, mean, variance,
+                           epsilon, fprop_name='bn')
+    dgamma = np.sum(delta * xhat, axis=1, keepdims=True)
+    dbeta = np.sum(delta, axis=1, keepdims=True)
+    dx = gamma / np.sqrt(variance + epsilon)[:, None] * \
+        (delta - (xhat * dgamma + dbeta) / inputs.shape[1])
+    np.testing.assert_allclose(deltas, dx, rtol=1e-4, atol=1e-5)
+    # bprop used the normalized inputs of fprop
+    assert 'bn_bprop' not in engine.batchnorm_states
+
+    # the buffers are reused by later steps
+    engine.fprop_batchnorm('bn', inputs, outputs, gamma, bias, mean, variance, epsilon)
+    assert engine.batchnorm_states['bn'] is state
+
+    # without the matching fprop, bprop normalizes the inputs itself
+    other_deltas = np.empty_like(inputs)
+    engine.bprop_batchnorm('bn_bprop', other_deltas, delta, inputs.copy(), gamma, bias, mean,
+                           variance, epsilon, fprop_name='bn')
+    np.testing.assert_allclose(other_deltas, dx, rtol=1e-4, atol=1e-5)
+
+
+@pytest.mark.parametrize('slope', [0, 0.1, 2])
+def test_relu(engine, slope):
+    np.random.seed(0)
+    inputs = np.random.randn(4, 6).astype(np.float32)
+    delta = np.random.randn(4, 6).astype(np.float32)
+    outputs = np.empty_like(inputs)
+    deltas = np.empty_like(inputs)
+
+    engine.fprop_relu('relu', inputs, outputs, slope)
+    np.testing.assert_allclose(outputs, np.where(inputs > 0, inputs, slope * inputs))
+
+    engine.bprop_relu('relu_bprop', delta, deltas, inputs, slope)
+    np.testing.assert_allclose(deltas, np.where(inputs > 0, delta, slope * delta))
+
+
+def test_reorder(engine):
+    inputs = np.arange(12, dtype=np.float32).reshape(3, 4)
+    outputs = np.empty_like(inputs)
+    engine.mkl_reorder('reorder', outputs, inputs)
+    np.testing.assert_array_equal(outputs, inputs)
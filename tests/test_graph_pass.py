@@ -12,9 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ----------------------------------------------------------------------------
+import numpy as np
+
 import ngraph as ng
-from ngraph.op_graph.op_graph import as_op
+from ngraph.op_graph.op_graph import as_op, Op
 from ngraph.transformers.passes.passes import SimplePrune
+from ngraph.transformers.passes.constantfolding import ConstantFolding
 from orderedset import OrderedSet
 
 
@@ -36,3 +39,46 @@ def test_simpleprune_graph_pass():
     base_op, simple_graph = get_simple_graph()
     SimplePrune().do_pass(ops=[simple_graph])
     assert simple_graph.forwarded is base_op
+
+
+def test_graph_pass_report():
+    base_op, simple_graph = get_simple_graph()
+    report = SimplePrune().wrapped_do_pass(report=True, ops=[simple_graph])
+    assert simple_graph.forwarded is base_op
+    assert report['name'] == 'SimplePrune'
+    assert report['replacements'] == 1
+    assert report['ops_before'] == 3
+    assert report['ops_after'] == 1
+    assert report['duration'] >= 0
+
+    # without report, the graph is not counted
+    assert SimplePrune().wrapped_do_pass(ops=[get_simple_graph()[1]]) is None
+
+
+def test_constant_folding_pass():
+    F = ng.make_axis(length=4, name='F')
+    N = ng.make_axis(length=3, name='N')
+    c = ng.constant(np.arange(12, dtype=np.float32).reshape(4, 3), [F, N])
+    x = ng.placeholder([N, F])
+    y = x + ng.sum(ng.tanh(c) * 2, out_axes=[F])
+
+    report = ConstantFolding().wrapped_do_pass(report=True, ops=[y])
+    assert report['folded_ops'] == 5
+    assert report['folded_bytes'] == 4 * 4
+
+    folded = [op for op in Op.ordered_ops([y.forwarded]) if op.is_constant]
+    assert len(folded) == 1
+    np.testing.assert_allclose(folded[0].const,
+                               (np.tanh(np.arange(12).reshape(4, 3)) * 2).sum(axis=1),
+                               rtol=1e-6)
+
+
+def test_constant_folding_budget():
+    F = ng.make_axis(length=64, name='F')
+    N = ng.make_axis(length=64, name='N')
+    x = ng.placeholder([F, N])
+    y = x * ng.exp(ng.constant(2.0, [F, N]))
+
+    report = ConstantFolding(max_bytes=1024).wrapped_do_pass(report=True, ops=[y])
+    assert report['folded_ops'] == 0
+    assert report['replacements'] == 0
@@ -36,3 +36,15 @@ def test_scope_reuse():
     assert val1.name == "scope/val1"
     assert val2.name == "scope/val2"
     assert val3.name != "scope/val3"
+
+
+def test_lazy_unique_names():
+    """
+    Names are made unique in the order they are first read.
+    """
+    val1 = ScopedNameableValue("lazy_val")
+    val2 = ScopedNameableValue("lazy_val")
+    assert val2.name == "lazy_val"
+    assert val1.name != "lazy_val"
+    assert val1.name.startswith("lazy_val_")
+    assert val1.graph_label_type == "lazy_val"
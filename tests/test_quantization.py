@@ -0,0 +1,84 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import numpy as np
+
+import ngraph as ng
+from ngraph.testing import ConvParams
+from ngraph.transformers.cputransform import CPUTransformer
+from ngraph.transformers.cpu.quantization import calibrate, compare_accuracy, \
+    quantize_per_channel
+from ngraph.transformers.passes.cpuquantization import CPUQuantization
+
+
+def test_quantize_per_channel():
+    value = np.array([[0.5, -1.0], [0.0, 0.0], [2.0, 0.25]])
+    quantized, scale = quantize_per_channel(value, 0)
+    assert quantized.dtype == np.int8
+    np.testing.assert_array_equal(quantized, [[64, -127], [0, 0], [127, 16]])
+    np.testing.assert_allclose(scale, [1.0 / 127, 1, 2.0 / 127])
+
+
+def run_int8(results, parameters, batches):
+    float_transformer = CPUTransformer()
+    calibration = calibrate(float_transformer, results, parameters, batches)
+    float_computation = float_transformer.computation(results, *parameters)
+
+    int8_transformer = CPUTransformer(quantization=calibration)
+    int8_computation = int8_transformer.computation(results, *parameters)
+    report = compare_accuracy(float_computation, int8_computation, batches)
+    quantization = [graph_pass for graph_pass in int8_transformer.graph_passes
+                    if isinstance(graph_pass, CPUQuantization)][0]
+    float_transformer.close()
+    int8_transformer.close()
+    return calibration, report, quantization
+
+
+def test_int8_mlp():
+    """
+    Two affine layers with the weights and activations quantized to int8.
+    """
+    np.random.seed(0)
+    F = ng.make_axis(length=32, name='F')
+    H = ng.make_axis(length=64, name='H')
+    C = ng.make_axis(length=10, name='C')
+    N = ng.make_axis(length=16, name='N')
+    x = ng.placeholder([F, N])
+    w1 = ng.variable([H, F], initial_value=np.random.randn(64, 32) / 8)
+    w2 = ng.variable([H, C], initial_value=np.random.randn(64, 10) / 8)
+    hidden = ng.maximum(ng.dot(w1, x), 0)
+    y = ng.dot(hidden, w2)
+
+    batches = [(np.random.randn(32, 16),) for _ in range(4)]
+    calibration, report, quantization = run_int8(y, [x], batches)
+
+    assert len(calibration.weights) == 2
+    assert quantization.quantized_ops == 2
+    assert quantization.float_weight_bytes == 4 * quantization.weight_bytes
+    assert report['relative_error'] < 0.05
+    assert report['top1_agreement'] > 0.9
+
+
+def test_int8_conv():
+    cf = ConvParams(C=3, N=4, K=8, H=8, W=8, R=3, S=3)
+    np.random.seed(0)
+    inputs = ng.placeholder(cf.ax_i)
+    filters = ng.variable(cf.ax_f, initial_value=np.random.randn(*cf.dimF))
+    output = ng.convolution(cf.conv_params, inputs, filters, axes=cf.ax_o)
+
+    batches = [(np.random.randn(*cf.dimI),) for _ in range(2)]
+    calibration, report, quantization = run_int8(output, [inputs], batches)
+
+    assert quantization.quantized_ops == 1
+    assert report['relative_error'] < 0.05
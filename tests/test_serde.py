@@ -35,7 +35,7 @@ def strip_dict(d):
     For equality testing we need to remove attributes of dicts that are either unique to each
     instance or need more complex equality handling
     """
-    keys = ('_NameableValue__name', '_axes', '_args', 'valfun', 'dtype',
+    keys = ('_NameableValue__name', '_id', '_axes', '_args', 'valfun', 'dtype',
             'scale', '_tensor', '_send_node')
     for key in keys:
         if key in d:
@@ -199,3 +199,40 @@ def test_all_op_references():
     base_all_ops = Op.all_op_references([base_op])
     assert base_op in base_all_ops
     assert simple_graph not in base_all_ops
+
+
+def test_lazy_uuid():
+    """
+    Op uuids are only generated when needed, and ids increase in construction order.
+    """
+    base_op, simple_graph = get_simple_graph()
+    assert base_op._uuid is None
+    assert base_op.id < simple_graph.id
+    ser_string = ser.serialize_graph([simple_graph])
+    assert base_op._uuid is not None
+    py_graph = ser.deserialize_graph(ser_string)
+    assert base_op.uuid in set(op.uuid for op in py_graph)
+
+
+def test_copy_graph():
+    """
+    Copying a graph copies the attributes that are serialized, with new identities.
+    """
+    z, recv_x, recv_x_plus_one, send_x, x_plus_one, from_node, send_x_plus_one = \
+        create_send_recv_graph()
+    copies = ser.copy_graph([z])
+    orig_graph = Op.ordered_ops([z])
+
+    assert set(Op.ordered_ops([copies[z]])) == set(copies[op] for op in orig_graph)
+    for op in orig_graph:
+        copy = copies[op]
+        assert copy is not op
+        assert type(copy) is type(op)
+        assert copy.metadata == op.metadata
+        assert copy.axes == op.axes
+        assert copy.args == tuple(copies[arg] for arg in op.args)
+        for key, val in op.__dict__.items():
+            if ser.is_serialized_attribute(key) and key not in ser.IGNORED_ATTRIBUTES and \
+                    not isinstance(val, Op):
+                np.testing.assert_equal(getattr(copy, key), val)
+    assert all(copies[op].uuid != op.uuid for op in orig_graph)
@@ -870,6 +870,54 @@ def test_cross_entropy_softmax_rec_deriv(transformer_factory, recurrent_input_te
     )
 
 
+def test_softmax_cross_entropy_labels(transformer_factory, input_tensor):
+    """
+    Class indices and the equivalent one-hot targets give the same cross-entropy and
+    derivative, also for logits whose softmax underflows.
+    """
+    p_x = input_tensor
+    class_axis, batch_axis = p_x.axes
+    p_t = ng.placeholder(p_x.axes)
+    p_label = ng.placeholder([batch_axis])
+
+    x = rng.uniform(-5000, 5000, p_x.axes)
+    label = rng.random_integers(0, class_axis.length - 1, [batch_axis])
+    t = np.eye(class_axis.length)[label].T
+    x_max = x.max(0)
+    expected = np.log(np.sum(np.exp(x - x_max), 0)) + x_max - x[label, range(batch_axis.length)]
+
+    with ExecutorFactory() as ex:
+        onehot_cost = ng.softmax_cross_entropy(p_x, p_t)
+        index_cost = ng.softmax_cross_entropy(p_x, p_label)
+        onehot_deriv = ng.deriv(ng.sum(onehot_cost, out_axes=()), p_x)
+        index_deriv = ng.deriv(ng.sum(index_cost, out_axes=()), p_x)
+        onehot_fun = ex.executor([onehot_cost, onehot_deriv], p_x, p_t)
+        index_fun = ex.executor([index_cost, index_deriv], p_x, p_label)
+
+        onehot_value, onehot_deriv = onehot_fun(x, t)
+        index_value, index_deriv = index_fun(x, label)
+        ng.testing.assert_allclose(onehot_value, expected, rtol=1e-5)
+        ng.testing.assert_allclose(index_value, expected, rtol=1e-5)
+        ng.testing.assert_allclose(onehot_deriv, np_softmax(x, 0) - t, atol=1e-6)
+        ng.testing.assert_allclose(index_deriv, np_softmax(x, 0) - t, atol=1e-6)
+
+
+def test_softmax_cross_entropy_transposed_deriv(transformer_factory, input_tensor):
+    p_x = input_tensor
+    p_t = ng.placeholder(p_x.axes[::-1])
+
+    x = rng.uniform(0, 1, p_x.axes)
+    t = np_softmax(rng.uniform(0, 1, p_x.axes), 0).T
+
+    check_derivative(
+        ng.softmax_cross_entropy(p_x, p_t),
+        p_x, 0.001, x,
+        parameters=[p_t],
+        parameter_values=[t],
+        atol=1e-2, rtol=1e-2
+    )
+
+
 def test_cross_entropy_multi_unmatched_axes(input_tensor):
     """If y and t have different axes, an error should be thrown immediately"""
     y = input_tensor
@@ -0,0 +1,79 @@
+# ----------------------------------------------------------------------------
+# Copyright 2017 Nervana Systems Inc.
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ----------------------------------------------------------------------------
+import numpy as np
+import pytest
+from contextlib import closing
+
+import ngraph as ng
+import ngraph.transformers as ngt
+from ngraph.transformers.profiler import Histogram
+
+pytestmark = pytest.mark.transformer_dependent
+
+
+def test_histogram():
+    histogram = Histogram(num_buckets=8)
+    for duration in (0.5e-6, 3e-6, 3e-6, 1.0):
+        histogram.add(duration)
+    assert histogram.count == 4
+    assert histogram.counts[0] == 1
+    assert histogram.counts[2] == 2
+    assert histogram.counts[-1] == 1
+    assert histogram.percentile(50) == 4e-6
+    assert histogram.percentile(100) == 1.0
+    assert np.isclose(histogram.mean, (1.0 + 6.5e-6) / 4)
+
+
+def test_profiler_toggle():
+    """
+    Profiling is turned on and off without recompiling and counts dot flops.
+    """
+    F = ng.make_axis(length=8, name='F')
+    N = ng.make_axis(length=4, name='N')
+    H = ng.make_axis(length=2, name='H')
+
+    x = ng.placeholder([F, N])
+    w = ng.variable([H, F], initial_value=np.ones((2, 8), dtype='float32'))
+    x_value = np.ones((8, 4), dtype='float32')
+
+    with closing(ngt.make_transformer_factory('cpu')()) as transformer:
+        computation = transformer.computation(ng.tanh(ng.dot(w, x)), x)
+        profiler = transformer.profiler
+
+        computation(x_value)
+        assert len(profiler.op_type_stats) == 0
+
+        profiler.enable()
+        for _ in range(3):
+            computation(x_value)
+        profiler.disable()
+        computation(x_value)
+
+        dot_stats = [stats for name, stats in profiler.op_type_stats.items()
+                     if name.startswith('Dot')]
+        assert len(dot_stats) == 1
+        assert dot_stats[0].calls == 3
+        assert dot_stats[0].flops == 3 * 2 * (2 * 4) * 8
+        assert dot_stats[0].bytes == 3 * 4 * (2 * 8 + 8 * 4 + 2 * 4)
+        assert profiler.op_type_stats['TanhOp'].flops == 3 * 2 * 4
+
+        table = profiler.table()
+        assert 'TanhOp' in table
+        assert len(table.splitlines()) == len(profiler.op_type_stats) + 2
+        events = profiler.trace().events
+        assert len(events) == len(list(computation.computation_decl.exop_block))
+
+        profiler.reset()
+        assert len(profiler.exop_stats) == 0
@@ -14,8 +14,10 @@
 # ----------------------------------------------------------------------------
 import numpy as np
 import pytest
+from contextlib import closing
 
 import ngraph as ng
+import ngraph.transformers as ngt
 from ngraph.testing import executor
 
 pytestmark = pytest.mark.transformer_dependent
@@ -78,3 +80,128 @@ def test_execute_non_placeholder():
     with pytest.raises(ValueError):
         with executor(x + y, x, y) as ex:
             ex
+
+
+def test_bucketed_computation():
+    """
+    Calls are dispatched to the smallest bucket that fits and share the weights.
+    """
+    F = ng.make_axis(length=3, name='F')
+    N = ng.make_axis(length=4, name='N')
+    H = ng.make_axis(length=2, name='H')
+
+    w_value = np.arange(6, dtype='float32').reshape(2, 3)
+    x = ng.placeholder([F, N])
+    w = ng.variable([H, F], initial_value=w_value)
+    update = ng.assign(w, w * 2)
+
+    with closing(ngt.make_transformer_factory('cpu')()) as transformer:
+        bucketed = transformer.bucketed_computation({N: (2, 8)}, ng.dot(w, x), x)
+        assert [lengths for lengths, _ in bucketed.buckets] == [(2,), (8,)]
+        assert N.length == 4
+
+        for batch_size, bucket_size in ((1, 2), (2, 2), (5, 8), (8, 8)):
+            x_value = np.random.rand(3, batch_size).astype('float32')
+            assert bucketed.select_bucket((batch_size,))[0] == (bucket_size,)
+            np.testing.assert_allclose(bucketed(x_value), w_value.dot(x_value), rtol=1e-5)
+
+        # The weights are shared by every bucket
+        transformer.computation(update)()
+        x_value = np.random.rand(3, 3).astype('float32')
+        np.testing.assert_allclose(bucketed(x_value), 2 * w_value.dot(x_value), rtol=1e-5)
+
+        with pytest.raises(ValueError):
+            bucketed(np.ones((3, 9), dtype='float32'))
+
+
+def test_bucketed_computation_persistent_axis():
+    """
+    Expect a failure if a persistent tensor depends on a bucketed axis.
+    """
+    N = ng.make_axis(length=4, name='N')
+
+    x = ng.placeholder([N])
+    y = ng.variable([N], initial_value=0)
+
+    with closing(ngt.make_transformer_factory('cpu')()) as transformer:
+        with pytest.raises(ValueError):
+            transformer.bucketed_computation({N: (2, 8)}, x + y, x)
+
+
+def test_compile_report():
+    """
+    Compiling a computation reports the passes, the generated code and the pools.
+    """
+    N = ng.make_axis(length=4, name='N')
+    x = ng.placeholder([N])
+    y = ng.variable([N], initial_value=1)
+
+    with closing(ngt.make_transformer_factory('cpu')()) as transformer:
+        computation = transformer.computation(x + y, x)
+        report = computation.compile_report
+
+        pass_names = [pass_report['name'] for pass_report in report['passes']]
+        assert pass_names == [type(graph_pass).__name__
+                              for graph_pass in transformer.graph_passes]
+        for pass_report in report['passes']:
+            assert pass_report['exops_before'] > 0
+            assert pass_report['exops_after'] > 0
+        assert report['exops'] == report['passes'][-1]['exops_after']
+        assert report['compile_time'] >= report['pass_time'] + report['load_time']
+        assert report['codegen_lines'] > 0
+        assert report['persistent_pool_size'] >= 2 * 4 * 4
+
+
+def test_set_tensor_view_value():
+    """
+    A variable's storage is written directly, without building an assign computation.
+    """
+    C = ng.make_axis(length=3)
+    D = ng.make_axis(length=2)
+    w = ng.variable([C, D], initial_value=0)
+    value = np.arange(6, dtype='float32').reshape((3, 2))
+
+    with closing(ngt.make_transformer_factory('cpu')()) as transformer:
+        computation = transformer.computation(w * 2)
+        transformer.initialize()
+        transformer.set_tensor_view_value(w, value)
+        np.testing.assert_array_equal(transformer.get_tensor_view_value(w), value)
+        np.testing.assert_array_equal(computation(), value * 2)
+
+        unused = ng.variable([C], initial_value=0)
+        assert transformer.has_tensor_view(w)
+        assert not transformer.has_tensor_view(unused)
+        with pytest.raises(ValueError):
+            transformer.set_tensor_view_value(unused, value[:, 0])
+
+
+def test_staged_inputs():
+    """
+    Arguments staged ahead of a call are cast and used like regular arguments.
+    """
+    C = ng.make_axis(length=3)
+    x = ng.placeholder([C])
+    y = ng.placeholder(())
+
+    with closing(ngt.make_transformer_factory('cpu')()) as transformer:
+        computation = transformer.computation(x * y, x, y)
+        values = [(np.arange(3) + i, i) for i in range(5)]
+        staged = [computation.stage(*values[0]), computation.stage(*values[1])]
+        for i in range(len(values)):
+            result = computation(staged.pop(0))
+            np.testing.assert_array_equal(result, values[i][0] * values[i][1])
+            if i + 2 < len(values):
+                staged.append(computation.stage(feed_dict={x: values[i + 2][0],
+                                                           y: values[i + 2][1]}))
+
+        assert computation.stager.ring[0][0].dtype == x.dtype
+        with pytest.raises(ValueError):
+            computation(computation.stage(np.ones(4), 1))
+
+        # staging more calls than there are buffers fails instead of waiting forever
+        computation.stage(*values[0])
+        computation.stage(*values[1])
+        with pytest.raises(RuntimeError):
+            computation.stage(*values[2])
+        stager = computation.stager
+    assert stager.thread is None